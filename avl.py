@@ -6,11 +6,37 @@ AVL Module
 
 class AVL:
     """AVL main class."""
-    def __init__(self, key, left, right, bal):
+    # Nœud à facteur d'équilibre (hauteur gauche - hauteur droite, dans
+    # {-1, 0, 1} hors rotation) : aucune hauteur n'est stockée ni recalculée.
+    # ts (dernière activité) et size (taille du sous-arbre) en font un nœud
+    # de connexion pour avl_balance.BalanceAVLTree.
+    __slots__ = ('key', 'ts', 'left', 'right', 'bal', 'size')
+
+    def __init__(self, key, left, right, bal, ts=0.0):
         self.key = key
+        self.ts = ts
         self.left = left
         self.right = right
         self.bal = bal
+        self.size = 1 + _size(left) + _size(right)
+
+    @property
+    def height(self):
+        # Calculée à la demande en O(log n) : on descend toujours du côté le plus haut
+        h = 0
+        node = self
+        while node is not None:
+            h += 1
+            node = node.right if node.bal < 0 else node.left
+        return h
+
+    @property
+    def data(self):
+        return Connexion.from_key(self.key, self.ts)
+
+
+def _size(node):
+    return node.size if node is not None else 0
 
 
 def to_str(B, s=""):
@@ -32,6 +58,8 @@ def to_str(B, s=""):
 
 
 # rotations: works only in "usefull" cases
+# (bal de A à -2 / +2 après une insertion ou une suppression) ; les tailles
+# des nœuds déplacés sont recalculées, celles des ancêtres ne changent pas
 
 def lr(A):  # rotation gauche
     # Check if A.right is None before accessing its attributes
@@ -43,6 +71,8 @@ def lr(A):  # rotation gauche
     aux.left = A
     aux.bal += 1
     A.bal = -aux.bal
+    aux.size = A.size
+    A.size = 1 + _size(A.left) + _size(A.right)
     return aux
 
 
@@ -56,6 +86,8 @@ def rr(A):  # rotation droite
     aux.right = A
     aux.bal -= 1
     A.bal = -aux.bal
+    aux.size = A.size
+    A.size = 1 + _size(A.left) + _size(A.right)
     return aux
 
 
@@ -68,6 +100,7 @@ def lrr(A):  # rotation gauche-droite
     if A.left.right is None:
         return A
 
+    size = A.size
     # left rotation on left child
     aux = A.left.right
     A.left.right = aux.left
@@ -85,6 +118,9 @@ def lrr(A):  # rotation gauche-droite
         (A.left.bal, A.right.bal) = (0, 0)
     A.bal = 0
 
+    A.left.size = 1 + _size(A.left.left) + _size(A.left.right)
+    A.right.size = 1 + _size(A.right.left) + _size(A.right.right)
+    A.size = size
     return A
 
 
@@ -98,6 +134,7 @@ def rlr(A):  # rotation droite-gauche
     if aux is None:
         return A
 
+    size = A.size
     A.right.left = aux.right
     aux.right = A.right
 
@@ -111,30 +148,448 @@ def rlr(A):  # rotation droite-gauche
         aux.right.bal = -1
     aux.bal = 0
 
+    aux.left.size = 1 + _size(aux.left.left) + _size(aux.left.right)
+    aux.right.size = 1 + _size(aux.right.left) + _size(aux.right.right)
+    aux.size = size
     return aux
 
 # For backward compatibility with existing code
-from datetime import datetime, timedelta
+from datetime import datetime
+import heapq
+import os
+import threading
+import time
+
+def ip_to_int(ip):
+    """
+    Convertit une adresse IPv4 "a.b.c.d" en entier 32 bits.
+    Lève ValueError si l'adresse est invalide.
+    """
+    parts = ip.strip().split('.')
+    if len(parts) != 4:
+        raise ValueError(f"Adresse IP invalide: {ip}")
+    key = 0
+    for part in parts:
+        if not (part.isascii() and part.isdigit()) or len(part) > 3:
+            raise ValueError(f"Adresse IP invalide: {ip}")
+        octet = int(part)
+        if octet > 255:
+            raise ValueError(f"Adresse IP invalide: {ip}")
+        key = (key << 8) | octet
+    return key
+
+
+def int_to_ip(key):
+    """Convertit un entier 32 bits en adresse IPv4 "a.b.c.d"."""
+    return f"{(key >> 24) & 255}.{(key >> 16) & 255}.{(key >> 8) & 255}.{key & 255}"
+
+
+def parse_cidr(cidr):
+    """
+    Convertit un sous-réseau "a.b.c.d/n" en bornes de clés (inclusives).
+    Les bits d'hôte de l'adresse sont ignorés. Lève ValueError si invalide.
+    """
+    ip, sep, prefix = cidr.strip().partition('/')
+    if not sep or not (prefix.isascii() and prefix.isdigit()) or int(prefix) > 32:
+        raise ValueError(f"Sous-réseau invalide: {cidr}")
+    host_bits = 32 - int(prefix)
+    lo = ip_to_int(ip) >> host_bits << host_bits
+    return lo, lo | ((1 << host_bits) - 1)
+
+
+def parse_range(requete):
+    """
+    Convertit un sous-réseau "a.b.c.d/n", une plage "IP1-IP2" ou une IP seule
+    en bornes de clés (inclusives). Lève ValueError si invalide.
+    """
+    if '/' in requete:
+        return parse_cidr(requete)
+    debut, _, fin = requete.partition('-')
+    return ip_to_int(debut.strip()), ip_to_int((fin or debut).strip())
+
+
+# Extension des instantanés binaires (voir snapshot.py) ; tout autre nom
+# de fichier utilise le format texte d'import/export "ip,horodatage ISO"
+BINARY_EXTENSION = ".bin"
+
+
+def read_connexions(filename):
+    """
+    Lit un fichier de connexions, au format binaire (extension .bin) ou texte
+    "ip,horodatage ISO". Renvoie deux listes parallèles (clés, timestamps epoch)
+    dans l'ordre du fichier ; les lignes texte invalides sont rejetées.
+    Lève FileNotFoundError si le fichier n'existe pas.
+    """
+    if filename.endswith(BINARY_EXTENSION):
+        from snapshot import read_snapshot
+        return read_snapshot(filename)
+
+    keys = []
+    stamps = []
+    fromisoformat = datetime.fromisoformat
+    with open(filename, 'r') as f:
+        for line in f:
+            if line.strip():
+                try:
+                    ip, timestamp_str = line.strip().split(',')
+                    key = ip_to_int(ip)
+                    ts = fromisoformat(timestamp_str).timestamp()
+                except ValueError:
+                    continue
+                keys.append(key)
+                stamps.append(ts)
+    return keys, stamps
+
+
+def write_connexions(filename, entries):
+    """
+    Écrit des couples (clé, timestamp epoch) triés par clé, au format binaire
+    (extension .bin) ou texte "ip,horodatage ISO".
+    """
+    if filename.endswith(BINARY_EXTENSION):
+        from snapshot import write_snapshot
+        write_snapshot(filename, entries)
+        return
+
+    # Écriture dans un fichier temporaire puis remplacement atomique :
+    # un arrêt brutal ne laisse jamais un instantané à moitié écrit
+    fromtimestamp = datetime.fromtimestamp
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, 'w') as f:
+        for key, ts in entries:
+            f.write(f"{int_to_ip(key)},{fromtimestamp(ts).isoformat()}\n")
+        f.flush()
+        os.fsync(f.fileno())
+    replace_durably(tmp_filename, filename)
+
+
+def replace_durably(tmp_filename, filename):
+    # Renomme un fichier temporaire déjà synchronisé puis synchronise le
+    # répertoire : après une coupure de courant, l'instantané renommé est
+    # complet avant que l'appelant ne vide le journal
+    os.replace(tmp_filename, filename)
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(filename)), os.O_RDONLY)
+    except OSError:
+        # Répertoires non ouvrables (Windows) : le renommage reste atomique
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def is_strictly_sorted(keys):
+    return all(keys[i] < keys[i + 1] for i in range(len(keys) - 1))
+
+
+def add_to_batch(batch, key, ts):
+    # Ajoute un événement à un lot clé -> timestamp : le plus récent l'emporte
+    if ts > batch.get(key, float('-inf')):
+        batch[key] = ts
+
+
+def newest_per_key(pairs):
+    # Lot clé -> timestamp le plus récent à partir de couples (clé, timestamp)
+    batch = {}
+    for key, ts in pairs:
+        add_to_batch(batch, key, ts)
+    return batch
+
+
+def merge_sorted_batch(keys, stamps, batch):
+    # Fusionne des colonnes triées et un lot de clés absentes de ces colonnes ;
+    # deux séquences triées : le tri de Python les fusionne en temps linéaire
+    if not batch:
+        return keys, stamps
+    pairs = list(zip(keys, stamps))
+    pairs.extend(sorted(batch.items()))
+    pairs.sort()
+    return [key for key, _ in pairs], [ts for _, ts in pairs]
+
+
+def sorted_unique(keys, stamps):
+    # Trie et dédoublonne des colonnes (clés, timestamps) lues dans un fichier :
+    # la dernière ligne d'une IP l'emporte, comme avec des insertions successives
+    batch = dict(zip(keys, stamps))
+    keys = sorted(batch)
+    return keys, [batch[key] for key in keys]
+
 
 class Connexion:
+    # Objet d'interface : l'arbre ne stocke que la clé entière et un
+    # timestamp epoch, les Connexion sont construites à la demande
+    __slots__ = ('key', 'timestamp')
+
     def __init__(self, ip):
-        self.ip = ip
+        # L'IP est analysée une seule fois : l'arbre compare les entiers
+        self.key = ip_to_int(ip)
         self.timestamp = datetime.now()
 
+    @classmethod
+    def from_key(cls, key, ts):
+        connexion = cls.__new__(cls)
+        connexion.key = key
+        connexion.timestamp = datetime.fromtimestamp(ts)
+        return connexion
+
+    @property
+    def ip(self):
+        return int_to_ip(self.key)
+
     def __lt__(self, other):
-        return self.ip < other.ip
+        return self.key < other.key
 
     def __str__(self):
         return f"IP: {self.ip}, Timestamp: {self.timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
 
 class AVLNode:
-    def __init__(self, data):
-        self.data = data
+    # Nœud compact : clé IP et dernière activité (epoch) stockées en ligne
+    __slots__ = ('key', 'ts', 'left', 'right', 'height', 'size')
+
+    def __init__(self, key, ts):
+        self.key = key
+        self.ts = ts
         self.left = None
         self.right = None
         self.height = 1
+        # Nombre de nœuds du sous-arbre (statistiques d'ordre)
+        self.size = 1
+
+    @property
+    def data(self):
+        return Connexion.from_key(self.key, self.ts)
+
+class ExpiryIndex:
+    """
+    Index secondaire des connexions ordonné par date de dernière activité
+    (tas binaire de couples (timestamp epoch, clé)).
+
+    Les entrées devenues obsolètes (IP rafraîchie ou supprimée) ne sont pas
+    retirées du tas : elles sont comptées puis ignorées lors du nettoyage,
+    et le tas est reconstruit quand elles deviennent majoritaires.
+    """
+    def __init__(self):
+        self.heap = []
+        self.stale = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, ts, key):
+        heapq.heappush(self.heap, (ts, key))
+
+    def invalidate(self):
+        self.stale += 1
+
+    def needs_compaction(self):
+        return self.stale > 64 and 2 * self.stale > len(self.heap)
+
+    def rebuild(self, entries):
+        # entries : itérable de couples (timestamp epoch, clé)
+        self.heap = list(entries)
+        heapq.heapify(self.heap)
+        self.stale = 0
+
+
+class ExpiryScan:
+    """
+    Expiration budgétée des moteurs sans index d'expiration (PoolAVLTree,
+    PersistentAVLTree).
+
+    Les connexions sont balayées par tranches sous l'échéance, éventuellement
+    sur plusieurs passages ; les candidates, rangées en tas par timestamp, sont
+    ensuite supprimées de la plus ancienne à la plus récente au fil des passages, sans
+    nouveau balayage. Une candidate rafraîchie ou supprimée entre-temps est
+    ignorée ; une connexion devenue inactive après le début du balayage
+    attend le cycle suivant, lancé une fois les candidates épuisées.
+
+    Args:
+        entries: Itérateur des couples (timestamp epoch, clé) à balayer
+        cutoff (float): Seuil du balayage
+    """
+    CHUNK = 1024
+
+    def __init__(self, entries, cutoff):
+        self.entries = entries
+        self.cutoff = cutoff
+        self.scanned = 0
+        self.found = []
+        # Tas des candidates (timestamp, clé), constitué à la fin du balayage
+        self.pending = None
+
+    def scan(self, deadline):
+        """
+        Poursuit le balayage jusqu'à son terme ou jusqu'à l'échéance.
+
+        Args:
+            deadline (float): Échéance en secondes (time.perf_counter)
+
+        Returns:
+            bool: True si le balayage est terminé
+        """
+        if self.pending is not None:
+            return True
+        found, cutoff, chunk = self.found, self.cutoff, self.CHUNK
+        for ts, key in self.entries:
+            if ts < cutoff:
+                found.append((ts, key))
+            self.scanned += 1
+            if not self.scanned % chunk and time.perf_counter() >= deadline:
+                return False
+        # Tas plutôt que tri : O(n) en fin de balayage, O(log n) par suppression
+        heapq.heapify(found)
+        self.pending, self.found = found, None
+        return True
+
+    def expire(self, root, cutoff, deadline, current_ts, delete):
+        """
+        Supprime les candidates antérieures à cutoff, au moins une avant
+        de s'arrêter à l'échéance.
+
+        Args:
+            root: La racine du moteur
+            cutoff (float): Seuil d'expiration du passage
+            deadline (float): Échéance en secondes (time.perf_counter)
+            current_ts: Fonction (racine, clé) -> timestamp actuel ou None
+            delete: Fonction (racine, clé) -> nouvelle racine
+
+        Returns:
+            tuple: (racine, clés supprimées, True si les candidates sont épuisées)
+        """
+        pending = self.pending
+        cles = []
+        while pending and pending[0][0] < cutoff:
+            if cles and time.perf_counter() >= deadline:
+                return root, cles, False
+            ts, key = heapq.heappop(pending)
+            if current_ts(root, key) == ts:
+                root = delete(root, key)
+                cles.append(key)
+        return root, cles, True
+
+
+class NodeCache:
+    """
+    Cache borné clé -> nœud des IP les plus consultées (remplacement CLOCK).
+
+    Un accès réussi ne fait que marquer l'entrée (aucune modification de
+    structure) : les lectures parallèles de ConnectionTable peuvent l'utiliser
+    sans verrou. Les ajouts, sur défaut de cache, prennent un verrou interne ;
+    une entrée réutilisée pendant une lecture est détectée par sa clé.
+    Filtre d'admission : une IP n'entre qu'à son deuxième défaut parmi les
+    capacity derniers, les IP vues une seule fois ne coûtent qu'un ajout
+    dans un ensemble.
+    Les suppressions (invalidate, clear) n'ont lieu que pendant les écritures.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.keys = [None] * capacity
+        self.nodes = [None] * capacity
+        self.referenced = bytearray(capacity)
+        self.positions = {}
+        self.hand = 0
+        self.seen = set()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self.positions)
+
+    def get(self, key):
+        position = self.positions.get(key)
+        if position is not None:
+            node = self.nodes[position]
+            if node is not None and node.key == key:
+                self.referenced[position] = 1
+                self.hits += 1
+                return node
+        self.misses += 1
+        return None
+
+    def put(self, key, node):
+        seen = self.seen
+        if key not in seen:
+            if len(seen) >= self.capacity:
+                seen.clear()
+            seen.add(key)
+            return
+        with self.lock:
+            positions = self.positions
+            position = positions.get(key)
+            if position is not None:
+                self.nodes[position] = node
+                return
+            # L'aiguille passe les entrées marquées (en effaçant leur marque)
+            # jusqu'à la première non consultée depuis son dernier passage
+            referenced = self.referenced
+            capacity = self.capacity
+            hand = self.hand
+            while referenced[hand]:
+                referenced[hand] = 0
+                hand += 1
+                if hand == capacity:
+                    hand = 0
+            keys = self.keys
+            old = keys[hand]
+            if old is not None:
+                del positions[old]
+                self.evictions += 1
+            keys[hand] = key
+            self.nodes[hand] = node
+            positions[key] = hand
+            hand += 1
+            self.hand = hand if hand < capacity else 0
+
+    def invalidate(self, key):
+        position = self.positions.pop(key, None)
+        if position is not None:
+            self.keys[position] = None
+            self.nodes[position] = None
+            self.referenced[position] = 0
+            self.invalidations += 1
+
+    def clear(self):
+        self.keys = [None] * self.capacity
+        self.nodes = [None] * self.capacity
+        self.referenced = bytearray(self.capacity)
+        self.positions = {}
+        self.hand = 0
+        self.seen = set()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "capacity": self.capacity,
+            "size": len(self.positions),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
 
 class AVLTree:
+    # Chaque instance gère un seul arbre : l'index d'expiration suit les
+    # insertions et suppressions faites à travers elle.
+    def __init__(self, cache_size=0):
+        self.expiry = ExpiryIndex()
+        self.count = 0
+        # Journal des mutations (journal.Journal), optionnel
+        self.journal = None
+        # Cache des IP fréquentes (recherches et rafraîchissements), optionnel
+        self.cache = NodeCache(cache_size) if cache_size else None
+
+    def __len__(self):
+        # Nombre de connexions, maintenu en O(1)
+        return self.count
+
     def height(self, node):
         if node is None:
             return 0
@@ -145,9 +600,16 @@ class AVLTree:
             return 0
         return self.height(node.left) - self.height(node.right)
 
+    def size(self, node):
+        if node is None:
+            return 0
+        return node.size
+
     def update_height(self, node):
+        # Met à jour la hauteur et la taille du sous-arbre
         if node is not None:
             node.height = 1 + max(self.height(node.left), self.height(node.right))
+            node.size = 1 + self.size(node.left) + self.size(node.right)
 
     def right_rotate(self, y):
         x = y.left
@@ -177,46 +639,177 @@ class AVLTree:
 
         return y
 
-    def insert(self, root, data):
-        # Insertion standard BST
-        if root is None:
-            return AVLNode(data)
-
-        if data.ip < root.data.ip:
-            root.left = self.insert(root.left, data)
-        elif data.ip > root.data.ip:
-            root.right = self.insert(root.right, data)
-        else:
-            # IP déjà présente, mise à jour du timestamp
-            root.data.timestamp = data.timestamp
-            return root
-
-        # Mise à jour de la hauteur
-        self.update_height(root)
-
-        # Vérification de l'équilibre
-        balance = self.balance_factor(root)
-
-        # Cas de déséquilibre
-        # Cas Gauche-Gauche
-        if balance > 1 and data.ip < root.left.data.ip:
-            return self.right_rotate(root)
+    def rebalance(self, node):
+        # Recalcule la hauteur du nœud et applique la rotation nécessaire ;
+        # renvoie la nouvelle racine du sous-arbre
+        left = node.left
+        right = node.right
+        hl = left.height if left is not None else 0
+        hr = right.height if right is not None else 0
+        balance = hl - hr
+
+        # Cas Gauche-Gauche / Gauche-Droite
+        if balance > 1:
+            if self.balance_factor(left) < 0:
+                node.left = self.left_rotate(left)
+            return self.right_rotate(node)
+
+        # Cas Droite-Droite / Droite-Gauche
+        if balance < -1:
+            if self.balance_factor(right) > 0:
+                node.right = self.right_rotate(right)
+            return self.left_rotate(node)
+
+        node.height = 1 + (hl if hl > hr else hr)
+        node.size = 1 + (left.size if left is not None else 0) + (right.size if right is not None else 0)
+        return node
+
+    def _retrace(self, root, path, delta):
+        # Remontée du chemin (pile explicite) en rééquilibrant de bas en haut ;
+        # dès qu'une hauteur de sous-arbre ne change plus, il ne reste qu'à
+        # ajuster de delta (+1 insertion, -1 suppression) la taille des ancêtres
+        for i in range(len(path) - 1, -1, -1):
+            node = path[i]
+            old_height = node.height
+            new_node = self.rebalance(node)
+            if i > 0:
+                parent = path[i - 1]
+                if parent.left is node:
+                    parent.left = new_node
+                else:
+                    parent.right = new_node
+            else:
+                root = new_node
+            if new_node.height == old_height:
+                for j in range(i):
+                    path[j].size += delta
+                break
+        return root
 
-        # Cas Droite-Droite
-        if balance < -1 and data.ip > root.right.data.ip:
-            return self.left_rotate(root)
+    def _compact_expiry(self, root):
+        if self.expiry.needs_compaction():
+            self.expiry.rebuild((node.ts, node.key) for node in self._iter_nodes(root))
 
-        # Cas Gauche-Droite
-        if balance > 1 and data.ip > root.left.data.ip:
-            root.left = self.left_rotate(root.left)
-            return self.right_rotate(root)
+    def insert(self, root, data):
+        return self._insert(root, data.key, data.timestamp.timestamp())
 
-        # Cas Droite-Gauche
-        if balance < -1 and data.ip < root.right.data.ip:
-            root.right = self.right_rotate(root.right)
-            return self.left_rotate(root)
+    def _insert(self, root, key, ts):
+        if self.journal is not None:
+            self.journal.record_insert(key, ts)
 
-        return root
+        # Insertion standard BST
+        if root is None:
+            self.expiry.rebuild([(ts, key)])
+            self.count = 1
+            if self.cache is not None:
+                self.cache.clear()
+            return AVLNode(key, ts)
+
+        # IP fréquente déjà en cache : rafraîchissement sans descente
+        if self.cache is not None:
+            node = self.cache.get(key)
+            if node is not None:
+                self._refresh(root, node, ts)
+                return root
+
+        path = []
+        node = root
+        while node is not None:
+            node_key = node.key
+            path.append(node)
+            if key < node_key:
+                node = node.left
+            elif key > node_key:
+                node = node.right
+            else:
+                # IP déjà présente, mise à jour du timestamp
+                if self.cache is not None:
+                    self.cache.put(key, node)
+                self._refresh(root, node, ts)
+                return root
+
+        parent = path[-1]
+        if key < parent.key:
+            parent.left = AVLNode(key, ts)
+        else:
+            parent.right = AVLNode(key, ts)
+        self.expiry.push(ts, key)
+        self.count += 1
+
+        return self._retrace(root, path, 1)
+
+    def _refresh(self, root, node, ts):
+        node.ts = ts
+        self.expiry.push(ts, node.key)
+        self.expiry.invalidate()
+        self._compact_expiry(root)
+
+    def insert_many(self, root, connexions):
+        """
+        Insère ou rafraîchit un lot de connexions.
+        Le lot est trié et dédoublonné (timestamp le plus récent par IP) ;
+        un timestamp existant n'est jamais remplacé par un plus ancien.
+        Renvoie (nouvelle racine, nb insérées, nb rafraîchies) ; une IP déjà
+        présente compte comme rafraîchie, que son timestamp soit remplacé ou non.
+        """
+        batch = newest_per_key((connexion.key, connexion.timestamp.timestamp()) for connexion in connexions)
+        return self._upsert_many(root, batch)
+
+    def _upsert_many(self, root, batch):
+        # batch : dictionnaire clé -> timestamp epoch, déjà dédoublonné
+        inserted = refreshed = 0
+
+        # Petit lot devant l'arbre : insertions individuelles en O(m log n).
+        # Mesuré : une reconstruction coûte environ 6 descentes par élément.
+        m = len(batch)
+        if root is not None and m * root.height < 6 * (self.count + m):
+            for key in sorted(batch):
+                ts = batch[key]
+                existing = self._lookup(root, key)
+                if existing is None:
+                    inserted += 1
+                    root = self._insert(root, key, ts)
+                else:
+                    refreshed += 1
+                    if ts > existing.ts:
+                        existing.ts = ts
+                        self.expiry.push(ts, key)
+                        self.expiry.invalidate()
+                        if self.journal is not None:
+                            self.journal.record_insert(key, ts)
+            self._compact_expiry(root)
+            return root, inserted, refreshed
+
+        # Gros lot : fusion avec le parcours inorder puis reconstruction en O(n + m)
+        if root is None:
+            self.expiry.rebuild([])
+        keys = []
+        stamps = []
+        for node in self._iter_nodes(root):
+            key = node.key
+            ts = batch.pop(key, None)
+            if ts is None:
+                ts = node.ts
+            else:
+                refreshed += 1
+                if ts > node.ts:
+                    self.expiry.push(ts, key)
+                    self.expiry.invalidate()
+                    if self.journal is not None:
+                        self.journal.record_insert(key, ts)
+                else:
+                    ts = node.ts
+            keys.append(key)
+            stamps.append(ts)
+        for key, ts in batch.items():
+            self.expiry.push(ts, key)
+            if self.journal is not None:
+                self.journal.record_insert(key, ts)
+        inserted = len(batch)
+
+        root = self.build_from_sorted(*merge_sorted_batch(keys, stamps, batch))
+        self._compact_expiry(root)
+        return root, inserted, refreshed
 
     def get_min_value_node(self, node):
         current = node
@@ -224,119 +817,277 @@ class AVLTree:
             current = current.left
         return current
 
-    def delete(self, root, ip):
-        # Suppression standard BST
-        if root is None:
-            return root
-
-        if ip < root.data.ip:
-            root.left = self.delete(root.left, ip)
-        elif ip > root.data.ip:
-            root.right = self.delete(root.right, ip)
-        else:
-            # Nœud à supprimer trouvé
-
-            # Cas avec un seul enfant ou sans enfant
-            if root.left is None:
-                return root.right
-            elif root.right is None:
-                return root.left
-
-            # Cas avec deux enfants
-            # Trouver le successeur inorder (plus petit dans le sous-arbre droit)
-            temp = self.get_min_value_node(root.right)
+    def ip_key(self, ip):
+        # Accepte une IP sous forme de chaîne ou déjà convertie en entier
+        if isinstance(ip, int):
+            return ip
+        return ip_to_int(ip)
 
-            # Copier les données du successeur
-            root.data = temp.data
+    def delete(self, root, ip):
+        root = self._delete(root, self.ip_key(ip))
+        self._compact_expiry(root)
+        return root
 
-            # Supprimer le successeur
-            root.right = self.delete(root.right, temp.data.ip)
+    def _delete(self, root, key):
+        # Suppression standard BST
+        path = []
+        node = root
+        while node is not None:
+            node_key = node.key
+            if key == node_key:
+                break
+            path.append(node)
+            node = node.left if key < node_key else node.right
 
-        # Si l'arbre n'avait qu'un nœud
-        if root is None:
+        if node is None:
             return root
+        self.expiry.invalidate()
+        self.count -= 1
+        if self.journal is not None:
+            self.journal.record_delete(key)
+        if self.cache is not None:
+            self.cache.invalidate(key)
+
+        # Cas avec deux enfants : on copie les données du successeur inorder
+        # (plus petit dans le sous-arbre droit) puis on supprime ce successeur
+        if node.left is not None and node.right is not None:
+            path.append(node)
+            temp = node.right
+            while temp.left is not None:
+                path.append(temp)
+                temp = temp.left
+            if self.cache is not None:
+                # Le nœud du successeur est retiré de l'arbre : son entrée
+                # désignerait un nœud détaché
+                self.cache.invalidate(temp.key)
+            node.key = temp.key
+            node.ts = temp.ts
+            node = temp
+
+        # Cas avec un seul enfant ou sans enfant
+        child = node.left if node.left is not None else node.right
+        if not path:
+            return child
+
+        parent = path[-1]
+        if parent.left is node:
+            parent.left = child
+        else:
+            parent.right = child
 
-        # Mise à jour de la hauteur
-        self.update_height(root)
-
-        # Vérification de l'équilibre
-        balance = self.balance_factor(root)
-
-        # Cas de déséquilibre
-        # Cas Gauche-Gauche
-        if balance > 1 and self.balance_factor(root.left) >= 0:
-            return self.right_rotate(root)
-
-        # Cas Gauche-Droite
-        if balance > 1 and self.balance_factor(root.left) < 0:
-            root.left = self.left_rotate(root.left)
-            return self.right_rotate(root)
-
-        # Cas Droite-Droite
-        if balance < -1 and self.balance_factor(root.right) <= 0:
-            return self.left_rotate(root)
-
-        # Cas Droite-Gauche
-        if balance < -1 and self.balance_factor(root.right) > 0:
-            root.right = self.right_rotate(root.right)
-            return self.left_rotate(root)
-
-        return root
+        return self._retrace(root, path, -1)
 
     def search(self, root, ip):
-        if root is None or root.data.ip == ip:
-            return root.data if root else None
-
-        if ip < root.data.ip:
-            return self.search(root.left, ip)
-        return self.search(root.right, ip)
+        node = self._lookup(root, self.ip_key(ip))
+        if node is None:
+            return None
+        return Connexion.from_key(node.key, node.ts)
+
+    def _lookup(self, root, key):
+        # Recherche par le cache des IP fréquentes s'il est activé
+        cache = self.cache
+        if cache is None:
+            return self._find(root, key)
+        node = cache.get(key)
+        if node is None:
+            node = self._find(root, key)
+            if node is not None:
+                cache.put(key, node)
+        return node
+
+    def _find(self, root, key):
+        node = root
+        while node is not None:
+            node_key = node.key
+            if key < node_key:
+                node = node.left
+            elif key > node_key:
+                node = node.right
+            else:
+                return node
+        return None
+
+    def _iter_nodes(self, root, start=None, reverse=False):
+        # Parcours inorder paresseux des nœuds (pile explicite de hauteur O(log n))
+        key = None if start is None else self.ip_key(start)
+        stack = []
+        node = root
+        if not reverse:
+            # Descente initiale en ignorant les sous-arbres gauches < start
+            while node is not None:
+                if key is not None and node.key < key:
+                    node = node.right
+                else:
+                    stack.append(node)
+                    node = node.left
+            while stack:
+                node = stack.pop()
+                yield node
+                node = node.right
+                while node is not None:
+                    stack.append(node)
+                    node = node.left
+        else:
+            while node is not None:
+                if key is not None and node.key > key:
+                    node = node.left
+                else:
+                    stack.append(node)
+                    node = node.right
+            while stack:
+                node = stack.pop()
+                yield node
+                node = node.left
+                while node is not None:
+                    stack.append(node)
+                    node = node.right
+
+    def iter_inorder(self, root, start=None, reverse=False):
+        """
+        Parcours inorder paresseux (générateur).
+        start : IP (ou clé) à partir de laquelle commencer, incluse ;
+        reverse : parcours par IP décroissante.
+        L'arbre ne doit pas être modifié pendant le parcours.
+        """
+        from_key = Connexion.from_key
+        for node in self._iter_nodes(root, start, reverse):
+            yield from_key(node.key, node.ts)
+
+    def iter_range(self, root, lo, hi):
+        # Connexions dont l'IP est comprise entre lo et hi (inclus), triées ;
+        # seuls les sous-arbres qui chevauchent la plage sont parcourus
+        hi = self.ip_key(hi)
+        from_key = Connexion.from_key
+        for node in self._iter_nodes(root, start=lo):
+            if node.key > hi:
+                return
+            yield from_key(node.key, node.ts)
+
+    def iter_subnet(self, root, cidr):
+        lo, hi = parse_cidr(cidr)
+        return self.iter_range(root, lo, hi)
+
+    def rank(self, root, ip):
+        # Nombre de connexions dont l'IP est strictement inférieure à ip, en O(log n)
+        key = self.ip_key(ip)
+        rank = 0
+        node = root
+        while node is not None:
+            if key <= node.key:
+                node = node.left
+            else:
+                rank += 1 + (node.left.size if node.left is not None else 0)
+                node = node.right
+        return rank
+
+    def select(self, root, k):
+        # k-ième connexion (à partir de 0) dans l'ordre des IP, None hors bornes
+        node = self._select_node(root, k)
+        if node is None:
+            return None
+        return Connexion.from_key(node.key, node.ts)
+
+    def _select_node(self, root, k):
+        # Descente par les tailles de sous-arbres : k-ième nœud, None hors bornes
+        node = root
+        while node is not None:
+            left_size = node.left.size if node.left is not None else 0
+            if k < left_size:
+                node = node.left
+            elif k == left_size:
+                return node
+            else:
+                k -= left_size + 1
+                node = node.right
+        return None
+
+    def count_between(self, root, lo, hi):
+        # Nombre de connexions dont l'IP est comprise entre lo et hi (inclus), en O(log n)
+        return max(0, self.rank(root, self.ip_key(hi) + 1) - self.rank(root, lo))
 
     def inorder(self, root):
-        result = []
-        if root:
-            result.extend(self.inorder(root.left))
-            result.append(root.data)
-            result.extend(self.inorder(root.right))
-        return result
+        return list(self.iter_inorder(root))
+
+    def expire(self, root, cutoff, deadline=None):
+        """
+        Supprime, de la plus ancienne à la plus récente, les connexions dont la
+        dernière activité (epoch) est antérieure à cutoff. Avec une échéance
+        deadline (time.perf_counter()), s'arrête dès qu'elle est dépassée, après
+        au moins une suppression pour que chaque passage progresse : les
+        connexions restantes seront traitées au passage suivant.
+        Renvoie (nouvelle racine, clés supprimées, True si tout est traité).
+        """
+        if root is None:
+            return None, [], True
+
+        # Arbre construit sans passer par cette instance : on indexe d'abord
+        if not self.expiry:
+            self.expiry.rebuild((node.ts, node.key) for node in self._iter_nodes(root))
+
+        # Seules les entrées plus anciennes que le seuil sont examinées
+        heap = self.expiry.heap
+        cles = []
+        complete = True
+        while heap and heap[0][0] < cutoff:
+            if deadline is not None and cles and time.perf_counter() >= deadline:
+                complete = False
+                break
+            ts, key = heapq.heappop(heap)
+            # L'entrée a quitté le tas : elle ne compte plus comme obsolète,
+            # ni maintenant (IP rafraîchie ou déjà supprimée) ni après _delete
+            self.expiry.stale -= 1
+            node = self._find(root, key)
+            if node is not None and node.ts == ts:
+                root = self._delete(root, key)
+                cles.append(key)
+        self._compact_expiry(root)
+        return root, cles, complete
 
     def nettoyage(self, root, seuil_minutes):
         if root is None:
             return None, []
 
-        # Récupérer toutes les connexions
-        connexions = self.inorder(root)
-
-        # Identifier les connexions inactives
-        now = datetime.now()
-        ips_a_supprimer = []
-
-        for connexion in connexions:
-            if (now - connexion.timestamp).total_seconds() > seuil_minutes * 60:
-                ips_a_supprimer.append(connexion.ip)
-
-        # Supprimer les connexions inactives
-        new_root = root
-        for ip in ips_a_supprimer:
-            new_root = self.delete(new_root, ip)
-
+        new_root, cles, _ = self.expire(root, time.time() - seuil_minutes * 60)
+        cles.sort()
+        ips_a_supprimer = [int_to_ip(key) for key in cles]
         return new_root, ips_a_supprimer
 
     def save_to_file(self, root, filename):
-        connexions = self.inorder(root)
-        with open(filename, 'w') as f:
-            for connexion in connexions:
-                f.write(f"{connexion.ip},{connexion.timestamp.isoformat()}\n")
+        write_connexions(filename, ((node.key, node.ts) for node in self._iter_nodes(root)))
+
+    def build_from_sorted(self, keys, stamps):
+        # Construit en O(n) un arbre parfaitement équilibré à partir de clés
+        # strictement croissantes et de leurs timestamps epoch.
+        # Un sous-arbre coupé au milieu de s éléments a pour hauteur s.bit_length().
+        def build(lo, hi):
+            mid = (lo + hi) // 2
+            node = AVLNode(keys[mid], stamps[mid])
+            if lo < mid:
+                node.left = build(lo, mid)
+            if mid + 1 < hi:
+                node.right = build(mid + 1, hi)
+            node.height = (hi - lo).bit_length()
+            node.size = hi - lo
+            return node
+
+        self.count = len(keys)
+        if self.cache is not None:
+            # Nouveaux nœuds : les entrées désigneraient l'ancien arbre
+            self.cache.clear()
+        if not keys:
+            return None
+        return build(0, len(keys))
 
     def load_from_file(self, filename):
-        root = None
         try:
-            with open(filename, 'r') as f:
-                for line in f:
-                    if line.strip():
-                        ip, timestamp_str = line.strip().split(',')
-                        connexion = Connexion(ip)
-                        connexion.timestamp = datetime.fromisoformat(timestamp_str)
-                        root = self.insert(root, connexion)
-            return root
+            keys, stamps = read_connexions(filename)
         except FileNotFoundError:
-            return None
\ No newline at end of file
+            return None
+
+        # save_to_file écrit dans l'ordre inorder : construction directe en O(n) ;
+        # sinon (fichier non trié ou avec doublons) tri et dédoublonnage préalables,
+        # avec le même résultat que des insertions successives (dernière ligne gagnante)
+        if not is_strictly_sorted(keys):
+            keys, stamps = sorted_unique(keys, stamps)
+        self.expiry.rebuild(zip(stamps, keys))
+        return self.build_from_sorted(keys, stamps)
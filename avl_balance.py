@@ -0,0 +1,175 @@
+"""
+Moteur AVL à facteur d'équilibre (classe AVL et rotations lr, rr, lrr, rlr d'avl.py).
+
+Chaque nœud stocke son facteur d'équilibre bal (hauteur gauche - hauteur
+droite, -1, 0 ou 1) au lieu de sa hauteur. Après une insertion, la remontée
+ajuste bal d'une unité par niveau et s'arrête au premier nœud redevenu
+équilibré ou à la première rotation ; après une suppression, au premier
+nœud dont la hauteur ne change pas. Aucun max() ni recalcul de hauteur :
+seule la taille des ancêtres (rang, k-ième connexion) est incrémentée ou
+décrémentée le long du chemin.
+
+BalanceAVLTree hérite d'AVLTree tout ce qui ne dépend pas de la hauteur
+(recherche, parcours, plages, rang, index d'expiration, nettoyage,
+sauvegarde) ; la hauteur d'un nœud reste disponible à la demande
+(AVL.height) pour l'heuristique des lots.
+"""
+from avl import AVLTree, AVL, lr, rr, lrr, rlr
+
+
+def _rotate(node):
+    # Rééquilibre un nœud dont bal vaut +2 ou -2 ; renvoie la racine du sous-arbre
+    if node.bal > 0:
+        return rr(node) if node.left.bal >= 0 else lrr(node)
+    return lr(node) if node.right.bal <= 0 else rlr(node)
+
+
+class BalanceAVLTree(AVLTree):
+    def _insert(self, root, key, ts):
+        if self.journal is not None:
+            self.journal.record_insert(key, ts)
+
+        if root is None:
+            self.expiry.rebuild([(ts, key)])
+            self.count = 1
+            if self.cache is not None:
+                self.cache.clear()
+            return AVL(key, None, None, 0, ts)
+
+        if self.cache is not None:
+            node = self.cache.get(key)
+            if node is not None:
+                self._refresh(root, node, ts)
+                return root
+
+        # Descente : chemin des (nœud, descente à gauche ?)
+        path = []
+        node = root
+        while node is not None:
+            node_key = node.key
+            if key < node_key:
+                path.append((node, True))
+                node = node.left
+            elif key > node_key:
+                path.append((node, False))
+                node = node.right
+            else:
+                # IP déjà présente, mise à jour du timestamp
+                if self.cache is not None:
+                    self.cache.put(key, node)
+                self._refresh(root, node, ts)
+                return root
+
+        parent, went_left = path[-1]
+        if went_left:
+            parent.left = AVL(key, None, None, 0, ts)
+        else:
+            parent.right = AVL(key, None, None, 0, ts)
+        self.expiry.push(ts, key)
+        self.count += 1
+        for node, _ in path:
+            node.size += 1
+
+        # Remontée : le sous-arbre a grandi d'un niveau du côté went_left
+        for i in range(len(path) - 1, -1, -1):
+            node, went_left = path[i]
+            bal = node.bal + 1 if went_left else node.bal - 1
+            node.bal = bal
+            if bal == 0:
+                break
+            if bal == 1 or bal == -1:
+                continue
+            # Une rotation rend au sous-arbre sa hauteur d'avant l'insertion
+            return self._replace(root, path, i, _rotate(node))
+        return root
+
+    def _replace(self, root, path, i, subtree):
+        # Raccroche subtree à la place de path[i] ; renvoie la racine de l'arbre
+        if i == 0:
+            return subtree
+        parent, went_left = path[i - 1]
+        if went_left:
+            parent.left = subtree
+        else:
+            parent.right = subtree
+        return root
+
+    def _delete(self, root, key):
+        path = []
+        node = root
+        while node is not None:
+            node_key = node.key
+            if key == node_key:
+                break
+            went_left = key < node_key
+            path.append((node, went_left))
+            node = node.left if went_left else node.right
+
+        if node is None:
+            return root
+        self.expiry.invalidate()
+        self.count -= 1
+        if self.journal is not None:
+            self.journal.record_delete(key)
+        if self.cache is not None:
+            self.cache.invalidate(key)
+
+        # Deux enfants : on copie les données du successeur inorder puis on
+        # supprime ce successeur (plus petit du sous-arbre droit)
+        if node.left is not None and node.right is not None:
+            path.append((node, False))
+            temp = node.right
+            while temp.left is not None:
+                path.append((temp, True))
+                temp = temp.left
+            if self.cache is not None:
+                self.cache.invalidate(temp.key)
+            node.key = temp.key
+            node.ts = temp.ts
+            node = temp
+
+        child = node.left if node.left is not None else node.right
+        if not path:
+            return child
+        parent, went_left = path[-1]
+        if went_left:
+            parent.left = child
+        else:
+            parent.right = child
+        for node, _ in path:
+            node.size -= 1
+
+        # Remontée : le sous-arbre a perdu un niveau du côté went_left
+        for i in range(len(path) - 1, -1, -1):
+            node, went_left = path[i]
+            bal = node.bal - 1 if went_left else node.bal + 1
+            node.bal = bal
+            if bal == 1 or bal == -1:
+                # Hauteur inchangée : l'autre côté la porte toujours
+                break
+            if bal == 0:
+                continue
+            subtree = _rotate(node)
+            root = self._replace(root, path, i, subtree)
+            if subtree.bal != 0:
+                # Rotation simple sur un enfant équilibré : hauteur inchangée
+                break
+        return root
+
+    def build_from_sorted(self, keys, stamps):
+        # Même découpage qu'AVLTree.build_from_sorted : un sous-arbre de s
+        # éléments a pour hauteur s.bit_length(), d'où le facteur d'équilibre
+        def build(lo, hi):
+            mid = (lo + hi) // 2
+            left = build(lo, mid) if lo < mid else None
+            right = build(mid + 1, hi) if mid + 1 < hi else None
+            node = AVL(keys[mid], left, right,
+                       (mid - lo).bit_length() - (hi - mid - 1).bit_length(), stamps[mid])
+            return node
+
+        self.count = len(keys)
+        if self.cache is not None:
+            self.cache.clear()
+        if not keys:
+            return None
+        return build(0, len(keys))
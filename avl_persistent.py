@@ -0,0 +1,208 @@
+"""
+Variante persistante (copie de chemin) de l'arbre AVL.
+
+Un nœud publié n'est plus jamais modifié : insertion, rafraîchissement et
+suppression recopient les O(log n) nœuds du chemin parcouru (rotations
+comprises) et renvoient une nouvelle racine, le reste de l'arbre étant
+partagé avec la version précédente. Toute racine obtenue reste donc une
+version cohérente et lisible (sauvegarde, affichage, analyse du nettoyage)
+pendant que d'autres versions sont produites, sans verrou ni copie complète.
+
+PersistentAVLTree hérite des lectures d'AVLTree (recherche, parcours,
+plages, rang, sauvegarde, construction depuis un fichier) et n'utilise pas
+l'index d'expiration, qui suivrait une seule version : le nettoyage balaie
+la version qu'on lui donne (par tranches sous l'échéance, voir ExpiryScan).
+"""
+import time
+
+from avl import (AVLTree, AVLNode, ExpiryScan, int_to_ip, read_connexions,
+                 is_strictly_sorted, sorted_unique)
+
+
+def make_node(key, ts, left, right):
+    # Nouveau nœud (jamais un nœud existant) avec hauteur et taille calculées
+    node = AVLNode(key, ts)
+    node.left = left
+    node.right = right
+    hl = left.height if left is not None else 0
+    hr = right.height if right is not None else 0
+    node.height = 1 + (hl if hl > hr else hr)
+    node.size = 1 + (left.size if left is not None else 0) + (right.size if right is not None else 0)
+    return node
+
+
+def balance(key, ts, left, right):
+    # Construit le sous-arbre (left, key, right) en appliquant la rotation
+    # nécessaire ; les nœuds déplacés sont recopiés, jamais modifiés
+    hl = left.height if left is not None else 0
+    hr = right.height if right is not None else 0
+
+    # Cas Gauche-Gauche / Gauche-Droite
+    if hl > hr + 1:
+        ll, lr = left.left, left.right
+        if (ll.height if ll is not None else 0) >= (lr.height if lr is not None else 0):
+            return make_node(left.key, left.ts, ll, make_node(key, ts, lr, right))
+        return make_node(lr.key, lr.ts,
+                         make_node(left.key, left.ts, ll, lr.left),
+                         make_node(key, ts, lr.right, right))
+
+    # Cas Droite-Droite / Droite-Gauche
+    if hr > hl + 1:
+        rl, rr = right.left, right.right
+        if (rr.height if rr is not None else 0) >= (rl.height if rl is not None else 0):
+            return make_node(right.key, right.ts, make_node(key, ts, left, rl), rr)
+        return make_node(rl.key, rl.ts,
+                         make_node(key, ts, left, rl.left),
+                         make_node(right.key, right.ts, rl.right, rr))
+
+    return make_node(key, ts, left, right)
+
+
+class PersistentAVLTree(AVLTree):
+    # Les versions produites restent valides : ConnectionTable peut les lire sans verrou
+    persistent = True
+
+    def __init__(self):
+        # Pas de cache de nœuds : chaque version a ses propres copies
+        super().__init__()
+        # Expiration budgétée en cours (ExpiryScan), poursuivie d'un passage à l'autre
+        self._scan = None
+
+    def _rebuild_path(self, path, node):
+        # Recopie le chemin (nœud, descente à gauche ?) de bas en haut au-dessus de node
+        for parent, went_left in reversed(path):
+            if went_left:
+                node = balance(parent.key, parent.ts, node, parent.right)
+            else:
+                node = balance(parent.key, parent.ts, parent.left, node)
+        return node
+
+    def _insert(self, root, key, ts):
+        if self.journal is not None:
+            self.journal.record_insert(key, ts)
+
+        path = []
+        node = root
+        while node is not None:
+            node_key = node.key
+            if key < node_key:
+                path.append((node, True))
+                node = node.left
+            elif key > node_key:
+                path.append((node, False))
+                node = node.right
+            else:
+                # IP déjà présente : copie du nœud avec le nouveau timestamp
+                node = make_node(key, ts, node.left, node.right)
+                break
+        else:
+            node = AVLNode(key, ts)
+
+        root = self._rebuild_path(path, node)
+        self.count = root.size
+        return root
+
+    def _upsert_many(self, root, batch):
+        # Remplace AVLTree._upsert_many (donc aussi insert_many), qui modifierait
+        # en place des nœuds partagés avec les versions précédentes : chaque
+        # mise à jour recopie son chemin ; seul un timestamp plus récent est
+        # recopié, mais toute IP présente compte comme rafraîchie
+        inserted = refreshed = 0
+        for key in sorted(batch):
+            ts = batch[key]
+            node = self._find(root, key)
+            if node is None:
+                inserted += 1
+            else:
+                refreshed += 1
+                if ts <= node.ts:
+                    continue
+            root = self._insert(root, key, ts)
+        return root, inserted, refreshed
+
+    def delete(self, root, ip):
+        return self._delete(root, self.ip_key(ip))
+
+    def _delete(self, root, key):
+        path = []
+        node = root
+        while node is not None:
+            node_key = node.key
+            if key == node_key:
+                break
+            went_left = key < node_key
+            path.append((node, went_left))
+            node = node.left if went_left else node.right
+
+        if node is None:
+            # Clé absente : la version est renvoyée telle quelle
+            return root
+        if self.journal is not None:
+            self.journal.record_delete(key)
+
+        if node.left is None or node.right is None:
+            replacement = node.left if node.left is not None else node.right
+        else:
+            # Deux enfants : le successeur inorder prend la place du nœud,
+            # le sous-arbre droit est recopié sans son minimum
+            successor_path = []
+            successor = node.right
+            while successor.left is not None:
+                successor_path.append((successor, True))
+                successor = successor.left
+            right = self._rebuild_path(successor_path, successor.right)
+            replacement = balance(successor.key, successor.ts, node.left, right)
+
+        root = self._rebuild_path(path, replacement)
+        self.count = root.size if root is not None else 0
+        return root
+
+    def expired_keys(self, root, cutoff):
+        # Analyse sur une version figée : clés dont le timestamp est antérieur à
+        # cutoff, de la plus ancienne à la plus récente (contrat d'AVLTree.expire)
+        expired = [(node.ts, node.key) for node in self._iter_nodes(root) if node.ts < cutoff]
+        expired.sort()
+        return [key for _, key in expired]
+
+    def _current_ts(self, root, key):
+        node = self._find(root, key)
+        return node.ts if node is not None else None
+
+    def expire(self, root, cutoff, deadline=None):
+        # Même contrat qu'AVLTree.expire, à partir d'un balayage de la version
+        if deadline is None:
+            self._scan = None
+            cles = []
+            for key in self.expired_keys(root, cutoff):
+                root = self._delete(root, key)
+                cles.append(key)
+            return root, cles, True
+
+        # Le balayage porte sur la version figée au début du cycle
+        if self._scan is None:
+            entries = ((node.ts, node.key) for node in self._iter_nodes(root))
+            self._scan = ExpiryScan(entries, cutoff)
+        if not self._scan.scan(deadline):
+            return root, [], False
+        root, cles, complete = self._scan.expire(root, cutoff, deadline,
+                                                 self._current_ts, self._delete)
+        if complete:
+            self._scan = None
+        return root, cles, complete
+
+    def nettoyage(self, root, seuil_minutes):
+        if root is None:
+            return None, []
+
+        root, cles, _ = self.expire(root, time.time() - seuil_minutes * 60)
+        cles.sort()
+        return root, [int_to_ip(key) for key in cles]
+
+    def load_from_file(self, filename):
+        try:
+            keys, stamps = read_connexions(filename)
+        except FileNotFoundError:
+            return None
+        if not is_strictly_sorted(keys):
+            keys, stamps = sorted_unique(keys, stamps)
+        return self.build_from_sorted(keys, stamps)
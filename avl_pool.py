@@ -0,0 +1,477 @@
+"""
+Moteur AVL à réserve de nœuds (node pool).
+
+Les nœuds ne sont plus des objets Python : chaque champ est une colonne
+array.array (clé, timestamp, gauche, droite, hauteur, taille) et un nœud
+est un simple indice dans ces colonnes. Les emplacements libérés sont
+chaînés dans une liste libre et réutilisés.
+
+PoolAVLTree expose la même interface que AVLTree pour les modules de menu :
+la « racine » manipulée par l'appelant est un indice (None si l'arbre est vide).
+"""
+from array import array
+import time
+
+from avl import (Connexion, ExpiryScan, ip_to_int, int_to_ip, parse_cidr, read_connexions,
+                 write_connexions, is_strictly_sorted, sorted_unique, newest_per_key,
+                 merge_sorted_batch)
+
+try:
+    import numpy
+except ImportError:
+    # Balayage vectorisé optionnel des timestamps
+    numpy = None
+
+# Indice 0 : sentinelle « nœud vide » (hauteur 0, taille 0), jamais libérée
+NIL = 0
+
+KEY_TYPECODE = 'I' if array('I').itemsize >= 4 else 'L'
+
+
+class PoolAVLTree:
+    def __init__(self):
+        self.keys = array(KEY_TYPECODE, [0])
+        self.stamps = array('d', [0.0])
+        self.lefts = array('i', [NIL])
+        self.rights = array('i', [NIL])
+        # Hauteur 0 : sentinelle ou emplacement libre
+        self.heights = array('b', [0])
+        self.sizes = array('i', [0])
+        # Tête de la liste libre, chaînée par la colonne lefts
+        self.free = NIL
+        self.count = 0
+        # Expiration budgétée en cours (ExpiryScan), poursuivie d'un passage à l'autre
+        self._scan = None
+
+    def __len__(self):
+        return self.count
+
+    # Gestion des emplacements
+
+    def _alloc(self, key, ts):
+        slot = self.free
+        if slot != NIL:
+            self.free = self.lefts[slot]
+            self.keys[slot] = key
+            self.stamps[slot] = ts
+            self.lefts[slot] = NIL
+            self.rights[slot] = NIL
+            self.heights[slot] = 1
+            self.sizes[slot] = 1
+        else:
+            slot = len(self.keys)
+            self.keys.append(key)
+            self.stamps.append(ts)
+            self.lefts.append(NIL)
+            self.rights.append(NIL)
+            self.heights.append(1)
+            self.sizes.append(1)
+        return slot
+
+    def _release(self, slot):
+        self.heights[slot] = 0
+        self.lefts[slot] = self.free
+        self.free = slot
+
+    # Équilibrage
+
+    def _update(self, i):
+        l = self.lefts[i]
+        r = self.rights[i]
+        hl = self.heights[l]
+        hr = self.heights[r]
+        self.heights[i] = 1 + (hl if hl > hr else hr)
+        self.sizes[i] = 1 + self.sizes[l] + self.sizes[r]
+
+    def _right_rotate(self, y):
+        x = self.lefts[y]
+        self.lefts[y] = self.rights[x]
+        self.rights[x] = y
+        self._update(y)
+        self._update(x)
+        return x
+
+    def _left_rotate(self, x):
+        y = self.rights[x]
+        self.rights[x] = self.lefts[y]
+        self.lefts[y] = x
+        self._update(x)
+        self._update(y)
+        return y
+
+    def _rebalance(self, i):
+        lefts, rights, heights = self.lefts, self.rights, self.heights
+        l = lefts[i]
+        r = rights[i]
+        balance = heights[l] - heights[r]
+
+        # Cas Gauche-Gauche / Gauche-Droite
+        if balance > 1:
+            if heights[lefts[l]] < heights[rights[l]]:
+                lefts[i] = self._left_rotate(l)
+            return self._right_rotate(i)
+
+        # Cas Droite-Droite / Droite-Gauche
+        if balance < -1:
+            if heights[lefts[r]] > heights[rights[r]]:
+                rights[i] = self._right_rotate(r)
+            return self._left_rotate(i)
+
+        self._update(i)
+        return i
+
+    def _retrace(self, root, path, delta):
+        # Même remontée que AVLTree._retrace, sur des indices
+        lefts, rights, heights = self.lefts, self.rights, self.heights
+        for i in range(len(path) - 1, -1, -1):
+            node = path[i]
+            old_height = heights[node]
+            new_node = self._rebalance(node)
+            if i > 0:
+                parent = path[i - 1]
+                if lefts[parent] == node:
+                    lefts[parent] = new_node
+                else:
+                    rights[parent] = new_node
+            else:
+                root = new_node
+            if heights[new_node] == old_height:
+                for j in range(i):
+                    self.sizes[path[j]] += delta
+                break
+        return root
+
+    # Interface commune avec AVLTree
+
+    def ip_key(self, ip):
+        if isinstance(ip, int):
+            return ip
+        return ip_to_int(ip)
+
+    def insert(self, root, data):
+        root = self._insert(NIL if root is None else root, data.key, data.timestamp.timestamp())
+        return root
+
+    def _insert(self, root, key, ts):
+        if root == NIL:
+            self.count += 1
+            return self._alloc(key, ts)
+
+        keys, lefts, rights = self.keys, self.lefts, self.rights
+        path = []
+        node = root
+        while node != NIL:
+            node_key = keys[node]
+            path.append(node)
+            if key < node_key:
+                node = lefts[node]
+            elif key > node_key:
+                node = rights[node]
+            else:
+                # IP déjà présente, mise à jour du timestamp
+                self.stamps[node] = ts
+                return root
+
+        slot = self._alloc(key, ts)
+        parent = path[-1]
+        if key < keys[parent]:
+            lefts[parent] = slot
+        else:
+            rights[parent] = slot
+        self.count += 1
+        return self._retrace(root, path, 1)
+
+    def insert_many(self, root, connexions):
+        """
+        Insère ou rafraîchit un lot de connexions, comme AVLTree.insert_many.
+        Renvoie (nouvelle racine, nb insérées, nb rafraîchies).
+        """
+        batch = newest_per_key((connexion.key, connexion.timestamp.timestamp()) for connexion in connexions)
+        return self._upsert_many(root, batch)
+
+    def _upsert_many(self, root, batch):
+        # Même contrat qu'AVLTree._upsert_many (sans index d'expiration ni journal)
+        inserted = refreshed = 0
+
+        # Petit lot devant l'arbre : insertions individuelles en O(m log n)
+        m = len(batch)
+        if root is not None and m * self.heights[root] < 6 * (self.count + m):
+            stamps = self.stamps
+            for key in sorted(batch):
+                ts = batch[key]
+                node = self._find(root, key)
+                if node == NIL:
+                    inserted += 1
+                    root = self._insert(root, key, ts)
+                else:
+                    refreshed += 1
+                    if ts > stamps[node]:
+                        stamps[node] = ts
+            return root, inserted, refreshed
+
+        # Gros lot : fusion avec le parcours inorder puis reconstruction en O(n + m)
+        keys = []
+        stamps = []
+        for node in self._iter_slots(root):
+            key = self.keys[node]
+            ts = self.stamps[node]
+            new_ts = batch.pop(key, None)
+            if new_ts is not None:
+                refreshed += 1
+                if new_ts > ts:
+                    ts = new_ts
+            keys.append(key)
+            stamps.append(ts)
+        inserted = len(batch)
+        return self.build_from_sorted(*merge_sorted_batch(keys, stamps, batch)), inserted, refreshed
+
+    def delete(self, root, ip):
+        if root is None:
+            return None
+        root = self._delete(root, self.ip_key(ip))
+        return None if root == NIL else root
+
+    def _delete(self, root, key):
+        keys, lefts, rights = self.keys, self.lefts, self.rights
+        path = []
+        node = root
+        while node != NIL:
+            node_key = keys[node]
+            if key == node_key:
+                break
+            path.append(node)
+            node = lefts[node] if key < node_key else rights[node]
+
+        if node == NIL:
+            return root
+        self.count -= 1
+
+        # Cas avec deux enfants : copie du successeur inorder puis suppression de celui-ci
+        if lefts[node] != NIL and rights[node] != NIL:
+            path.append(node)
+            temp = rights[node]
+            while lefts[temp] != NIL:
+                path.append(temp)
+                temp = lefts[temp]
+            keys[node] = keys[temp]
+            self.stamps[node] = self.stamps[temp]
+            node = temp
+
+        child = lefts[node] if lefts[node] != NIL else rights[node]
+        self._release(node)
+        if not path:
+            return child
+
+        parent = path[-1]
+        if lefts[parent] == node:
+            lefts[parent] = child
+        else:
+            rights[parent] = child
+        return self._retrace(root, path, -1)
+
+    def _find(self, root, key):
+        keys, lefts, rights = self.keys, self.lefts, self.rights
+        node = NIL if root is None else root
+        while node != NIL:
+            node_key = keys[node]
+            if key < node_key:
+                node = lefts[node]
+            elif key > node_key:
+                node = rights[node]
+            else:
+                return node
+        return NIL
+
+    def search(self, root, ip):
+        node = self._find(root, self.ip_key(ip))
+        if node == NIL:
+            return None
+        return Connexion.from_key(self.keys[node], self.stamps[node])
+
+    def _iter_slots(self, root, start=None, reverse=False):
+        key = None if start is None else self.ip_key(start)
+        keys = self.keys
+        first, second = (self.lefts, self.rights) if not reverse else (self.rights, self.lefts)
+        stack = []
+        node = NIL if root is None else root
+        # Descente initiale en ignorant les sous-arbres hors de la borne start
+        while node != NIL:
+            if key is not None and (keys[node] < key if not reverse else keys[node] > key):
+                node = second[node]
+            else:
+                stack.append(node)
+                node = first[node]
+        while stack:
+            node = stack.pop()
+            yield node
+            node = second[node]
+            while node != NIL:
+                stack.append(node)
+                node = first[node]
+
+    def iter_inorder(self, root, start=None, reverse=False):
+        keys, stamps, from_key = self.keys, self.stamps, Connexion.from_key
+        for node in self._iter_slots(root, start, reverse):
+            yield from_key(keys[node], stamps[node])
+
+    def inorder(self, root):
+        return list(self.iter_inorder(root))
+
+    def iter_range(self, root, lo, hi):
+        hi = self.ip_key(hi)
+        keys, stamps, from_key = self.keys, self.stamps, Connexion.from_key
+        for node in self._iter_slots(root, start=lo):
+            if keys[node] > hi:
+                return
+            yield from_key(keys[node], stamps[node])
+
+    def iter_subnet(self, root, cidr):
+        lo, hi = parse_cidr(cidr)
+        return self.iter_range(root, lo, hi)
+
+    def rank(self, root, ip):
+        key = self.ip_key(ip)
+        keys, lefts, rights, sizes = self.keys, self.lefts, self.rights, self.sizes
+        rank = 0
+        node = NIL if root is None else root
+        while node != NIL:
+            if key <= keys[node]:
+                node = lefts[node]
+            else:
+                rank += 1 + sizes[lefts[node]]
+                node = rights[node]
+        return rank
+
+    def select(self, root, k):
+        lefts, rights, sizes = self.lefts, self.rights, self.sizes
+        node = NIL if root is None else root
+        while node != NIL:
+            left_size = sizes[lefts[node]]
+            if k < left_size:
+                node = lefts[node]
+            elif k == left_size:
+                return Connexion.from_key(self.keys[node], self.stamps[node])
+            else:
+                k -= left_size + 1
+                node = rights[node]
+        return None
+
+    def count_between(self, root, lo, hi):
+        return max(0, self.rank(root, self.ip_key(hi) + 1) - self.rank(root, lo))
+
+    def expired_keys(self, cutoff):
+        # Balayage des colonnes : clés des emplacements occupés dont le timestamp
+        # < cutoff, de la plus ancienne à la plus récente (et non dans l'ordre des
+        # emplacements, pour qu'une expiration interrompue garde les plus récentes)
+        if numpy is not None and KEY_TYPECODE == 'I':
+            stamps = numpy.frombuffer(self.stamps, dtype=numpy.float64)
+            heights = numpy.frombuffer(self.heights, dtype=numpy.int8)
+            keys = numpy.frombuffer(self.keys, dtype=numpy.uint32)
+            mask = (stamps < cutoff) & (heights > 0)
+            expired = keys[mask][numpy.argsort(stamps[mask], kind='stable')].tolist()
+            # Libère les vues : un array.array exporté ne peut plus grandir
+            del stamps, heights, keys, mask
+            return expired
+        expired = [(ts, key) for key, ts, height in zip(self.keys, self.stamps, self.heights)
+                   if height and ts < cutoff]
+        expired.sort()
+        return [key for _, key in expired]
+
+    def _scan_entries(self, cutoff):
+        # Couples (timestamp, clé) des emplacements occupés, lus au fil du
+        # balayage (les colonnes peuvent changer entre deux passages)
+        if numpy is not None and KEY_TYPECODE == 'I':
+            # Balayage vectorisé d'un seul tenant, négligeable devant le budget
+            stamps = numpy.frombuffer(self.stamps, dtype=numpy.float64)
+            heights = numpy.frombuffer(self.heights, dtype=numpy.int8)
+            keys = numpy.frombuffer(self.keys, dtype=numpy.uint32)
+            mask = (stamps < cutoff) & (heights > 0)
+            entries = list(zip(stamps[mask].tolist(), keys[mask].tolist()))
+            del stamps, heights, keys, mask
+            yield from entries
+            return
+        slot = 1
+        while slot < len(self.keys):
+            if self.heights[slot]:
+                yield self.stamps[slot], self.keys[slot]
+            slot += 1
+
+    def _current_ts(self, root, key):
+        node = self._find(root, key)
+        return self.stamps[node] if node != NIL else None
+
+    def expire(self, root, cutoff, deadline=None):
+        # Même contrat qu'AVLTree.expire ; avec une échéance, le balayage des
+        # colonnes est lui aussi découpé en tranches (voir ExpiryScan)
+        if root is None:
+            self._scan = None
+            return None, [], True
+
+        cles = []
+        if deadline is None:
+            self._scan = None
+            for key in self.expired_keys(cutoff):
+                root = self._delete(root, key)
+                cles.append(key)
+            return (None if root == NIL else root), cles, True
+
+        if self._scan is None:
+            self._scan = ExpiryScan(self._scan_entries(cutoff), cutoff)
+        if not self._scan.scan(deadline):
+            return root, cles, False
+        root, cles, complete = self._scan.expire(root, cutoff, deadline,
+                                                 self._current_ts, self._delete)
+        if complete:
+            self._scan = None
+        return (None if root == NIL else root), cles, complete
+
+    def nettoyage(self, root, seuil_minutes):
+        if root is None:
+            return None, []
+
+        root, cles, _ = self.expire(root, time.time() - seuil_minutes * 60)
+        cles.sort()
+        return root, [int_to_ip(key) for key in cles]
+
+    def save_to_file(self, root, filename):
+        keys, stamps = self.keys, self.stamps
+        write_connexions(filename, ((keys[node], stamps[node]) for node in self._iter_slots(root)))
+
+    def build_from_sorted(self, keys, stamps):
+        # Remplace le contenu de la réserve par un arbre parfaitement équilibré ;
+        # les nœuds sont rangés dans l'ordre des clés (emplacements 1..n)
+        n = len(keys)
+        self.__init__()
+        self.keys.extend(keys)
+        self.stamps.extend(stamps)
+        self.lefts.extend([NIL] * n)
+        self.rights.extend([NIL] * n)
+        self.heights.extend([0] * n)
+        self.sizes.extend([0] * n)
+        self.count = n
+
+        lefts, rights, heights, sizes = self.lefts, self.rights, self.heights, self.sizes
+
+        def build(lo, hi):
+            mid = (lo + hi) // 2
+            slot = mid + 1
+            if lo < mid:
+                lefts[slot] = build(lo, mid)
+            if mid + 1 < hi:
+                rights[slot] = build(mid + 1, hi)
+            heights[slot] = (hi - lo).bit_length()
+            sizes[slot] = hi - lo
+            return slot
+
+        if not n:
+            return None
+        return build(0, n)
+
+    def load_from_file(self, filename):
+        try:
+            keys, stamps = read_connexions(filename)
+        except FileNotFoundError:
+            return None
+        if not is_strictly_sorted(keys):
+            keys, stamps = sorted_unique(keys, stamps)
+        return self.build_from_sorted(keys, stamps)
@@ -0,0 +1,82 @@
+"""
+Mesure le cache des IP fréquentes (AVLTree(cache_size=...)) sur une charge
+de recherches et de rafraîchissements : clés tirées selon une loi de Zipf
+(peu d'IP concentrent la plupart des accès) puis uniformément (cas
+défavorable, pour le surcoût du cache).
+
+Usage : python -m benchmarks.bench_cache [--size N] [--ops N] [--zipf S]
+        [--caches 0,1024,4096] [--engine height|balance] [--repeat N] [--seed N]
+"""
+import argparse
+import itertools
+import random
+import time
+
+from avl import AVLTree
+from avl_balance import BalanceAVLTree
+
+ENGINES = {"height": AVLTree, "balance": BalanceAVLTree}
+
+
+def make_workload(keys, ops, zipf, seed):
+    # zipf = 0 : tirage uniforme ; sinon le rang r est tiré avec un poids 1 / r^zipf
+    rng = random.Random(seed)
+    if zipf:
+        hot = keys[:]
+        rng.shuffle(hot)
+        weights = list(itertools.accumulate(1.0 / rank ** zipf for rank in range(1, len(hot) + 1)))
+        targets = rng.choices(hot, cum_weights=weights, k=ops)
+    else:
+        targets = [rng.choice(keys) for _ in range(ops)]
+    # Une opération sur deux est un rafraîchissement (insert d'une IP présente)
+    return [(key, rng.random() < 0.5) for key in targets]
+
+
+def run(engine_class, cache_size, keys, workload):
+    avl = engine_class(cache_size=cache_size)
+    now = time.time()
+    root = avl.build_from_sorted(sorted(keys), [now] * len(keys))
+    avl.expiry.rebuild((now, key) for key in keys)
+    ts = now
+    start = time.perf_counter()
+    for key, refresh in workload:
+        if refresh:
+            ts += 0.001
+            root = avl._insert(root, key, ts)
+        else:
+            avl.search(root, key)
+    elapsed = time.perf_counter() - start
+    hit_ratio = avl.cache.stats()["hit_ratio"] if avl.cache is not None else 0.0
+    return len(workload) / elapsed, hit_ratio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cache des IP fréquentes : charge biaisée et uniforme")
+    parser.add_argument("--size", type=int, default=100000, help="connexions dans l'arbre (défaut : 100000)")
+    parser.add_argument("--ops", type=int, default=200000, help="opérations par mesure (défaut : 200000)")
+    parser.add_argument("--zipf", type=float, default=1.1, help="exposant de la loi de Zipf (défaut : 1.1)")
+    parser.add_argument("--caches", default="0,1024,4096", help="capacités comparées (défaut : 0,1024,4096)")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="height")
+    parser.add_argument("--repeat", type=int, default=3, help="mesures par cas, la meilleure est gardée (défaut : 3)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    keys = random.Random(args.seed).sample(range(1 << 32), args.size)
+    caches = [int(size) for size in args.caches.split(",")]
+    print(f"{'charge':>8} {'cache':>7} {'ops/s':>10} {'succès':>8} {'gain':>7}")
+    for name, zipf in ((f"zipf {args.zipf:g}", args.zipf), ("uniforme", 0.0)):
+        workload = make_workload(keys, args.ops, zipf, args.seed)
+        # Capacités mesurées en alternance : une dérive de la machine pèse sur toutes
+        best = {}
+        for _ in range(args.repeat):
+            for cache_size in caches:
+                result = run(ENGINES[args.engine], cache_size, keys, workload)
+                best[cache_size] = max(best.get(cache_size, result), result)
+        baseline = best[caches[0]][0]
+        for cache_size in caches:
+            rate, hit_ratio = best[cache_size]
+            print(f"{name:>8} {cache_size:>7} {rate:>10.0f} {hit_ratio:>8.1%} {rate / baseline:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
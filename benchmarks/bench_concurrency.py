@@ -0,0 +1,92 @@
+"""
+Test de charge multi-thread de ConnectionTable : chaque thread enchaîne
+recherches et ajouts (proportion d'écritures réglable) pendant une durée
+fixe ; on mesure le débit total en fonction du nombre de threads.
+
+La ligne « sans verrou » donne le débit d'AVLTree appelé directement par un
+seul thread, pour mesurer le coût du verrou lecteurs-rédacteur.
+
+Usage : python -m benchmarks.bench_concurrency [n] [part d'écritures] [durée s]
+        (défaut : 100000 0.1 2)
+"""
+import random
+import sys
+import threading
+import time
+
+from avl import AVLTree, Connexion, int_to_ip
+from connection_table import ConnectionTable
+
+THREADS = (1, 2, 4, 8)
+
+
+def workload(seed, keys, write_ratio):
+    # Suite infinie d'opérations (écriture ?, clé) tirées au hasard
+    rng = random.Random(seed)
+    while True:
+        yield rng.random() < write_ratio, keys[rng.randrange(len(keys))] ^ rng.getrandbits(1)
+
+
+def run_table(table, threads, keys, write_ratio, duration):
+    counts = [0] * threads
+    stop = threading.Event()
+
+    def worker(i):
+        search, insert = table.search, table.insert
+        ops = workload(i, keys, write_ratio)
+        done = 0
+        while not stop.is_set():
+            for _ in range(100):
+                write, key = next(ops)
+                if write:
+                    insert(Connexion(int_to_ip(key)))
+                else:
+                    search(key)
+            done += 100
+        counts[i] = done
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in workers:
+        thread.join()
+    return sum(counts) / duration
+
+
+def run_unlocked(avl, root, keys, write_ratio, duration):
+    ops = workload(0, keys, write_ratio)
+    done = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            write, key = next(ops)
+            if write:
+                root = avl.insert(root, Connexion(int_to_ip(key)))
+            else:
+                avl.search(root, key)
+        done += 100
+    return done / duration
+
+
+def main(n, write_ratio, duration):
+    keys = random.Random(42).sample(range(1 << 32), n)
+    connexions = [Connexion(int_to_ip(key)) for key in keys]
+
+    avl = AVLTree()
+    root, _, _ = avl.insert_many(None, connexions)
+    print(f"n={n}, écritures={write_ratio:.0%}, durée={duration}s")
+    print(f"{'threads':>12} {'ops/s':>12}")
+    print(f"{'sans verrou':>12} {run_unlocked(avl, root, keys, write_ratio, duration):>12.0f}")
+    for threads in THREADS:
+        table = ConnectionTable()
+        table.insert_many(connexions)
+        print(f"{threads:>12} {run_table(table, threads, keys, write_ratio, duration):>12.0f}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 100000,
+         float(args[1]) if len(args) > 1 else 0.1,
+         float(args[2]) if len(args) > 2 else 2.0)
@@ -0,0 +1,59 @@
+"""
+Compare le moteur récursif d'origine et le moteur itératif d'AVLTree.
+
+Usage : python -m benchmarks.bench_iterative [n ...]   (défaut : 100000 1000000)
+"""
+import random
+import sys
+import time
+
+from avl import AVLTree, Connexion, int_to_ip
+from recursive_avl import RecursiveAVLTree
+
+
+def make_connexions(n, seed=42):
+    rng = random.Random(seed)
+    keys = rng.sample(range(1 << 32), n)
+    return [Connexion(int_to_ip(k)) for k in keys]
+
+
+def run(engine, connexions):
+    timings = {}
+    root = None
+
+    start = time.perf_counter()
+    for connexion in connexions:
+        root = engine.insert(root, connexion)
+    timings["insert"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for connexion in connexions:
+        engine._find(root, connexion.key)
+    timings["search"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine.inorder(root)
+    timings["inorder"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for connexion in connexions[: len(connexions) // 2]:
+        root = engine._delete(root, connexion.key)
+    timings["delete"] = time.perf_counter() - start
+
+    return timings
+
+
+def main(sizes):
+    print(f"{'n':>10} {'op':>8} {'récursif (s)':>14} {'itératif (s)':>14} {'gain':>7}")
+    for n in sizes:
+        connexions = make_connexions(n)
+        before = run(RecursiveAVLTree(), connexions)
+        # Nouvelles instances : les timestamps ne sont pas partagés entre moteurs
+        connexions = make_connexions(n)
+        after = run(AVLTree(), connexions)
+        for op in before:
+            print(f"{n:>10} {op:>8} {before[op]:>14.3f} {after[op]:>14.3f} {before[op] / after[op]:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100000, 1000000])
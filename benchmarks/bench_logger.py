@@ -0,0 +1,44 @@
+"""
+Compare le débit du Logger synchrone (ouverture du fichier à chaque message)
+et du Logger asynchrone (file d'attente + thread d'écriture).
+
+Le temps « appelant » est celui passé dans les appels de log ; le temps
+« total » inclut l'arrêt du logger, donc l'écriture complète sur disque.
+
+Usage : python -m benchmarks.bench_logger [n]   (défaut : 100000)
+"""
+import os
+import sys
+import tempfile
+import time
+
+from logger import Logger
+
+
+def measure(n, **options):
+    fd, log_file = tempfile.mkstemp(suffix=".txt")
+    os.close(fd)
+    try:
+        logger = Logger(log_file, **options)
+        start = time.perf_counter()
+        for i in range(n):
+            logger.log_connection_added(f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}")
+        caller = time.perf_counter() - start
+        logger.log_system_exit()
+        total = time.perf_counter() - start
+        return caller, total
+    finally:
+        os.remove(log_file)
+
+
+def main(n):
+    print(f"{'mode':>22} {'appelant (s)':>13} {'total (s)':>10} {'messages/s':>12}")
+    for label, options in (("synchrone", {}),
+                           ("asynchrone (block)", {"queued": True}),
+                           ("asynchrone (drop)", {"queued": True, "overflow": "drop"})):
+        caller, total = measure(n, **options)
+        print(f"{label:>22} {caller:>13.3f} {total:>10.3f} {n / total:>12.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,48 @@
+"""
+Mesure (tracemalloc) la mémoire retenue par connexion dans AVLTree
+(index d'expiration compris), BalanceAVLTree, PoolAVLTree et BlockStore
+(blocs et index d'expiration), et dans la disposition d'origine (recursive_avl.LegacyAVLTree : nœuds à dictionnaire
+portant un objet connexion avec IP texte et datetime), référence « avant ».
+
+Usage : python -m benchmarks.bench_memory [n ...]   (défaut : 1000000)
+"""
+import gc
+import random
+import sys
+import tracemalloc
+
+from avl import AVLTree, Connexion, int_to_ip
+from avl_balance import BalanceAVLTree
+from avl_pool import PoolAVLTree
+from block_store import BlockStore
+from recursive_avl import LegacyAVLTree
+
+
+def measure(engine_class, n, seed=42):
+    ips = [int_to_ip(key) for key in random.Random(seed).sample(range(1 << 32), n)]
+    gc.collect()
+    tracemalloc.start()
+    avl = engine_class()
+    root = None
+    for ip in ips:
+        if engine_class is BlockStore:
+            # Stockage : pas de racine à faire circuler
+            avl.insert(Connexion(ip))
+        else:
+            root = avl.insert(root, Connexion(ip))
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, peak
+
+
+def main(sizes):
+    print(f"{'moteur':>14} {'n':>10} {'octets retenus':>16} {'octets/connexion':>18} {'pic/connexion':>15}")
+    for n in sizes:
+        for engine_class in (LegacyAVLTree, AVLTree, BalanceAVLTree, PoolAVLTree, BlockStore):
+            current, peak = measure(engine_class, n)
+            print(f"{engine_class.__name__:>14} {n:>10} {current:>16} {current / n:>18.1f} {peak / n:>15.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000000])
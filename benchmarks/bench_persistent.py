@@ -0,0 +1,73 @@
+"""
+Coût mémoire et temps de l'arbre persistant (copie de chemin) comparé à
+l'arbre mutable AVLTree :
+- octets par connexion pour une seule version ;
+- octets supplémentaires retenus par version conservée (chaque mise à jour
+  ne recopie que le chemin, contre n nœuds pour une copie complète) ;
+- temps d'insertion.
+
+Usage : python -m benchmarks.bench_persistent [n] [versions]   (défaut : 100000 1000)
+"""
+import gc
+import random
+import sys
+import time
+import tracemalloc
+
+from avl import AVLTree
+from avl_persistent import PersistentAVLTree
+
+
+def build(engine_class, keys):
+    avl = engine_class()
+    root = None
+    start = time.perf_counter()
+    for key in keys:
+        root = avl._insert(root, key, 0.0)
+    return avl, root, time.perf_counter() - start
+
+
+def measure_tree(engine_class, keys):
+    gc.collect()
+    tracemalloc.start()
+    avl, root, elapsed = build(engine_class, keys)
+    gc.collect()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return current, elapsed
+
+
+def measure_versions(keys, updates, seed=7):
+    # Mémoire retenue par les versions successives gardées en vie
+    avl, root, _ = build(PersistentAVLTree, keys)
+    rng = random.Random(seed)
+    gc.collect()
+    tracemalloc.start()
+    versions = []
+    for _ in range(updates):
+        root = avl._insert(root, rng.choice(keys), 1.0)
+        versions.append(root)
+    gc.collect()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return current / updates, root.height
+
+
+def main(n, updates):
+    keys = random.Random(42).sample(range(1 << 32), n)
+    print(f"n={n}")
+    print(f"{'moteur':>20} {'octets/connexion':>18} {'µs/insertion':>14}")
+    for engine_class in (AVLTree, PersistentAVLTree):
+        current, elapsed = measure_tree(engine_class, keys)
+        print(f"{engine_class.__name__:>20} {current / n:>18.1f} {elapsed / n * 1e6:>14.2f}")
+
+    per_version, height = measure_versions(keys, updates)
+    node_bytes = sys.getsizeof(PersistentAVLTree()._insert(None, 0, 0.0))
+    print(f"\n{updates} versions conservées (hauteur {height}) :")
+    print(f"  copie de chemin : {per_version:.0f} octets/version")
+    print(f"  copie complète  : {n * node_bytes} octets/version (nœuds seuls)")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 100000, int(args[1]) if len(args) > 1 else 1000)
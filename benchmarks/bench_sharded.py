@@ -0,0 +1,67 @@
+"""
+Passage à l'échelle de ShardedTable de 1 à N processus : ajouts par lots
+puis recherches par lots, comparés à un AVLTree dans le processus courant.
+
+Usage : python -m benchmarks.bench_sharded [n] [max shards] [taille de lot]
+        (défaut : 500000, nombre de cœurs (au moins 4), 10000)
+"""
+import multiprocessing
+import random
+import sys
+import time
+
+from avl import AVLTree, Connexion, int_to_ip
+from sharded_table import ShardedTable
+
+
+def batches(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def run_local(connexions, keys, batch_size):
+    avl = AVLTree()
+    root = None
+    start = time.perf_counter()
+    for batch in batches(connexions, batch_size):
+        root, _, _ = avl.insert_many(root, batch)
+    insert = time.perf_counter() - start
+    start = time.perf_counter()
+    for key in keys:
+        avl._find(root, key)
+    return insert, time.perf_counter() - start
+
+
+def run_sharded(shards, connexions, keys, batch_size):
+    with ShardedTable(shards) as table:
+        start = time.perf_counter()
+        for batch in batches(connexions, batch_size):
+            table.insert_many(batch)
+        insert = time.perf_counter() - start
+        start = time.perf_counter()
+        for batch in batches(keys, batch_size):
+            table.search_many(batch)
+        return insert, time.perf_counter() - start
+
+
+def main(n, max_shards, batch_size):
+    rng = random.Random(42)
+    keys = rng.sample(range(1 << 32), n)
+    connexions = [Connexion(int_to_ip(key)) for key in keys]
+    rng.shuffle(keys)
+    print(f"n={n}, lots de {batch_size}, {multiprocessing.cpu_count()} cœur(s)")
+    print(f"{'shards':>10} {'ajouts/s':>12} {'recherches/s':>14}")
+    insert, search = run_local(connexions, keys, batch_size)
+    print(f"{'local':>10} {n / insert:>12.0f} {n / search:>14.0f}")
+    shards = 1
+    while shards <= max_shards:
+        insert, search = run_sharded(shards, connexions, keys, batch_size)
+        print(f"{shards:>10} {n / insert:>12.0f} {n / search:>14.0f}")
+        shards *= 2
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 500000,
+         int(args[1]) if len(args) > 1 else max(4, multiprocessing.cpu_count()),
+         int(args[2]) if len(args) > 2 else 10000)
@@ -0,0 +1,434 @@
+"""
+Suite de mesures reproductible : AVLTree et BalanceAVLTree (facteur
+d'équilibre) et le stockage en blocs triés (block_store.BlockStore) face à
+deux références, un dict et deux listes triées parallèles (bisect).
+Les trois stockages (avl, balance, blocks) sont mesurés à travers la même
+interface ConnectionStore (AVLStore pour les deux arbres) : les écarts ne
+viennent que de la structure de données.
+
+Opérations mesurées, dans cet ordre, sur chaque (moteur, ordre, taille) :
+    insert           n insertions (clés entières, timestamps epoch)
+    search           m recherches de clés présentes
+    inorder          parcours trié complet (objets Connexion)
+    save_to_file     instantané binaire (.bin)
+    load_from_file   rechargement de l'instantané dans un moteur neuf
+    nettoyage        expiration de la moitié des connexions (une sur deux est ancienne)
+    delete           m suppressions de clés restantes
+avec m = min(n, --queries), tirées au hasard : les plus grandes tailles
+restent mesurables sans changer le coût par opération.
+
+Ordres d'insertion des IP :
+    random       adresses tirées uniformément dans l'espace IPv4
+    sequential   adresses consécutives croissantes (à partir de 10.0.0.0)
+    adversarial  adresses consécutives prises alternativement aux deux bouts
+                 (min, max, min+1, max-1...) : chaque insertion tombe au milieu
+                 de la liste triée et déclenche des rotations dans l'AVL
+
+Les mesures sont reproductibles (graine fixe, --seed) ; avec --repeat, la
+meilleure durée est retenue. La sortie est un document JSON (métadonnées
+de la machine et de l'interpréteur, puis un enregistrement par mesure) ou
+du CSV, sur la sortie standard ou dans --output. --compare FICHIER compare
+le résultat à une mesure précédente et se termine en erreur si une
+opération est plus lente que la tolérance (--tolerance, 25 % par défaut),
+pour suivre les régressions d'une version à l'autre.
+
+Usage : python -m benchmarks.bench_suite [--sizes 1000 10000 100000]
+        [--orders random sequential adversarial] [--engines avl balance blocks dict bisect]
+        [--queries 100000] [--repeat 1] [--seed 42] [--format json|csv]
+        [--output FICHIER] [--compare FICHIER] [--tolerance 0.25]
+
+10^7 connexions (--sizes 10000000) demandent plusieurs Go de mémoire et
+plusieurs minutes par moteur et par ordre ; l'insertion dans les listes
+triées étant quadratique, --engines avl balance blocks dict est conseillé au-delà de 10^6.
+Aux petites tailles les durées sont bruitées : utiliser --repeat avant de
+conclure à une régression.
+"""
+import argparse
+from bisect import bisect_left
+import csv
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+from avl_balance import BalanceAVLTree
+from block_store import BlockStore
+from store import AVLStore
+from avl import (AVLTree, Connexion, int_to_ip, ip_to_int, read_connexions,
+                 write_connexions, is_strictly_sorted, sorted_unique)
+
+OPERATIONS = ("insert", "search", "inorder", "save_to_file", "load_from_file", "nettoyage", "delete")
+ORDERS = ("random", "sequential", "adversarial")
+# Seuil du nettoyage : les connexions anciennes ont 2 h, les autres sont récentes
+SEUIL_MINUTES = 60
+
+
+class StoreEngine:
+    # Moteur mesuré à travers l'interface ConnectionStore (store.py) : les
+    # trois stockages passent par le même code, seule la structure change
+    name = None
+
+    def __init__(self):
+        self.store = self.make_store()
+
+    def insert(self, key, ts):
+        self.store.upsert(key, ts)
+
+    def search(self, key):
+        return self.store.get(key)
+
+    def delete(self, key):
+        self.store.remove(key)
+
+    def inorder(self):
+        return list(self.store.iter_inorder())
+
+    def nettoyage(self, seuil_minutes):
+        return self.store.nettoyage(seuil_minutes)
+
+    def save_to_file(self, filename):
+        self.store.snapshot(filename)
+
+    def load_from_file(self, filename):
+        self.store.load(filename)
+
+    def __len__(self):
+        return len(self.store)
+
+
+class AVLEngine(StoreEngine):
+    name = "avl"
+
+    @staticmethod
+    def make_store():
+        return AVLStore(AVLTree())
+
+
+class BalanceEngine(StoreEngine):
+    name = "balance"
+
+    @staticmethod
+    def make_store():
+        return AVLStore(BalanceAVLTree())
+
+
+class BlocksEngine(StoreEngine):
+    name = "blocks"
+
+    @staticmethod
+    def make_store():
+        return BlockStore()
+
+
+class DictEngine:
+    # Référence : accès par clé en O(1), tri à chaque parcours ordonné
+    name = "dict"
+
+    def __init__(self):
+        self.stamps = {}
+
+    def insert(self, key, ts):
+        self.stamps[key] = ts
+
+    def search(self, key):
+        return self.stamps.get(key)
+
+    def delete(self, key):
+        self.stamps.pop(key, None)
+
+    def inorder(self):
+        from_key = Connexion.from_key
+        return [from_key(key, ts) for key, ts in sorted(self.stamps.items())]
+
+    def nettoyage(self, seuil_minutes):
+        cutoff = time.time() - seuil_minutes * 60
+        cles = [key for key, ts in self.stamps.items() if ts < cutoff]
+        for key in cles:
+            del self.stamps[key]
+        cles.sort()
+        return [int_to_ip(key) for key in cles]
+
+    def save_to_file(self, filename):
+        write_connexions(filename, sorted(self.stamps.items()))
+
+    def load_from_file(self, filename):
+        keys, stamps = read_connexions(filename)
+        self.stamps = dict(zip(keys, stamps))
+
+    def __len__(self):
+        return len(self.stamps)
+
+
+class BisectEngine:
+    # Référence : listes parallèles triées, recherche dichotomique, insertion
+    # et suppression en O(n) (déplacement mémoire)
+    name = "bisect"
+
+    def __init__(self):
+        self.keys = []
+        self.stamps = []
+
+    def insert(self, key, ts):
+        keys = self.keys
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            self.stamps[i] = ts
+        else:
+            keys.insert(i, key)
+            self.stamps.insert(i, ts)
+
+    def search(self, key):
+        keys = self.keys
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            return self.stamps[i]
+        return None
+
+    def delete(self, key):
+        keys = self.keys
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            del keys[i]
+            del self.stamps[i]
+
+    def inorder(self):
+        from_key = Connexion.from_key
+        return [from_key(key, ts) for key, ts in zip(self.keys, self.stamps)]
+
+    def nettoyage(self, seuil_minutes):
+        cutoff = time.time() - seuil_minutes * 60
+        keys, stamps, cles = [], [], []
+        for key, ts in zip(self.keys, self.stamps):
+            if ts < cutoff:
+                cles.append(key)
+            else:
+                keys.append(key)
+                stamps.append(ts)
+        self.keys, self.stamps = keys, stamps
+        return [int_to_ip(key) for key in cles]
+
+    def save_to_file(self, filename):
+        write_connexions(filename, zip(self.keys, self.stamps))
+
+    def load_from_file(self, filename):
+        keys, stamps = read_connexions(filename)
+        if not is_strictly_sorted(keys):
+            keys, stamps = sorted_unique(keys, stamps)
+        self.keys, self.stamps = keys, stamps
+
+    def __len__(self):
+        return len(self.keys)
+
+
+ENGINES = {engine.name: engine for engine in (AVLEngine, BalanceEngine, BlocksEngine, DictEngine, BisectEngine)}
+
+
+def make_keys(n, order, seed):
+    """Clés IP (entiers) dans l'ordre d'insertion demandé."""
+    if order == "random":
+        return random.Random(seed).sample(range(1 << 32), n)
+    base = ip_to_int("10.0.0.0")
+    if order == "sequential":
+        return list(range(base, base + n))
+    if order == "adversarial":
+        keys = []
+        lo, hi = base, base + n - 1
+        while lo <= hi:
+            keys.append(lo)
+            if lo != hi:
+                keys.append(hi)
+            lo += 1
+            hi -= 1
+        return keys
+    raise ValueError(f"Ordre inconnu: {order}")
+
+
+def make_stamps(n, now):
+    # Une connexion sur deux est inactive depuis 2 h (supprimée par le nettoyage)
+    old = now - 2 * SEUIL_MINUTES * 60
+    return [old if i % 2 else now for i in range(n)]
+
+
+def timed(function, *args):
+    gc.collect()
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def run_once(engine_class, keys, stamps, queries, seed, directory):
+    """
+    Mesure toutes les opérations sur un moteur neuf.
+
+    Returns:
+        dict: opération -> (nombre d'opérations, durée en secondes)
+    """
+    rng = random.Random(seed)
+    engine = engine_class()
+    timings = {}
+
+    def insert_all():
+        insert = engine.insert
+        for key, ts in zip(keys, stamps):
+            insert(key, ts)
+    timings["insert"] = (len(keys), timed(insert_all)[0])
+
+    sample = rng.sample(keys, queries)
+
+    def search_all():
+        search = engine.search
+        for key in sample:
+            search(key)
+    timings["search"] = (queries, timed(search_all)[0])
+
+    elapsed, connexions = timed(engine.inorder)
+    assert len(connexions) == len(keys), "parcours incomplet"
+    del connexions
+    timings["inorder"] = (len(keys), elapsed)
+
+    filename = os.path.join(directory, f"{engine.name}.bin")
+    timings["save_to_file"] = (len(keys), timed(engine.save_to_file, filename)[0])
+    engine = engine_class()
+    timings["load_from_file"] = (len(keys), timed(engine.load_from_file, filename)[0])
+    os.remove(filename)
+    assert len(engine) == len(keys), "rechargement incomplet"
+
+    elapsed, ips = timed(engine.nettoyage, SEUIL_MINUTES)
+    timings["nettoyage"] = (len(keys), elapsed)
+    assert len(ips) == len(keys) // 2, "nettoyage incorrect"
+
+    # Suppressions parmi les connexions restantes (timestamps récents : rangs pairs)
+    remaining = keys[::2]
+    victims = rng.sample(remaining, min(queries, len(remaining)))
+
+    def delete_all():
+        delete = engine.delete
+        for key in victims:
+            delete(key)
+    timings["delete"] = (len(victims), timed(delete_all)[0])
+    assert len(engine) == len(remaining) - len(victims), "suppression incorrecte"
+    return timings
+
+
+def run(sizes, orders, engines, queries, repeat, seed):
+    """
+    Exécute la suite complète.
+
+    Returns:
+        list: Un enregistrement (dict) par mesure
+    """
+    results = []
+    now = time.time()
+    with tempfile.TemporaryDirectory() as directory:
+        for n in sizes:
+            stamps = make_stamps(n, now)
+            m = min(n, queries)
+            for order in orders:
+                keys = make_keys(n, order, seed)
+                for name in engines:
+                    best = {}
+                    for _ in range(repeat):
+                        for op, (count, elapsed) in run_once(ENGINES[name], keys, stamps, m, seed,
+                                                             directory).items():
+                            if op not in best or elapsed < best[op][1]:
+                                best[op] = (count, elapsed)
+                    for op in OPERATIONS:
+                        count, elapsed = best[op]
+                        results.append({"engine": name, "order": order, "n": n, "op": op,
+                                        "count": count, "seconds": elapsed,
+                                        "ns_per_op": elapsed / count * 1e9})
+                        print(f"{name:>7} {order:>11} {n:>9} {op:>15} {elapsed:>10.4f} s "
+                              f"{elapsed / count * 1e9:>10.0f} ns/op", file=sys.stderr)
+    return results
+
+
+def metadata(args):
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "queries": args.queries,
+    }
+
+
+def write_results(results, meta, fmt, out):
+    if fmt == "json":
+        json.dump({"meta": meta, "results": results}, out, indent=1)
+        out.write("\n")
+    else:
+        writer = csv.DictWriter(out, fieldnames=list(results[0]))
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def load_results(filename):
+    # Relit une mesure précédente (JSON ou CSV) : (moteur, ordre, n, op) -> ns/op
+    with open(filename, newline="") as f:
+        if filename.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = json.load(f)["results"]
+    return {(row["engine"], row["order"], int(row["n"]), row["op"]): float(row["ns_per_op"])
+            for row in rows}
+
+
+def compare(results, filename, tolerance, out=sys.stderr):
+    """
+    Compare à une mesure précédente.
+
+    Returns:
+        list: Les mesures plus lentes que la référence au-delà de la tolérance
+    """
+    reference = load_results(filename)
+    regressions = []
+    for row in results:
+        key = (row["engine"], row["order"], row["n"], row["op"])
+        if key not in reference:
+            continue
+        ratio = row["ns_per_op"] / reference[key]
+        if ratio > 1 + tolerance:
+            regressions.append((key, ratio))
+            print(f"RÉGRESSION {' '.join(map(str, key))} : {ratio:.2f}x", file=out)
+    print(f"{len(regressions)} régression(s) au-delà de {tolerance:.0%} par rapport à {filename}", file=out)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suite de mesures AVLTree / blocs / dict / bisect")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--orders", nargs="+", choices=ORDERS, default=list(ORDERS))
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES), default=list(ENGINES))
+    parser.add_argument("--queries", type=int, default=100000,
+                        help="recherches et suppressions mesurées au plus (défaut : 100000)")
+    parser.add_argument("--repeat", type=int, default=1, help="répétitions, meilleure durée retenue")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--format", choices=("json", "csv"), default="json")
+    parser.add_argument("--output", help="fichier de résultats (défaut : sortie standard)")
+    parser.add_argument("--compare", metavar="FICHIER", help="mesure de référence (JSON ou CSV)")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="ralentissement toléré par --compare (défaut : 0.25)")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.orders, args.engines, args.queries, args.repeat, args.seed)
+    meta = metadata(args)
+    if args.output:
+        with open(args.output, "w", newline="") as out:
+            write_results(results, meta, args.format, out)
+    else:
+        write_results(results, meta, args.format, sys.stdout)
+    if args.compare and compare(results, args.compare, args.tolerance):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
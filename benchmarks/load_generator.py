@@ -0,0 +1,142 @@
+"""
+Générateur de charge pour le serveur réseau (server.py).
+
+Chaque client TCP envoie des commandes en pipeline (au plus --window en
+cours) : des ADD d'IP aléatoires et, selon --queries, des SEARCH. La
+latence d'une commande va de son envoi à la réception de sa réponse (pour
+un ADD : l'application du lot qui le contient). Le rapport donne le débit
+en événements par seconde et les latences p50 / p99 / max.
+
+Avec --udp, les événements sont envoyés en datagrammes (--udp lignes par
+datagramme, sans réponse) puis une requête LEN mesure combien ont été reçus.
+
+Sans --port, un serveur est démarré dans le même processus (arbre vide en
+mémoire) : pratique pour une mesure rapide, mais client et serveur se
+partagent alors le même cœur.
+
+Usage : python -m benchmarks.load_generator [--host H] [--port P] [--clients 8]
+        [--events 20000] [--window 100] [--queries 0.1] [--udp 0]
+"""
+import argparse
+import asyncio
+from collections import deque
+import os
+import random
+import tempfile
+import time
+
+from avl import AVLTree, int_to_ip
+from logger import Logger
+from server import ConnectionServer
+
+
+def random_ip(rng):
+    return int_to_ip(rng.getrandbits(32))
+
+
+async def tcp_client(host, port, events, window, query_ratio, seed, latencies):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    slots = asyncio.Semaphore(window)
+    sent = deque()
+
+    async def receive():
+        for _ in range(events):
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError("Connexion fermée par le serveur")
+            latencies.append(time.perf_counter() - sent.popleft())
+            slots.release()
+
+    receiver = asyncio.create_task(receive())
+    known = []
+    for _ in range(events):
+        await slots.acquire()
+        if known and rng.random() < query_ratio:
+            line = f"SEARCH {rng.choice(known)}\n"
+        else:
+            ip = random_ip(rng)
+            if len(known) < 1000:
+                known.append(ip)
+            line = f"ADD {ip}\n"
+        sent.append(time.perf_counter())
+        writer.write(line.encode())
+        if slots.locked():
+            await writer.drain()
+    await writer.drain()
+    await receiver
+    writer.close()
+
+
+async def run_tcp(host, port, clients, events, window, query_ratio):
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(tcp_client(host, port, events, window, query_ratio, seed, latencies)
+                           for seed in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    total = clients * events
+    print(f"TCP : {clients} clients x {events} commandes, fenêtre {window}, {query_ratio:.0%} de requêtes")
+    print(f"  {total / elapsed:.0f} commandes/s en {elapsed:.2f} s")
+    print(f"  latence p50 {latencies[len(latencies) // 2] * 1e3:.2f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:.2f} ms, max {latencies[-1] * 1e3:.2f} ms")
+
+
+async def run_udp(host, port, clients, events, per_datagram):
+    loop = asyncio.get_running_loop()
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b"LEN\n")
+    before = int((await reader.readline()).split()[1])
+
+    rng = random.Random(0)
+    total = clients * events
+    transport, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol, remote_addr=(host, port))
+    start = time.perf_counter()
+    for i in range(0, total, per_datagram):
+        lines = "".join(f"{random_ip(rng)}\n" for _ in range(min(per_datagram, total - i)))
+        transport.sendto(lines.encode())
+        # Laisse le serveur (éventuellement dans ce processus) lire la socket
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    transport.close()
+    await asyncio.sleep(0.5)
+
+    writer.write(b"LEN\n")
+    received = int((await reader.readline()).split()[1]) - before
+    writer.close()
+    print(f"UDP : {total} événements, {per_datagram} par datagramme")
+    print(f"  {total / elapsed:.0f} événements/s envoyés, {received} appliqués "
+          f"({total - received} perdus ou en double)")
+
+
+async def main(args):
+    server = None
+    host, port = args.host, args.port
+    if port is None:
+        fd, log_file = tempfile.mkstemp(suffix=".txt")
+        os.close(fd)
+        server = ConnectionServer(AVLTree(), None, Logger(log_file, queued=True))
+        await server.start(host, 0)
+        port = server.tcp_address[1]
+    try:
+        if args.udp:
+            await run_udp(host, port, args.clients, args.events, args.udp)
+        else:
+            await run_tcp(host, port, args.clients, args.events, args.window, args.queries)
+    finally:
+        if server is not None:
+            await server.close()
+            server.logger.close()
+            os.remove(log_file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Générateur de charge pour server.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--events", type=int, default=20000, help="commandes par client")
+    parser.add_argument("--window", type=int, default=100, help="commandes en cours par client")
+    parser.add_argument("--queries", type=float, default=0.1, help="part de SEARCH")
+    parser.add_argument("--udp", type=int, default=0, help="événements par datagramme (active le mode UDP)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,287 @@
+"""
+Stockage en tableaux triés par blocs (alternative à l'arbre AVL).
+
+Les connexions sont rangées par IP croissante dans une suite de blocs :
+chaque bloc est un couple de colonnes array.array (clés 'I', timestamps 'd')
+d'au plus 2 * block_size éléments, et la liste maxes garde la plus grande
+clé de chaque bloc. Une opération fait deux recherches dichotomiques
+(maxes, puis le bloc) au lieu d'une descente de pointeur en pointeur, et
+une insertion ou une suppression ne déplace que la fin d'un bloc contigu
+en mémoire. Un bloc trop plein est coupé en deux, un bloc trop petit
+fusionné avec son voisin.
+
+Coût : O(log n + block_size) par mise à jour, O(log n) par recherche,
+parcours trié et chargement en temps linéaire sur des données contiguës.
+Les blocs ne coûtent qu'environ 12 octets par connexion, mais l'expiration
+utilise le même index secondaire que l'AVL (avl.ExpiryIndex), soit un
+couple (timestamp, clé) de plus de 100 octets par connexion : environ
+130 octets au total, contre 200 pour AVLTree (benchmarks.bench_memory).
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+import heapq
+import time
+
+from avl import (ExpiryIndex, read_connexions, write_connexions, is_strictly_sorted, sorted_unique,
+                 merge_sorted_batch)
+from avl_pool import KEY_TYPECODE
+from store import ConnectionStore
+
+# Taille nominale des blocs : un bloc contient entre block_size / 2 et 2 * block_size éléments
+BLOCK_SIZE = 512
+
+
+class BlockStore(ConnectionStore):
+    """
+    Stockage des connexions en blocs triés.
+
+    Args:
+        block_size (int): Taille nominale des blocs
+    """
+    name = "blocks"
+
+    def __init__(self, block_size=BLOCK_SIZE):
+        self.block_size = block_size
+        self.keys = []
+        self.stamps = []
+        self.maxes = []
+        self.count = 0
+        self.expiry = ExpiryIndex()
+        # Journal des mutations (journal.Journal), optionnel
+        self.journal = None
+
+    def __len__(self):
+        return self.count
+
+    def _locate(self, key):
+        # (bloc, position) de la clé ou de sa place ; bloc == len(maxes) si
+        # la clé dépasse toutes les clés présentes
+        b = bisect_left(self.maxes, key)
+        if b == len(self.maxes):
+            return b, 0
+        return b, bisect_left(self.keys[b], key)
+
+    def _compact_expiry(self):
+        if self.expiry.needs_compaction():
+            self.expiry.rebuild((ts, key) for key, ts in self.iter_sorted())
+
+    def upsert(self, key, ts):
+        if self.journal is not None:
+            self.journal.record_insert(key, ts)
+
+        maxes = self.maxes
+        if not maxes:
+            self._build([key], [ts])
+            self.expiry.rebuild([(ts, key)])
+            return True
+
+        b, i = self._locate(key)
+        if b == len(maxes):
+            # Nouvelle plus grande clé : fin du dernier bloc
+            b -= 1
+            i = len(self.keys[b])
+            maxes[b] = key
+        elif self.keys[b][i] == key:
+            # IP déjà présente, mise à jour du timestamp
+            self.stamps[b][i] = ts
+            self.expiry.push(ts, key)
+            self.expiry.invalidate()
+            self._compact_expiry()
+            return False
+
+        keys = self.keys[b]
+        keys.insert(i, key)
+        self.stamps[b].insert(i, ts)
+        self.count += 1
+        self.expiry.push(ts, key)
+        if len(keys) > 2 * self.block_size:
+            self._split(b)
+        return True
+
+    def _split(self, b):
+        keys, stamps = self.keys[b], self.stamps[b]
+        half = len(keys) // 2
+        self.keys.insert(b + 1, keys[half:])
+        self.stamps.insert(b + 1, stamps[half:])
+        del keys[half:]
+        del stamps[half:]
+        self.maxes.insert(b, keys[-1])
+
+    def upsert_many(self, batch):
+        inserted = refreshed = 0
+
+        # Petit lot : mises à jour individuelles ; gros lot : fusion et
+        # reconstruction en O(n + m), comme AVLTree._upsert_many
+        if 8 * len(batch) < self.count:
+            for key in sorted(batch):
+                ts = batch[key]
+                b, i = self._locate(key)
+                if b < len(self.maxes) and self.keys[b][i] == key:
+                    refreshed += 1
+                    if ts > self.stamps[b][i]:
+                        self.stamps[b][i] = ts
+                        self.expiry.push(ts, key)
+                        self.expiry.invalidate()
+                        if self.journal is not None:
+                            self.journal.record_insert(key, ts)
+                else:
+                    inserted += 1
+                    self.upsert(key, ts)
+            self._compact_expiry()
+            return inserted, refreshed
+
+        keys = []
+        stamps = []
+        for key, ts in self.iter_sorted():
+            new_ts = batch.pop(key, None)
+            if new_ts is not None:
+                refreshed += 1
+                if new_ts > ts:
+                    ts = new_ts
+                    self.expiry.push(ts, key)
+                    self.expiry.invalidate()
+                    if self.journal is not None:
+                        self.journal.record_insert(key, ts)
+            keys.append(key)
+            stamps.append(ts)
+        for key, ts in batch.items():
+            self.expiry.push(ts, key)
+            if self.journal is not None:
+                self.journal.record_insert(key, ts)
+        inserted = len(batch)
+
+        self._build(*merge_sorted_batch(keys, stamps, batch))
+        self._compact_expiry()
+        return inserted, refreshed
+
+    def remove(self, key):
+        removed = self._remove(key)
+        self._compact_expiry()
+        return removed
+
+    def _remove(self, key):
+        # Suppression sans compaction de l'index (expire compacte en fin de passage)
+        b, i = self._locate(key)
+        if b == len(self.maxes) or self.keys[b][i] != key:
+            return False
+        self.expiry.invalidate()
+        self.count -= 1
+        if self.journal is not None:
+            self.journal.record_delete(key)
+
+        keys = self.keys[b]
+        del keys[i]
+        del self.stamps[b][i]
+        if not keys:
+            del self.keys[b]
+            del self.stamps[b]
+            del self.maxes[b]
+        else:
+            if i == len(keys):
+                self.maxes[b] = keys[-1]
+            if len(keys) < self.block_size // 2 and len(self.keys) > 1:
+                self._merge(b if b + 1 < len(self.keys) else b - 1)
+        return True
+
+    def _merge(self, b):
+        # Fusionne les blocs b et b + 1, puis recoupe le résultat s'il est trop plein
+        self.keys[b].extend(self.keys[b + 1])
+        self.stamps[b].extend(self.stamps[b + 1])
+        del self.keys[b + 1]
+        del self.stamps[b + 1]
+        del self.maxes[b]
+        if len(self.keys[b]) > 2 * self.block_size:
+            self._split(b)
+
+    def get(self, key):
+        b, i = self._locate(key)
+        if b == len(self.maxes) or self.keys[b][i] != key:
+            return None
+        return self.stamps[b][i]
+
+    def iter_sorted(self, start=None):
+        if start is None:
+            b, i = 0, 0
+        else:
+            b, i = self._locate(start)
+        for b in range(b, len(self.keys)):
+            yield from zip(self.keys[b][i:], self.stamps[b][i:])
+            i = 0
+
+    def range(self, lo, hi):
+        b, i = self._locate(lo)
+        for b in range(b, len(self.keys)):
+            keys = self.keys[b]
+            j = bisect_right(keys, hi)
+            yield from zip(keys[i:j], self.stamps[b][i:j])
+            if j < len(keys):
+                return
+            i = 0
+
+    def _rank(self, key, inclusive=False):
+        # Nombre de clés inférieures à key (ou égales si inclusive)
+        search = bisect_right if inclusive else bisect_left
+        b = search(self.maxes, key)
+        if b == len(self.maxes):
+            return self.count
+        return sum(len(keys) for keys in self.keys[:b]) + search(self.keys[b], key)
+
+    def count_between(self, lo, hi):
+        return max(self._rank(hi, inclusive=True) - self._rank(lo), 0)
+
+    def select(self, k):
+        if k < 0 or k >= self.count:
+            return None
+        for keys, stamps in zip(self.keys, self.stamps):
+            if k < len(keys):
+                return keys[k], stamps[k]
+            k -= len(keys)
+
+    def expire(self, cutoff, deadline=None):
+        if not self.count:
+            return [], True
+
+        # Seules les entrées plus anciennes que le seuil sont examinées
+        heap = self.expiry.heap
+        cles = []
+        complete = True
+        while heap and heap[0][0] < cutoff:
+            if deadline is not None and cles and time.perf_counter() >= deadline:
+                complete = False
+                break
+            ts, key = heapq.heappop(heap)
+            # Entrée sortie du tas : voir AVLTree.expire
+            self.expiry.stale -= 1
+            if self.get(key) == ts:
+                self._remove(key)
+                cles.append(key)
+        self._compact_expiry()
+        return cles, complete
+
+    def snapshot(self, filename):
+        write_connexions(filename, self.iter_sorted())
+
+    def load(self, filename):
+        try:
+            keys, stamps = read_connexions(filename)
+        except FileNotFoundError:
+            keys, stamps = [], []
+        if not is_strictly_sorted(keys):
+            keys, stamps = sorted_unique(keys, stamps)
+        self._build(keys, stamps)
+        self.expiry.rebuild(zip(stamps, keys))
+        return self.count
+
+    def _build(self, keys, stamps):
+        # Découpe des colonnes triées en blocs pleins à block_size éléments
+        size = self.block_size
+        self.keys = [array(KEY_TYPECODE, keys[i:i + size]) for i in range(0, len(keys), size)]
+        self.stamps = [array('d', stamps[i:i + size]) for i in range(0, len(stamps), size)]
+        self.maxes = [block[-1] for block in self.keys]
+        self.count = len(keys)
+
+    def stats(self):
+        data = ConnectionStore.stats(self)
+        data.update(blocks=len(self.keys), block_size=self.block_size,
+                    fill=self.count / (len(self.keys) * self.block_size) if self.keys else 0.0)
+        return data
@@ -0,0 +1,191 @@
+"""
+Table de connexions partagée entre threads.
+
+ConnectionTable possède la racine de l'arbre (les appelants n'ont plus à la
+faire circuler) et protège le moteur (AVLTree, BalanceAVLTree ou PoolAVLTree,
+qui offrent la même interface, lots compris) par un verrou
+lecteurs-rédacteur : les lectures (recherche, plages, parcours) s'exécutent
+en parallèle, les écritures (ajout, suppression, nettoyage, chargement)
+en exclusion mutuelle.
+
+Les résultats des parcours sont matérialisés sous le verrou puis renvoyés
+sous forme de listes : aucun générateur ne garde le verrou ouvert. Avec le
+moteur persistant (avl_persistent.PersistentAVLTree), une version publiée
+n'est jamais modifiée : les lectures la parcourent sans prendre le verrou,
+donc sans jamais bloquer ni attendre les écritures.
+"""
+from contextlib import contextmanager
+from itertools import islice
+import threading
+
+from avl import AVLTree
+
+
+class RWLock:
+    """
+    Verrou lecteurs-rédacteur, avec priorité aux rédacteurs : un rédacteur
+    en attente bloque les nouveaux lecteurs, ce qui évite sa famine sous un
+    flux continu de lectures. Le verrou n'est pas réentrant.
+    """
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    def acquire_read(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self, blocking=True):
+        # Non bloquant : renvoie False sans attendre si le verrou est occupé
+        with self._cond:
+            if not blocking:
+                if self._writer or self._readers:
+                    return False
+                self._writer = True
+                return True
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+            return True
+
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+    @contextmanager
+    def read_locked(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write_locked(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+class ConnectionTable:
+    """
+    Table de connexions thread-safe.
+
+    Args:
+        avl: Le moteur à utiliser (AVLTree par défaut)
+    """
+    def __init__(self, avl=None):
+        self.avl = AVLTree() if avl is None else avl
+        self.root = None
+        self.lock = RWLock()
+        self.persistent = getattr(self.avl, "persistent", False)
+
+    def __len__(self):
+        with self.lock.read_locked():
+            return len(self.avl) if self.root is not None else 0
+
+    # Écritures
+
+    def insert(self, connexion):
+        with self.lock.write_locked():
+            self.root = self.avl.insert(self.root, connexion)
+
+    def insert_many(self, connexions):
+        with self.lock.write_locked():
+            self.root, inserted, refreshed = self.avl.insert_many(self.root, connexions)
+        return inserted, refreshed
+
+    def delete(self, ip):
+        # Renvoie True si l'IP était présente
+        with self.lock.write_locked():
+            before = len(self.avl) if self.root is not None else 0
+            self.root = self.avl.delete(self.root, ip)
+            after = len(self.avl) if self.root is not None else 0
+        return after < before
+
+    def nettoyage(self, seuil_minutes):
+        with self.lock.write_locked():
+            self.root, ips = self.avl.nettoyage(self.root, seuil_minutes)
+        return ips
+
+    def load_from_file(self, filename):
+        with self.lock.write_locked():
+            self.root = self.avl.load_from_file(filename)
+        return len(self)
+
+    # Lectures
+
+    @contextmanager
+    def _reading(self):
+        # Racine à lire : version figée (moteur persistant) ou arbre sous verrou de lecture
+        if self.persistent:
+            yield self.root
+        else:
+            with self.lock.read_locked():
+                yield self.root
+
+    def snapshot(self):
+        """
+        Renvoie la version courante de l'arbre, qui reste cohérente quelles que
+        soient les écritures suivantes (moteur persistant uniquement).
+        """
+        if not self.persistent:
+            raise TypeError("Instantané sans copie réservé au moteur persistant")
+        return self.root
+
+    def search(self, ip):
+        with self._reading() as root:
+            return self.avl.search(root, ip)
+
+    def inorder(self):
+        with self._reading() as root:
+            return self.avl.inorder(root)
+
+    def range(self, lo, hi):
+        with self._reading() as root:
+            return list(self.avl.iter_range(root, lo, hi))
+
+    def subnet(self, cidr):
+        with self._reading() as root:
+            return list(self.avl.iter_subnet(root, cidr))
+
+    def page(self, k, n):
+        # n connexions à partir de la k-ième (ordre des IP)
+        with self._reading() as root:
+            first = self.avl.select(root, k)
+            if first is None:
+                return []
+            return list(islice(self.avl.iter_inorder(root, start=first.key), n))
+
+    def rank(self, ip):
+        with self._reading() as root:
+            return self.avl.rank(root, ip)
+
+    def select(self, k):
+        with self._reading() as root:
+            return self.avl.select(root, k)
+
+    def count_between(self, lo, hi):
+        with self._reading() as root:
+            return self.avl.count_between(root, lo, hi)
+
+    def save_to_file(self, filename):
+        # Lecture seule de l'arbre : les recherches continuent pendant la sauvegarde
+        # (et les écritures aussi avec le moteur persistant)
+        with self._reading() as root:
+            self.avl.save_to_file(root, filename)
@@ -0,0 +1,223 @@
+"""
+Ingestion en flux, sans interface : lecture d'événements de connexion
+(une ligne "ip" ou "ip,horodatage") depuis l'entrée standard ou un fichier.
+
+Un thread lit les lignes et les dépose dans une file bornée : si le stockage
+n'absorbe pas le débit, la lecture attend (mémoire bornée quelle que soit
+la taille du flux). Le thread principal regroupe les événements en
+micro-lots (dédoublonnés, timestamp le plus récent par IP) appliqués d'un
+coup au stockage, puis fait à intervalles réguliers :
+- un point de reprise (instantané complet et remise à zéro du journal) ;
+- un passage du balayeur des connexions inactives (sweeper.Sweeper) ;
+- un rapport de débit (sortie d'erreur et logs), et le relevé JSON des
+  compteurs d'instrumentation si stats_file est donné.
+
+L'horodatage est facultatif (heure de lecture par défaut) et peut être au
+format ISO 8601 (celui de connexions.txt) ou un epoch en secondes ; un
+epoch non fini ou hors de la plage des dates est rejeté comme invalide.
+"""
+from datetime import datetime
+import math
+import queue
+import sys
+import threading
+import time
+
+from avl import ip_to_int, add_to_batch
+import instrumentation
+from menu.save_connections import save_connections
+
+_EOF = object()
+
+
+def parse_event(line):
+    """
+    Analyse une ligne d'événement.
+
+    Args:
+        line (str): "ip" ou "ip,horodatage"
+
+    Returns:
+        tuple: (clé IP entière, timestamp epoch)
+
+    Raises:
+        ValueError: Si l'IP ou l'horodatage est invalide
+    """
+    ip, _, stamp = line.partition(',')
+    key = ip_to_int(ip.strip())
+    stamp = stamp.strip()
+    if not stamp:
+        return key, time.time()
+    try:
+        ts = float(stamp)
+    except ValueError:
+        return key, datetime.fromisoformat(stamp).timestamp()
+    # inf, nan ou epoch hors des dates représentables : stocké, il ferait
+    # échouer tout affichage ou instantané texte de la connexion
+    if not math.isfinite(ts):
+        raise ValueError(f"Horodatage invalide: {stamp}")
+    try:
+        datetime.fromtimestamp(ts)
+    except (OverflowError, OSError, ValueError):
+        raise ValueError(f"Horodatage hors limites: {stamp}") from None
+    return key, ts
+
+
+def _read_lines(stream, lines):
+    try:
+        for line in stream:
+            lines.put(line)
+    finally:
+        lines.put(_EOF)
+
+
+class StreamIngest:
+    """
+    Applique un flux d'événements à un stockage (store.ConnectionStore) par micro-lots.
+
+    Args:
+        store: Le stockage des connexions
+        logger: Le logger pour enregistrer les opérations
+        journal: Le journal des mutations (synchronisé après chaque micro-lot)
+        filename (str): L'instantané écrit à chaque point de reprise
+        batch_size (int): Nombre maximal d'événements par micro-lot
+        batch_timeout (float): Délai maximal en secondes avant d'appliquer un lot incomplet
+        checkpoint_interval (float): Secondes entre deux points de reprise (0 : à la fin seulement)
+        sweeper: Le balayeur des connexions inactives, appelé toutes les sweeper.interval
+            secondes (None : pas d'expiration)
+        report_interval (float): Secondes entre deux rapports de débit
+        stats_file (str): Relevé JSON (instrumentation.snapshot) réécrit à chaque rapport
+        out: Flux de sortie des rapports
+    """
+    def __init__(self, store, logger, journal=None, filename=None, batch_size=1000,
+                 batch_timeout=0.5, checkpoint_interval=60.0, sweeper=None,
+                 report_interval=10.0, stats_file=None, out=sys.stderr):
+        self.store = store
+        self.logger = logger
+        self.journal = journal
+        self.filename = filename
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.checkpoint_interval = checkpoint_interval
+        self.sweeper = sweeper
+        self.report_interval = report_interval
+        self.stats_file = stats_file
+        self.out = out
+        self.events = 0
+        self.invalid = 0
+        self.inserted = 0
+        self.refreshed = 0
+        # Début de la fenêtre du rapport de débit courant : (instant, événements)
+        self._window = None
+
+    def run(self, stream):
+        """
+        Consomme le flux jusqu'à sa fin (ou Ctrl+C), puis expire toutes les connexions
+        inactives et écrit un dernier point de reprise.
+        """
+        lines = queue.Queue(maxsize=4 * self.batch_size)
+        reader = threading.Thread(target=_read_lines, args=(stream, lines), name="ingest-reader", daemon=True)
+        reader.start()
+
+        start = time.monotonic()
+        next_checkpoint = start + self.checkpoint_interval if self.checkpoint_interval else None
+        next_sweep = start + self.sweeper.interval if self.sweeper else None
+        next_report = start + self.report_interval
+        self._window = (start, 0)
+        batch = {}
+        pending = 0
+        batch_started = start
+        running = True
+        try:
+            while running:
+                deadlines = [next_report, next_checkpoint, next_sweep,
+                             batch_started + self.batch_timeout if pending else None]
+                timeout = max(0.0, min(d for d in deadlines if d is not None) - time.monotonic())
+                try:
+                    items = [lines.get(timeout=timeout)]
+                except queue.Empty:
+                    items = []
+                while len(items) < self.batch_size:
+                    try:
+                        items.append(lines.get_nowait())
+                    except queue.Empty:
+                        break
+
+                for line in items:
+                    if line is _EOF:
+                        running = False
+                        break
+                    line = line.strip()
+                    if not line or line.startswith('#'):
+                        continue
+                    try:
+                        key, ts = parse_event(line)
+                    except ValueError:
+                        self.invalid += 1
+                        continue
+                    if not pending:
+                        batch_started = time.monotonic()
+                    self.events += 1
+                    pending += 1
+                    add_to_batch(batch, key, ts)
+                    if pending >= self.batch_size:
+                        self._apply(batch)
+                        batch = {}
+                        pending = 0
+
+                now = time.monotonic()
+                if pending and (not running or now - batch_started >= self.batch_timeout):
+                    self._apply(batch)
+                    batch = {}
+                    pending = 0
+                if next_sweep is not None and now >= next_sweep:
+                    self.sweeper.sweep()
+                    next_sweep = time.monotonic() + self.sweeper.next_delay()
+                if next_checkpoint is not None and now >= next_checkpoint:
+                    self._checkpoint()
+                    next_checkpoint = now + self.checkpoint_interval
+                if now >= next_report:
+                    self._report(now)
+                    next_report = now + self.report_interval
+        except KeyboardInterrupt:
+            pass
+
+        if batch:
+            self._apply(batch)
+        if self.sweeper:
+            # Dernier passage sans budget : l'instantané final ne garde rien d'expiré
+            self.sweeper.sweep(budget=0)
+        if self.filename is not None:
+            self._checkpoint()
+        self._report(time.monotonic(), total_since=start)
+
+    def _apply(self, batch):
+        inserted, refreshed = self.store.upsert_many(batch)
+        self.inserted += inserted
+        self.refreshed += refreshed
+        if self.journal is not None:
+            # Un micro-lot appliqué est un micro-lot durable
+            self.journal.sync()
+
+    def _checkpoint(self):
+        if self.filename is not None:
+            save_connections(self.store, self.filename, self.logger, self.journal)
+
+    def _report(self, now, total_since=None):
+        # Débit sur la fenêtre écoulée depuis le rapport précédent (ou sur toute la durée à la fin)
+        if total_since is None:
+            since, events_before = self._window
+        else:
+            since, events_before = total_since, 0
+        elapsed = max(now - since, 1e-9)
+        rate = (self.events - events_before) / elapsed
+        count = len(self.store)
+        expired = self.sweeper.evicted if self.sweeper else 0
+        self._window = (now, self.events)
+        print(f"{self.events} événements ({self.invalid} invalides), {rate:.0f} év/s, "
+              f"{self.inserted} ajoutées, {self.refreshed} rafraîchies, {expired} expirées, "
+              f"{count} connexions", file=self.out)
+        self.logger.log_ingest_stats(self.events, self.invalid, rate, count)
+        if self.stats_file is not None:
+            instrumentation.write_stats(self.stats_file, instrumentation.snapshot(
+                self.store, None, self.logger, self.sweeper))
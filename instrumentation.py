@@ -0,0 +1,282 @@
+"""
+Instrumentation optionnelle de l'arbre AVL et du logger.
+
+enable(avl) / enable(logger) remplace la classe de l'instance par une
+sous-classe instrumentée (InstrumentedAVLTree, InstrumentedLogger) ;
+disable() rétablit la classe d'origine. Désactivée, l'instrumentation ne
+coûte donc rien : les méthodes de AVLTree et Logger ne contiennent aucun
+test ni compteur.
+
+Compteurs par type d'opération :
+- AVLTree : nombre d'appels, nœuds visités et comparaisons de clés lors
+  de la descente, rotations simples et doubles, histogramme des latences.
+  Les opérations composées (upsert_many, expire) sont comptées avec leur
+  propre latence, et les recherches, insertions et suppressions qu'elles
+  effectuent sont aussi comptées sous leur type.
+- Logger : appels, messages et octets, histogramme des latences vues par
+  l'appelant (écriture synchrone ou dépôt dans la file), rotations,
+  messages perdus et profondeur de la file.
+
+Les nœuds visités et comparaisons sont obtenus par une descente de
+comptage faite avant l'opération, hors de la mesure de latence.
+
+snapshot() rassemble tous les compteurs (avec la hauteur de l'arbre et, s'il
+est activé, les succès et défauts du cache des IP fréquentes) dans un
+dictionnaire sérialisable en JSON ; write_stats() l'écrit de façon atomique
+pour les outils qui le relisent pendant l'exécution.
+"""
+import json
+import math
+import os
+import time
+
+from avl import AVLTree
+from logger import Logger
+from store import ConnectionStore, AVLStore
+
+# Histogramme des latences : le seau i compte les durées de [2^(i-1), 2^i[ ns
+HISTOGRAM_BUCKETS = 40
+
+
+class OpStats:
+    """
+    Compteurs d'un type d'opération.
+    """
+    __slots__ = ("calls", "total_ns", "max_ns", "visited", "comparisons",
+                 "single_rotations", "double_rotations", "histogram")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.visited = 0
+        self.comparisons = 0
+        self.single_rotations = 0
+        self.double_rotations = 0
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+
+    def record(self, elapsed_ns):
+        self.calls += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        self.histogram[min(elapsed_ns.bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+
+    def percentile(self, fraction):
+        # Borne haute (ns) du seau contenant le percentile demandé
+        target = math.ceil(self.calls * fraction)
+        seen = 0
+        for i, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= target:
+                return 1 << i
+        return 0
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "mean_ns": self.total_ns / self.calls if self.calls else 0.0,
+            "p50_ns": self.percentile(0.5),
+            "p99_ns": self.percentile(0.99),
+            "max_ns": self.max_ns,
+            "visited": self.visited,
+            "comparisons": self.comparisons,
+            "single_rotations": self.single_rotations,
+            "double_rotations": self.double_rotations,
+            # Seaux non vides : borne haute en ns -> nombre d'appels
+            "histogram": {str(1 << i): count for i, count in enumerate(self.histogram) if count},
+        }
+
+
+class InstrumentedAVLTree(AVLTree):
+    # Classe prise par une instance d'AVLTree instrumentée (voir enable)
+
+    def _stats_for(self, op):
+        stats = self.op_stats.get(op)
+        if stats is None:
+            stats = self.op_stats[op] = OpStats()
+        return stats
+
+    def _count_descent(self, stats, root, key, to_successor=False):
+        # Descente de comptage : une ou deux comparaisons par nœud visité,
+        # plus le chemin du successeur pour une suppression à deux enfants
+        node = root
+        while node is not None:
+            stats.visited += 1
+            stats.comparisons += 1
+            if key < node.key:
+                node = node.left
+                continue
+            stats.comparisons += 1
+            if key > node.key:
+                node = node.right
+                continue
+            stats.comparisons += 1
+            if to_successor and node.left is not None and node.right is not None:
+                node = node.right
+                while node is not None:
+                    stats.visited += 1
+                    node = node.left
+            return
+
+    def _timed(self, op, method, *args):
+        # Les rotations sont attribuées à l'opération en cours (self._current)
+        stats = self._stats_for(op)
+        outer, self._current = self._current, stats
+        try:
+            start = time.perf_counter_ns()
+            result = method(*args)
+            stats.record(time.perf_counter_ns() - start)
+        finally:
+            self._current = outer
+        return result
+
+    def rebalance(self, node):
+        balance = self.balance_factor(node)
+        if balance > 1 or balance < -1:
+            stats = self._current
+            if stats is not None:
+                child_balance = self.balance_factor(node.left if balance > 1 else node.right)
+                if (balance > 1 and child_balance < 0) or (balance < -1 and child_balance > 0):
+                    stats.double_rotations += 1
+                else:
+                    stats.single_rotations += 1
+        return AVLTree.rebalance(self, node)
+
+    def _find(self, root, key):
+        stats = self._stats_for("search")
+        self._count_descent(stats, root, key)
+        start = time.perf_counter_ns()
+        node = AVLTree._find(self, root, key)
+        stats.record(time.perf_counter_ns() - start)
+        return node
+
+    def _insert(self, root, key, ts):
+        self._count_descent(self._stats_for("insert"), root, key)
+        return self._timed("insert", AVLTree._insert, self, root, key, ts)
+
+    def _delete(self, root, key):
+        self._count_descent(self._stats_for("delete"), root, key, to_successor=True)
+        return self._timed("delete", AVLTree._delete, self, root, key)
+
+    def _upsert_many(self, root, batch):
+        return self._timed("upsert_many", AVLTree._upsert_many, self, root, batch)
+
+    def expire(self, root, cutoff, deadline=None):
+        return self._timed("expire", AVLTree.expire, self, root, cutoff, deadline)
+
+    def inorder(self, root):
+        return self._timed("inorder", AVLTree.inorder, self, root)
+
+    def save_to_file(self, root, filename):
+        return self._timed("save_to_file", AVLTree.save_to_file, self, root, filename)
+
+    def load_from_file(self, filename):
+        return self._timed("load_from_file", AVLTree.load_from_file, self, filename)
+
+
+class InstrumentedLogger(Logger):
+    # Classe prise par une instance de Logger instrumentée (voir enable)
+
+    def _write_logs(self, messages):
+        stats = self.op_stats
+        start = time.perf_counter_ns()
+        Logger._write_logs(self, messages)
+        stats.record(time.perf_counter_ns() - start)
+        self.messages_logged += len(messages)
+        self.bytes_logged += sum(len(message) for message in messages)
+
+    def _rotate(self):
+        self.rotations += 1
+        Logger._rotate(self)
+
+
+def enable(obj):
+    """
+    Active l'instrumentation d'un AVLTree (ou de celui d'un AVLStore) ou d'un
+    Logger (compteurs remis à zéro).
+
+    Raises:
+        TypeError: Pour un autre moteur ou stockage (PoolAVLTree, PersistentAVLTree, BlockStore...)
+    """
+    if isinstance(obj, AVLStore):
+        obj = obj.avl
+    if isinstance(obj, (InstrumentedAVLTree, InstrumentedLogger)):
+        disable(obj)
+    if type(obj) is AVLTree:
+        obj.op_stats = {}
+        obj._current = None
+        obj.__class__ = InstrumentedAVLTree
+    elif type(obj) is Logger:
+        obj.op_stats = OpStats()
+        obj.messages_logged = 0
+        obj.bytes_logged = 0
+        obj.rotations = 0
+        obj.__class__ = InstrumentedLogger
+    else:
+        raise TypeError(f"Instrumentation non disponible pour {type(obj).__name__}")
+
+
+def disable(obj):
+    """Désactive l'instrumentation (les compteurs restent lisibles jusqu'au prochain enable)."""
+    if isinstance(obj, AVLStore):
+        obj = obj.avl
+    if type(obj) is InstrumentedAVLTree:
+        obj.__class__ = AVLTree
+    elif type(obj) is InstrumentedLogger:
+        obj.__class__ = Logger
+
+
+def is_enabled(obj):
+    if isinstance(obj, AVLStore):
+        obj = obj.avl
+    return type(obj) in (InstrumentedAVLTree, InstrumentedLogger)
+
+
+def snapshot(avl, root, logger=None, sweeper=None):
+    """
+    Rassemble les compteurs disponibles dans un dictionnaire sérialisable en JSON.
+
+    Args:
+        avl: L'arbre AVL, ou un stockage (store.ConnectionStore)
+        root: La racine de l'arbre (ignorée pour un stockage)
+        logger: Le logger (facultatif)
+        sweeper: Le balayeur des connexions inactives (facultatif)
+    """
+    if isinstance(avl, AVLStore):
+        avl, root = avl.avl, avl.root
+    data = {"time": time.time()}
+    if isinstance(avl, ConnectionStore):
+        # Autre stockage : description de sa structure, sans compteurs par opération
+        data["store"] = avl.stats()
+    else:
+        count = len(avl) if root is not None else 0
+        data["tree"] = {
+            "connections": count,
+            "height": root.height if root is not None else 0,
+            # Hauteur maximale d'un AVL de cette taille
+            "height_bound": math.floor(1.4405 * math.log2(count + 2) - 0.3277) if count else 0,
+            "instrumented": is_enabled(avl),
+        }
+    data["operations"] = {op: stats.as_dict() for op, stats in sorted(getattr(avl, "op_stats", {}).items())}
+    if getattr(avl, "cache", None) is not None:
+        data["cache"] = avl.cache.stats()
+    if logger is not None:
+        log = {"instrumented": is_enabled(logger), "dropped": logger.dropped,
+               "queue_depth": logger._queue.qsize() if logger._queue is not None else 0}
+        if hasattr(logger, "op_stats"):
+            log.update(messages=logger.messages_logged, bytes=logger.bytes_logged,
+                       rotations=logger.rotations, writes=logger.op_stats.as_dict())
+        data["logger"] = log
+    if sweeper is not None:
+        data["sweeper"] = sweeper.stats()
+    return data
+
+
+def write_stats(filename, data):
+    # Remplacement atomique : un lecteur ne voit jamais un fichier à moitié écrit
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, "w") as f:
+        json.dump(data, f, indent=1)
+        f.write("\n")
+    os.replace(tmp_filename, filename)
@@ -0,0 +1,182 @@
+"""
+Journal d'écriture anticipée (write-ahead log) des connexions.
+
+Chaque mutation de l'arbre est ajoutée en fin de journal au moment où elle
+se produit, au lieu de réécrire tout le fichier de connexions. Le fichier
+de connexions sert d'instantané : au démarrage on le charge puis on rejoue
+la fin du journal ; un compactage périodique réécrit l'instantané et vide
+le journal.
+
+Format : une ligne par opération, "A,<clé>,<timestamp epoch>" pour un ajout
+ou un rafraîchissement, "D,<clé>" pour une suppression. Rejouer deux fois
+les mêmes lignes donne le même état, ce qui rend le compactage sûr même en
+cas d'arrêt entre l'écriture de l'instantané et la remise à zéro du journal.
+"""
+import os
+import threading
+import time
+
+# Politiques de synchronisation disque (fsync)
+FSYNC_ALWAYS = "always"      # après chaque opération
+FSYNC_BATCH = "batch"        # toutes les batch_size opérations
+FSYNC_INTERVAL = "interval"  # au plus toutes les interval secondes
+FSYNC_POLICIES = (FSYNC_ALWAYS, FSYNC_BATCH, FSYNC_INTERVAL)
+
+
+class Journal:
+    """
+    Journal des mutations d'un AVLTree ou d'un stockage (store.ConnectionStore).
+
+    Args:
+        filename (str): Le fichier journal
+        fsync (str): Politique de synchronisation ("always", "batch" ou "interval")
+        batch_size (int): Nombre d'opérations entre deux fsync en mode "batch"
+        interval (float): Délai maximal en secondes entre deux fsync en mode "interval",
+            garanti par un thread de fond même si aucune opération ne suit
+        compact_every (int): Nombre d'opérations au-delà duquel un compactage est conseillé
+    """
+    def __init__(self, filename="connexions.journal", fsync=FSYNC_ALWAYS, batch_size=64,
+                 interval=1.0, compact_every=1000):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Politique fsync inconnue: {fsync}")
+        self.filename = filename
+        self.fsync = fsync
+        self.batch_size = batch_size
+        self.interval = interval
+        self.compact_every = compact_every
+        self.file = None
+        self.records = 0
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+        # Mode "interval" : le thread de fond et les écritures se partagent le fichier
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _write(self, line):
+        with self.lock:
+            if self.file is None:
+                self.file = open(self.filename, 'a')
+            self.file.write(line)
+            self.records += 1
+            self.unsynced += 1
+            if self.fsync == FSYNC_ALWAYS:
+                self._sync()
+            elif self.fsync == FSYNC_BATCH:
+                if self.unsynced >= self.batch_size:
+                    self._sync()
+            elif time.monotonic() - self.last_sync >= self.interval:
+                self._sync()
+            elif self._thread is None:
+                self._start_timer()
+
+    def _start_timer(self):
+        # Une opération suivie d'une période d'inactivité est synchronisée au
+        # plus interval secondes après son écriture
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_timer, name="journal-fsync", daemon=True)
+        self._thread.start()
+
+    def _run_timer(self):
+        while not self._stop.wait(self.interval):
+            with self.lock:
+                if self.unsynced:
+                    self._sync()
+
+    def record_insert(self, key, ts):
+        self._write(f"A,{key},{ts!r}\n")
+
+    def record_delete(self, key):
+        self._write(f"D,{key}\n")
+
+    def sync(self):
+        # Force l'écriture sur disque des opérations en attente
+        with self.lock:
+            self._sync()
+
+    def _sync(self):
+        if self.file is not None and self.unsynced:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def _entries(self):
+        # Opérations ("A", clé, timestamp) ou ("D", clé) du journal ; les lignes
+        # incomplètes (arrêt brutal pendant une écriture) sont ignorées
+        try:
+            with open(self.filename, 'r') as f:
+                for line in f:
+                    if not line.endswith('\n'):
+                        continue
+                    parts = line[:-1].split(',')
+                    try:
+                        if parts[0] == 'A' and len(parts) == 3:
+                            yield 'A', int(parts[1]), float(parts[2])
+                        elif parts[0] == 'D' and len(parts) == 2:
+                            yield 'D', int(parts[1])
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            pass
+
+    def replay(self, avl, root):
+        """
+        Rejoue le journal sur l'arbre (chargé depuis le dernier instantané).
+        Les lignes incomplètes (arrêt brutal pendant une écriture) sont ignorées.
+
+        Returns:
+            tuple: (nouvelle racine, nombre d'opérations rejouées)
+        """
+        count = 0
+        for entry in self._entries():
+            if entry[0] == 'A':
+                root = avl._insert(root, entry[1], entry[2])
+            else:
+                root = avl._delete(root, entry[1])
+            count += 1
+        self.records = count
+        return root, count
+
+    def replay_into(self, store):
+        """
+        Rejoue le journal sur un stockage (store.ConnectionStore) chargé
+        depuis le dernier instantané.
+
+        Returns:
+            int: Le nombre d'opérations rejouées
+        """
+        count = 0
+        for entry in self._entries():
+            if entry[0] == 'A':
+                store.upsert(entry[1], entry[2])
+            else:
+                store.remove(entry[1])
+            count += 1
+        self.records = count
+        return count
+
+    def needs_compaction(self):
+        return self.records >= self.compact_every
+
+    def reset(self):
+        # À appeler une fois l'instantané écrit : le journal repart de zéro
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            with open(self.filename, 'w'):
+                pass
+            self.records = 0
+            self.unsynced = 0
+
+    def close(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        with self.lock:
+            if self.file is not None:
+                self._sync()
+                self.file.close()
+                self.file = None
@@ -1,26 +1,109 @@
-import os
+import atexit
 from datetime import datetime
+import gzip
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+
+# Politiques en cas de file d'attente pleine (mode asynchrone)
+OVERFLOW_BLOCK = "block"  # l'appelant attend qu'une place se libère
+OVERFLOW_DROP = "drop"    # le message est abandonné et compté
+
+# Marqueur d'arrêt du thread d'écriture
+_STOP = object()
+
+
+class _FlushRequest:
+    """Demande de vidage adressée au thread d'écriture."""
+    def __init__(self):
+        self.done = threading.Event()
+
 
 class Logger:
     """
     Classe pour gérer les logs du système de surveillance des connexions.
+
+    En mode synchrone (par défaut), chaque appel écrit directement dans le
+    fichier. En mode asynchrone (queued=True), les appels se contentent de
+    mettre le message en file d'attente : un thread d'écriture le formate et
+    l'écrit par lots avec un fichier ouvert en permanence, vidé sur disque
+    tous les batch_size messages, toutes les flush_interval secondes et à
+    l'arrêt (log_system_exit / close).
+
+    Rotation (désactivée par défaut) : dès que le fichier dépasse max_bytes
+    octets ou est ouvert depuis plus de max_age secondes, il est renommé en
+    archive horodatée (log_file.AAAAMMJJ-HHMMSS-µs) et un nouveau fichier est
+    commencé. La compression gzip des archives et la suppression des plus
+    anciennes (au-delà de backup_count) sont faites par un thread séparé :
+    l'appelant ne paie que le renommage.
     """
-    def __init__(self, log_file="system_logs.txt"):
+    def __init__(self, log_file="system_logs.txt", queued=False, queue_size=10000,
+                 overflow=OVERFLOW_BLOCK, batch_size=256, flush_interval=1.0,
+                 max_bytes=0, max_age=0, backup_count=5, compress=True):
         """
         Initialise le logger avec le fichier de log spécifié.
         
         Args:
             log_file (str): Le nom du fichier de log
+            queued (bool): Active l'écriture asynchrone par un thread dédié
+            queue_size (int): Taille maximale de la file d'attente
+            overflow (str): Politique si la file est pleine ("block" ou "drop")
+            batch_size (int): Nombre de messages entre deux vidages du fichier
+            flush_interval (float): Délai maximal en secondes entre deux vidages
+            max_bytes (int): Taille déclenchant une rotation (0 : pas de rotation par taille)
+            max_age (float): Âge en secondes déclenchant une rotation (0 : pas de rotation par âge)
+            backup_count (int): Nombre d'archives conservées
+            compress (bool): Compresse les archives en gzip
         """
         self.log_file = log_file
+        self.queued = queued
+        self.overflow = overflow
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.backup_count = backup_count
+        self.compress = compress
+        # Taille et date d'ouverture du fichier courant (pour la rotation)
+        self._size = os.path.getsize(log_file) if os.path.exists(log_file) else 0
+        self._opened = time.monotonic()
+        self._lock = threading.Lock()
+        self._archive_lock = threading.Lock()
+        self._compressors = []
+        # Cache (seconde, texte) : strftime une seule fois par seconde
+        self._stamp = (None, "")
+        self._queue = None
+        self._writer = None
         
         # Créer le répertoire de logs s'il n'existe pas
         log_dir = os.path.dirname(log_file)
         if log_dir and not os.path.exists(log_dir):
             os.makedirs(log_dir)
+
+        if queued:
+            if overflow not in (OVERFLOW_BLOCK, OVERFLOW_DROP):
+                raise ValueError(f"Politique de débordement inconnue: {overflow}")
+            self._queue = queue.Queue(maxsize=queue_size)
+            # Fichier ouvert ici (et non dans le thread) pour qu'il existe dès le retour
+            f = open(self.log_file, "a")
+            self._writer = threading.Thread(target=self._writer_loop, args=(f,), name="logger-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
             
         # Enregistrer le démarrage du système
         self.log_system_start()
+
+    def _format(self, t, message):
+        second = int(t)
+        cached_second, text = self._stamp
+        if second != cached_second:
+            text = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second))
+            self._stamp = (second, text)
+        return f"[{text}] {message}\n"
     
     def _write_log(self, message):
         """
@@ -29,11 +112,151 @@ class Logger:
         Args:
             message (str): Le message à enregistrer
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_entry = f"[{timestamp}] {message}\n"
+        self._write_logs([message])
+
+    def _write_logs(self, messages):
+        """
+        Écrit plusieurs messages (même horodatage) en une seule opération.
         
-        with open(self.log_file, "a") as f:
-            f.write(log_entry)
+        Args:
+            messages (list): Les messages à enregistrer
+        """
+        t = time.time()
+        if self._queue is None:
+            text = "".join(self._format(t, message) for message in messages)
+            with self._lock:
+                if self._rotation_due():
+                    self._rotate()
+                with open(self.log_file, "a") as f:
+                    self._write_text(f, text)
+            return
+
+        for message in messages:
+            if self.overflow == OVERFLOW_BLOCK:
+                self._queue.put((t, message))
+            else:
+                try:
+                    self._queue.put_nowait((t, message))
+                except queue.Full:
+                    self.dropped += 1
+
+    def _write_text(self, f, text):
+        f.write(text)
+        if self.max_bytes:
+            self._size += len(text.encode(f.encoding, "replace"))
+
+    def _rotation_due(self):
+        return ((self.max_bytes and self._size >= self.max_bytes)
+                or (self.max_age and time.monotonic() - self._opened >= self.max_age))
+
+    def _rotate(self):
+        # Le fichier courant (fermé par l'appelant) devient une archive ; le
+        # renommage est immédiat, la compression et la purge sont en arrière-plan
+        if os.path.exists(self.log_file) and os.path.getsize(self.log_file):
+            archive = f"{self.log_file}.{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+            os.replace(self.log_file, archive)
+        self._size = 0
+        self._opened = time.monotonic()
+        compressor = threading.Thread(target=self._process_archives, name="logger-compress")
+        compressor.start()
+        self._compressors = [t for t in self._compressors if t.is_alive()]
+        self._compressors.append(compressor)
+
+    def archives(self):
+        """
+        Renvoie les archives du fichier de log, de la plus ancienne à la plus récente.
+        """
+        directory = os.path.dirname(self.log_file)
+        pattern = re.compile(re.escape(os.path.basename(self.log_file)) + r"\.\d{8}-\d{6}-\d{6}(\.gz)?$")
+        return sorted(os.path.join(directory, name) for name in os.listdir(directory or ".")
+                      if pattern.match(name))
+
+    def _process_archives(self):
+        # Purge des archives en trop puis compression des archives restantes
+        with self._archive_lock:
+            archives = self.archives()
+            for path in archives[:max(0, len(archives) - self.backup_count)]:
+                os.remove(path)
+            if not self.compress:
+                return
+            for path in self.archives():
+                if path.endswith(".gz"):
+                    continue
+                tmp_path = path + ".gz.tmp"
+                with open(path, "rb") as src, gzip.open(tmp_path, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                os.replace(tmp_path, path + ".gz")
+                os.remove(path)
+
+    def _writer_loop(self, f):
+        # Thread d'écriture : vide la file par lots dans un fichier ouvert en permanence
+        try:
+            pending = 0
+            last_flush = time.monotonic()
+            running = True
+            while running:
+                timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+                try:
+                    items = [self._queue.get(timeout=timeout)]
+                except queue.Empty:
+                    items = []
+                while len(items) < self.batch_size:
+                    try:
+                        items.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                lines = []
+                requests = []
+                for item in items:
+                    if item is _STOP:
+                        running = False
+                    elif isinstance(item, _FlushRequest):
+                        requests.append(item)
+                    else:
+                        lines.append(self._format(*item))
+                if lines:
+                    if self._rotation_due():
+                        f.close()
+                        self._rotate()
+                        f = open(self.log_file, "a")
+                        pending = 0
+                    self._write_text(f, "".join(lines))
+                    pending += len(lines)
+
+                if (requests or not running or pending >= self.batch_size
+                        or time.monotonic() - last_flush >= self.flush_interval):
+                    if pending:
+                        f.flush()
+                    pending = 0
+                    last_flush = time.monotonic()
+                for request in requests:
+                    request.done.set()
+        finally:
+            f.close()
+
+    def flush(self):
+        """
+        Attend que tous les messages en file soient écrits dans le fichier.
+        """
+        if self._writer is not None and self._writer.is_alive():
+            request = _FlushRequest()
+            self._queue.put(request)
+            request.done.wait()
+
+    def close(self):
+        """
+        Vide la file d'attente et arrête le thread d'écriture (mode asynchrone),
+        puis attend la fin des compressions d'archives en cours.
+        """
+        if self._writer is not None and self._writer.is_alive():
+            if self.dropped:
+                self._queue.put((time.time(), f"LOGS: {self.dropped} messages perdus (file d'attente pleine)"))
+                self.dropped = 0
+            self._queue.put(_STOP)
+            self._writer.join()
+        for compressor in list(self._compressors):
+            compressor.join()
     
     def log_connection_added(self, ip):
         """
@@ -44,6 +267,16 @@ class Logger:
         """
         self._write_log(f"CONNEXION AJOUTÉE: {ip}")
     
+    def log_connections_batch(self, inserted, refreshed):
+        """
+        Enregistre l'ajout d'un lot de connexions en une seule ligne.
+        
+        Args:
+            inserted (int): Nombre de nouvelles connexions
+            refreshed (int): Nombre de connexions existantes rafraîchies
+        """
+        self._write_log(f"LOT: {inserted} connexions ajoutées, {refreshed} rafraîchies")
+    
     def log_connection_deleted(self, ip):
         """
         Enregistre la suppression d'une connexion.
@@ -62,12 +295,52 @@ class Logger:
             seuil_minutes (int): Seuil d'inactivité en minutes
         """
         if ips:
-            self._write_log(f"NETTOYAGE: {len(ips)} connexions inactives depuis plus de {seuil_minutes} minutes supprimées")
-            for ip in ips:
-                self._write_log(f"  - {ip}")
+            messages = [f"NETTOYAGE: {len(ips)} connexions inactives depuis plus de {seuil_minutes} minutes supprimées"]
+            messages.extend(f"  - {ip}" for ip in ips)
+            self._write_logs(messages)
         else:
             self._write_log(f"NETTOYAGE: Aucune connexion inactive depuis plus de {seuil_minutes} minutes")
     
+    def log_sweep(self, ips, ttl_minutes, duration, complete):
+        """
+        Enregistre un passage du balayeur en une seule écriture (résumé et IP supprimées).
+        
+        Args:
+            ips (list): Liste des adresses IP expirées
+            ttl_minutes (float): Durée d'inactivité maximale en minutes
+            duration (float): Durée du passage en secondes
+            complete (bool): False si le budget a interrompu le passage
+        """
+        suite = "" if complete else ", suite au prochain passage"
+        messages = [f"EXPIRATION: {len(ips)} connexions inactives depuis plus de {ttl_minutes:g} minutes "
+                    f"supprimées en {duration * 1000:.1f} ms{suite}"]
+        messages.extend(f"  - {ip}" for ip in ips)
+        self._write_logs(messages)
+    
+    def log_ingest_stats(self, events, invalid, rate, count):
+        """
+        Enregistre un rapport de débit de l'ingestion en flux.
+        
+        Args:
+            events (int): Nombre d'événements traités depuis le début
+            invalid (int): Nombre de lignes invalides ignorées
+            rate (float): Débit en événements par seconde
+            count (int): Nombre de connexions dans l'arbre
+        """
+        self._write_log(f"FLUX: {events} événements ({invalid} invalides), {rate:.0f} év/s, {count} connexions")
+    
+    def log_server_stats(self, events, invalid, batches, queries):
+        """
+        Enregistre les compteurs du serveur réseau.
+        
+        Args:
+            events (int): Nombre d'événements reçus
+            invalid (int): Nombre de commandes invalides
+            batches (int): Nombre de lots appliqués
+            queries (int): Nombre de requêtes servies
+        """
+        self._write_log(f"SERVEUR: {events} événements, {invalid} commandes invalides, {batches} lots, {queries} requêtes")
+    
     def log_connection_search(self, ip, found):
         """
         Enregistre une recherche de connexion.
@@ -79,6 +352,16 @@ class Logger:
         result = "trouvée" if found else "non trouvée"
         self._write_log(f"RECHERCHE: Connexion {ip} {result}")
     
+    def log_connections_range(self, requete, count):
+        """
+        Enregistre une recherche par plage d'adresses ou sous-réseau.
+        
+        Args:
+            requete (str): La plage ou le sous-réseau recherché
+            count (int): Nombre de connexions trouvées
+        """
+        self._write_log(f"PLAGE: {count} connexions dans {requete}")
+    
     def log_connections_display(self, count):
         """
         Enregistre l'affichage des connexions.
@@ -108,6 +391,16 @@ class Logger:
         """
         self._write_log(f"CHARGEMENT: {count} connexions chargées depuis {filename}")
     
+    def log_journal_replayed(self, filename, count):
+        """
+        Enregistre le rejeu du journal des mutations au démarrage.
+        
+        Args:
+            filename (str): Nom du fichier journal
+            count (int): Nombre d'opérations rejouées
+        """
+        self._write_log(f"JOURNAL: {count} opérations rejouées depuis {filename}")
+    
     def log_system_start(self):
         """
         Enregistre le démarrage du système.
@@ -118,4 +411,5 @@ class Logger:
         """
         Enregistre l'arrêt du système.
         """
-        self._write_log("SYSTÈME ARRÊTÉ")
\ No newline at end of file
+        self._write_log("SYSTÈME ARRÊTÉ")
+        self.close()
\ No newline at end of file
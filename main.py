@@ -1,74 +1,282 @@
 from avl import AVLTree, Connexion
+from avl_balance import BalanceAVLTree
+from block_store import BlockStore
+from store import AVLStore
+import argparse
+import asyncio
 import os
+import sys
 from utils import clear_screen, afficher_menu
 from menu.add_connection import add_connection
 from menu.delete_connection import delete_connection
 from menu.clean_connections import clean_connections
 from menu.search_connection import search_connection
+from menu.range_connections import range_connections
 from menu.display_connections import display_connections
 from menu.save_and_exit import save_and_exit
 from menu.save_connections import save_connections
+from menu.show_stats import show_stats
 from logger import Logger
+from journal import Journal, FSYNC_BATCH
+from ingest import StreamIngest
+from server import ConnectionServer
+from sweeper import Sweeper
+from connection_table import RWLock
+import instrumentation
 
-def main():
-    """Fonction principale du programme."""
+# Instantané binaire des connexions et journal des mutations survenues depuis
+SNAPSHOT_FILE = "connexions.bin"
+# Ancien format texte, importé au premier démarrage s'il n'y a pas d'instantané binaire
+TEXT_FILE = "connexions.txt"
+JOURNAL_FILE = "connexions.journal"
+# Politique fsync du journal : "always", "batch" ou "interval"
+JOURNAL_FSYNC = "always"
+# Écriture des logs par un thread dédié (les menus n'attendent plus le disque)
+LOG_QUEUED = True
+# Rotation des logs : 10 Mo ou 24 h par fichier, 7 archives gzip conservées
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_MAX_AGE = 24 * 3600
+LOG_BACKUPS = 7
+# Stockages sélectionnables avec --engine : arbre AVL à hauteur stockée ou à
+# facteur d'équilibre (AVLStore), ou tableaux triés par blocs
+ENGINES = {"height": AVLTree, "balance": BalanceAVLTree, "blocks": BlockStore}
+
+def parse_args(argv=None):
+    """
+    Analyse les options de la ligne de commande.
+
+    Args:
+        argv (list): Les arguments (sys.argv[1:] par défaut)
+    """
+    parser = argparse.ArgumentParser(description="Système de surveillance des connexions réseau")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="height",
+                        help="stockage des connexions : arbre AVL à hauteur stockée (height, défaut) "
+                             "ou à facteur d'équilibre (balance), ou tableaux triés par blocs (blocks)")
+    parser.add_argument("--cache", type=int, default=0, metavar="N",
+                        help="garde en cache les nœuds des N IP les plus consultées "
+                             "(recherches et rafraîchissements, arbres AVL seulement, défaut : 0, sans cache)")
+    parser.add_argument("--ingest", metavar="FICHIER",
+                        help="mode sans interface : lit les événements \"ip[,horodatage]\" "
+                             "depuis FICHIER (\"-\" pour l'entrée standard)")
+    parser.add_argument("--serve", metavar="PORT", type=int,
+                        help="mode serveur : reçoit événements et requêtes en TCP et UDP sur PORT")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="adresse d'écoute du mode serveur (défaut : 127.0.0.1)")
+    parser.add_argument("--batch", type=int, default=1000,
+                        help="taille maximale d'un micro-lot (défaut : 1000)")
+    parser.add_argument("--batch-timeout", type=float, default=None,
+                        help="délai maximal en secondes avant d'appliquer un lot incomplet "
+                             "(défaut : 0.5 en flux, 0.005 en serveur)")
+    parser.add_argument("--checkpoint", type=float, default=60.0,
+                        help="secondes entre deux points de reprise (défaut : 60)")
+    parser.add_argument("--ttl", type=float, default=None, metavar="MINUTES",
+                        help="supprime automatiquement les connexions inactives depuis plus "
+                             "de MINUTES (tous les modes)")
+    parser.add_argument("--sweep-interval", type=float, default=1.0,
+                        help="secondes entre deux passages du balayeur (défaut : 1)")
+    parser.add_argument("--sweep-budget", type=float, default=5.0,
+                        help="durée maximale d'un passage du balayeur en ms (défaut : 5)")
+    parser.add_argument("--report", type=float, default=10.0,
+                        help="secondes entre deux rapports de débit (défaut : 10)")
+    parser.add_argument("--stats", metavar="FICHIER",
+                        help="active l'instrumentation et écrit ses compteurs en JSON dans FICHIER "
+                             "(à chaque rapport, point de reprise et à l'arrêt)")
+    return parser.parse_args(argv)
+
+def creer_stockage(args):
+    """
+    Crée le stockage choisi avec --engine.
 
-    # Initialisation de l'arbre AVL et du logger
-    avl = AVLTree()
-    root = None
-    logger = Logger()
-
-    # Chargement des connexions depuis le fichier s'il existe
-    filename = "connexions.txt"
-    if os.path.exists(filename):
-        print(f"Chargement des connexions depuis {filename}...")
-        root = avl.load_from_file(filename)
-        if root:
-            connexions = avl.inorder(root)
+    Returns:
+        Le stockage (store.ConnectionStore)
+    """
+    engine = ENGINES[args.engine]
+    if engine is BlockStore:
+        return BlockStore()
+    return AVLStore(engine(cache_size=args.cache))
+
+def charger_connexions(store, logger, fsync, fsync_batch=64):
+    """
+    Charge le dernier instantané (ou importe le fichier texte) puis rejoue le journal.
+
+    Args:
+        store: Le stockage des connexions
+        logger: Le logger pour enregistrer les opérations
+        fsync (str): La politique de synchronisation du journal
+        fsync_batch (int): Nombre d'opérations entre deux fsync en mode "batch"
+
+    Returns:
+        Le journal attaché au stockage
+    """
+    # Chargement du dernier instantané s'il existe (ou import du fichier texte)
+    filename = SNAPSHOT_FILE
+    source = filename if os.path.exists(filename) else TEXT_FILE
+    if os.path.exists(source):
+        print(f"Chargement des connexions depuis {source}...")
+        if store.load(source):
             print("Connexions chargées avec succès!")
-            logger.log_connections_loaded(filename, len(connexions))
+            logger.log_connections_loaded(source, len(store))
         else:
             print("Aucune connexion trouvée ou fichier vide.")
-            logger.log_connections_loaded(filename, 0)
+            logger.log_connections_loaded(source, 0)
+
+    # Rejeu des mutations journalisées depuis cet instantané, puis journalisation
+    # des suivantes au fil de l'eau (plus de réécriture complète après chaque opération)
+    journal = Journal(JOURNAL_FILE, fsync=fsync, batch_size=fsync_batch)
+    replayed = journal.replay_into(store)
+    if replayed:
+        print(f"{replayed} opérations rejouées depuis {JOURNAL_FILE}.")
+        logger.log_journal_replayed(JOURNAL_FILE, replayed)
+    store.journal = journal
+    return journal
+
+def creer_balayeur(args, store, logger):
+    """
+    Crée le balayeur des connexions inactives si --ttl est donné.
+
+    Returns:
+        Le Sweeper, ou None sans --ttl
+    """
+    if args.ttl is None:
+        return None
+    return Sweeper(store, logger, args.ttl, budget=args.sweep_budget / 1000,
+                   interval=args.sweep_interval)
+
+def ingestion(args, store, logger, journal):
+    """
+    Mode sans interface : applique un flux d'événements puis s'arrête à sa fin.
+    """
+    ingest = StreamIngest(store, logger, journal, SNAPSHOT_FILE, batch_size=args.batch,
+                          batch_timeout=0.5 if args.batch_timeout is None else args.batch_timeout,
+                          checkpoint_interval=args.checkpoint,
+                          sweeper=creer_balayeur(args, store, logger),
+                          report_interval=args.report, stats_file=args.stats)
+    if args.ingest == "-":
+        ingest.run(sys.stdin)
+    else:
+        with open(args.ingest, 'r') as stream:
+            ingest.run(stream)
+    journal.close()
+    logger.log_system_exit()
+
+def serveur(args, store, logger, journal):
+    """
+    Mode serveur : écoute jusqu'à Ctrl+C, avec un point de reprise toutes les --checkpoint secondes.
+    """
+    server = ConnectionServer(store, logger, journal, batch_size=args.batch,
+                              batch_timeout=0.005 if args.batch_timeout is None else args.batch_timeout,
+                              sweeper=creer_balayeur(args, store, logger))
+
+    async def run():
+        await server.start(args.host, args.serve)
+        print(f"Écoute TCP et UDP sur {args.host}:{args.serve} (Ctrl+C pour arrêter)", file=sys.stderr)
+        try:
+            while True:
+                await asyncio.sleep(args.checkpoint)
+                server.apply()
+                save_connections(store, SNAPSHOT_FILE, logger, journal)
+                server.log_stats()
+                if args.stats:
+                    instrumentation.write_stats(args.stats, server.stats())
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    save_connections(store, SNAPSHOT_FILE, logger, journal)
+    server.log_stats()
+    if args.stats:
+        instrumentation.write_stats(args.stats, server.stats())
+    journal.close()
+    logger.log_system_exit()
+
+def main(argv=None):
+    """Fonction principale du programme."""
+    args = parse_args(argv)
+
+    # Initialisation du stockage et du logger
+    store = creer_stockage(args)
+    logger = Logger(queued=LOG_QUEUED, max_bytes=LOG_MAX_BYTES, max_age=LOG_MAX_AGE,
+                    backup_count=LOG_BACKUPS)
+    if args.stats:
+        # Activée avant le chargement : celui-ci est mesuré aussi
+        try:
+            instrumentation.enable(store)
+        except TypeError as exc:
+            print(f"{exc} : seuls les logs sont instrumentés.", file=sys.stderr)
+        instrumentation.enable(logger)
+
+    if args.ingest is not None or args.serve is not None:
+        # Flux ou serveur : fsync par lot (le journal est synchronisé après chaque lot appliqué)
+        journal = charger_connexions(store, logger, FSYNC_BATCH, args.batch)
+        if args.ingest is not None:
+            ingestion(args, store, logger, journal)
+        else:
+            serveur(args, store, logger, journal)
+        return
+
+    journal = charger_connexions(store, logger, JOURNAL_FSYNC)
+    filename = SNAPSHOT_FILE
+
+    # Chaque opération du menu prend le verrou : le balayeur (thread de fond)
+    # ne passe qu'entre deux opérations, jamais pendant
+    lock = RWLock()
+    sweeper = creer_balayeur(args, store, logger)
+    if sweeper is not None:
+        sweeper.start(store, lock)
 
     while True:
         afficher_menu()
-        choix = input("Entrez votre choix (1-6): ")
-
-        if choix == "1":
-            # Ajouter une connexion IP
-            root = add_connection(avl, root, logger)
-            # Sauvegarder les connexions après ajout
-            save_connections(avl, root, filename, logger)
-
-        elif choix == "2":
-            # Supprimer une IP
-            root = delete_connection(avl, root, logger)
-            # Sauvegarder les connexions après suppression
-            save_connections(avl, root, filename, logger)
-
-        elif choix == "3":
-            # Nettoyer les IP inactives
-            root = clean_connections(avl, root, logger)
-            # Sauvegarder les connexions après nettoyage
-            save_connections(avl, root, filename, logger)
-
-        elif choix == "4":
-            # Rechercher une IP
-            search_connection(avl, root, logger)
-
-        elif choix == "5":
-            # Afficher toutes les connexions
-            display_connections(avl, root, logger)
-
-        elif choix == "6":
-            # Quitter et sauvegarder
-            if save_and_exit(avl, root, filename, logger):
-                logger.log_system_exit()
-                break
+        choix = input("Entrez votre choix (1-8): ")
 
-        else:
-            print("Choix invalide. Veuillez entrer un nombre entre 1 et 6.")
+        with lock.write_locked():
+            if choix == "1":
+                # Ajouter une connexion IP
+                add_connection(store, logger)
+
+            elif choix == "2":
+                # Supprimer une IP
+                delete_connection(store, logger)
+
+            elif choix == "3":
+                # Nettoyer les IP inactives
+                clean_connections(store, logger)
+
+            elif choix == "4":
+                # Rechercher une IP
+                search_connection(store, logger)
+
+            elif choix == "5":
+                # Rechercher un sous-réseau ou une plage d'IP
+                range_connections(store, logger)
+
+            elif choix == "6":
+                # Afficher toutes les connexions
+                display_connections(store, logger)
+
+            elif choix == "7":
+                # Quitter et sauvegarder (le balayeur s'arrête avant la fermeture du journal)
+                if sweeper is not None:
+                    sweeper.stop()
+                if save_and_exit(store, filename, logger, journal):
+                    if args.stats:
+                        instrumentation.write_stats(args.stats, instrumentation.snapshot(
+                            store, None, logger, sweeper))
+                    logger.log_system_exit()
+                    break
+
+            elif choix == "8":
+                # Statistiques d'instrumentation
+                show_stats(store, logger, sweeper)
+
+            else:
+                print("Choix invalide. Veuillez entrer un nombre entre 1 et 8.")
+
+            # Compactage périodique : instantané complet et remise à zéro du journal
+            if journal.needs_compaction():
+                save_connections(store, filename, logger, journal)
 
         input("\nAppuyez sur Entrée pour continuer...")
         clear_screen()
@@ -1,23 +1,22 @@
 from avl import Connexion
 
-def add_connection(avl, root, logger):
+def add_connection(store, logger):
     """
-    Ajoute une nouvelle connexion IP à l'arbre AVL.
+    Ajoute une nouvelle connexion IP au stockage.
 
     Args:
-        avl: L'arbre AVL
-        root: La racine de l'arbre
+        store: Le stockage des connexions (store.ConnectionStore)
         logger: Le logger pour enregistrer l'opération
-
-    Returns:
-        La nouvelle racine de l'arbre après insertion
     """
     ip = input("Entrez l'adresse IP à ajouter: ")
-    connexion = Connexion(ip)
-    root = avl.insert(root, connexion)
-    print(f"Connexion {ip} ajoutée avec succès!")
+    try:
+        connexion = Connexion(ip)
+    except ValueError:
+        print(f"Adresse IP invalide: {ip}")
+        return
 
-    # Enregistrer l'opération dans les logs
-    logger.log_connection_added(ip)
+    store.insert(connexion)
+    print(f"Connexion {connexion.ip} ajoutée avec succès!")
 
-    return root
+    # Enregistrer l'opération dans les logs
+    logger.log_connection_added(connexion.ip)
@@ -1,26 +1,22 @@
-def clean_connections(avl, root, logger):
+def clean_connections(store, logger):
     """
     Nettoie les connexions inactives depuis plus de X minutes.
 
     Args:
-        avl: L'arbre AVL
-        root: La racine de l'arbre
+        store: Le stockage des connexions (store.ConnectionStore)
         logger: Le logger pour enregistrer l'opération
-
-    Returns:
-        La nouvelle racine de l'arbre après nettoyage
     """
-    if root is None:
+    if not len(store):
         print("Aucune connexion à nettoyer.")
-        return root
+        return
 
     try:
         seuil = int(input("Entrez le seuil d'inactivité en minutes: "))
         if seuil <= 0:
             print("Le seuil doit être un nombre positif.")
-            return root
+            return
 
-        new_root, ips_supprimees = avl.nettoyage(root, seuil)
+        ips_supprimees = store.nettoyage(seuil)
 
         # Enregistrer l'opération dans les logs
         logger.log_connections_cleaned(ips_supprimees, seuil)
@@ -31,8 +27,5 @@ def clean_connections(avl, root, logger):
                 print(f" - {ip}")
         else:
             print("Aucune connexion inactive trouvée.")
-
-        return new_root
     except ValueError:
         print("Veuillez entrer un nombre valide.")
-        return root
@@ -1,27 +1,28 @@
-def delete_connection(avl, root, logger):
+from avl import ip_to_int, int_to_ip
+
+def delete_connection(store, logger):
     """
-    Supprime une connexion IP de l'arbre AVL.
+    Supprime une connexion IP du stockage.
 
     Args:
-        avl: L'arbre AVL
-        root: La racine de l'arbre
+        store: Le stockage des connexions (store.ConnectionStore)
         logger: Le logger pour enregistrer l'opération
-
-    Returns:
-        La nouvelle racine de l'arbre après suppression
     """
-    if root is None:
+    if not len(store):
         print("Aucune connexion à supprimer.")
-        return root
+        return
 
     ip = input("Entrez l'adresse IP à supprimer: ")
-    if avl.search(root, ip):
-        root = avl.delete(root, ip)
+    try:
+        ip = int_to_ip(ip_to_int(ip))
+    except ValueError:
+        print(f"Adresse IP invalide: {ip}")
+        return
+
+    if store.delete(ip):
         print(f"Connexion {ip} supprimée avec succès!")
 
         # Enregistrer l'opération dans les logs
         logger.log_connection_deleted(ip)
     else:
         print(f"Connexion {ip} non trouvée.")
-
-    return root
@@ -1,25 +1,43 @@
-def display_connections(avl, root, logger):
+from itertools import islice
+
+# Nombre de connexions par page lorsque la liste est longue
+TAILLE_PAGE = 20
+
+def display_connections(store, logger):
     """
-    Affiche toutes les connexions triées par IP.
+    Affiche toutes les connexions triées par IP, ou une page de la liste.
 
     Args:
-        avl: L'arbre AVL
-        root: La racine de l'arbre
+        store: Le stockage des connexions (store.ConnectionStore)
         logger: Le logger pour enregistrer l'opération
     """
-    if root is None:
+    count = len(store)
+    if not count:
         print("Aucune connexion à afficher.")
         logger.log_connections_display(0)
         return
 
-    connexions = avl.inorder(root)
-    if connexions:
-        print(f"\nListe des {len(connexions)} connexions (triées par IP):")
-        for i, connexion in enumerate(connexions, 1):
-            print(f"{i}. {connexion}")
+    debut, fin = 0, count
+    pages = (count + TAILLE_PAGE - 1) // TAILLE_PAGE
+    if pages > 1:
+        choix = input(f"Page à afficher (1-{pages}, Entrée pour tout afficher): ").strip()
+        if choix:
+            try:
+                page = int(choix)
+                if not 1 <= page <= pages:
+                    raise ValueError
+            except ValueError:
+                print("Numéro de page invalide.")
+                return
+            debut = (page - 1) * TAILLE_PAGE
+            fin = min(debut + TAILLE_PAGE, count)
 
-        # Enregistrer l'opération dans les logs
-        logger.log_connections_display(len(connexions))
-    else:
-        print("Aucune connexion à afficher.")
-        logger.log_connections_display(0)
+    # Accès direct au début de la page (tailles de sous-arbres pour l'AVL)
+    premiere, _ = store.select(debut)
+    print(f"\nListe des {count} connexions (triées par IP):")
+    connexions = islice(store.iter_inorder(start=premiere), fin - debut)
+    for i, connexion in enumerate(connexions, debut + 1):
+        print(f"{i}. {connexion}")
+
+    # Enregistrer l'opération dans les logs
+    logger.log_connections_display(fin - debut)
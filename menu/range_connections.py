@@ -0,0 +1,34 @@
+from avl import parse_range
+
+def range_connections(store, logger):
+    """
+    Recherche les connexions d'un sous-réseau (ex: 10.20.0.0/16)
+    ou d'une plage d'adresses (ex: 10.0.0.1-10.0.0.255).
+
+    Args:
+        store: Le stockage des connexions (store.ConnectionStore)
+        logger: Le logger pour enregistrer l'opération
+    """
+    if not len(store):
+        print("Aucune connexion à rechercher.")
+        return
+
+    requete = input("Entrez un sous-réseau (a.b.c.d/n) ou une plage (IP1-IP2): ").strip()
+    try:
+        lo, hi = parse_range(requete)
+    except ValueError:
+        print(f"Plage invalide: {requete}")
+        return
+
+    count = 0
+    for connexion in store.iter_range(lo, hi):
+        count += 1
+        print(f"{count}. {connexion}")
+
+    # Enregistrer l'opération dans les logs
+    logger.log_connections_range(requete, count)
+
+    if count:
+        print(f"{count} connexions trouvées dans {requete}.")
+    else:
+        print(f"Aucune connexion dans {requete}.")
@@ -1,12 +1,12 @@
-def save_and_exit(avl, root, filename, logger):
+def save_and_exit(store, filename, logger, journal=None):
     """
     Sauvegarde les connexions dans un fichier et quitte le programme.
 
     Args:
-        avl: L'arbre AVL
-        root: La racine de l'arbre
+        store: Le stockage des connexions (store.ConnectionStore)
         filename: Le nom du fichier de sauvegarde
         logger: Le logger pour enregistrer l'opération
+        journal: Le journal des mutations, compacté dans l'instantané
 
     Returns:
         bool: True pour indiquer qu'il faut quitter le programme
@@ -14,9 +14,11 @@ def save_and_exit(avl, root, filename, logger):
     from menu.save_connections import save_connections
 
     # Utiliser la fonction save_connections pour sauvegarder les connexions
-    save_connections(avl, root, filename, logger)
+    save_connections(store, filename, logger, journal)
+    if journal is not None:
+        journal.close()
 
-    if root:
+    if len(store):
         print(f"Connexions sauvegardées dans {filename}")
 
     print("Merci d'avoir utilisé le système de surveillance des connexions!")
@@ -1,11 +1,17 @@
-def save_connections(avl, root, filename, logger):
+def save_connections(store, filename, logger, journal=None):
+    """
+    Écrit l'instantané complet des connexions dans le fichier.
 
-    if root:
-        connexions = avl.inorder(root)
-        avl.save_to_file(root, filename)
-        
-        # Enregistrer l'opération dans les logs
-        logger.log_connections_saved(filename, len(connexions))
-    else:
-        # Enregistrer qu'aucune connexion n'a été sauvegardée
-        logger.log_connections_saved(filename, 0)
\ No newline at end of file
+    Args:
+        store: Le stockage des connexions (store.ConnectionStore)
+        filename: Le nom du fichier de sauvegarde
+        logger: Le logger pour enregistrer l'opération
+        journal: Le journal des mutations, remis à zéro une fois l'instantané écrit
+    """
+    # Un arbre vide est aussi sauvegardé, sinon l'ancien instantané resterait valide
+    store.snapshot(filename)
+    if journal is not None:
+        journal.reset()
+
+    # Enregistrer l'opération dans les logs
+    logger.log_connections_saved(filename, len(store))
@@ -1,20 +1,26 @@
 from datetime import datetime
+from avl import ip_to_int, int_to_ip
 
-def search_connection(avl, root, logger):
+def search_connection(store, logger):
     """
-    Recherche une connexion IP dans l'arbre AVL.
+    Recherche une connexion IP dans le stockage.
 
     Args:
-        avl: L'arbre AVL
-        root: La racine de l'arbre
+        store: Le stockage des connexions (store.ConnectionStore)
         logger: Le logger pour enregistrer l'opération
     """
-    if root is None:
+    if not len(store):
         print("Aucune connexion à rechercher.")
         return
 
     ip = input("Entrez l'adresse IP à rechercher: ")
-    connexion = avl.search(root, ip)
+    try:
+        ip = int_to_ip(ip_to_int(ip))
+    except ValueError:
+        print(f"Adresse IP invalide: {ip}")
+        return
+
+    connexion = store.search(ip)
 
     # Enregistrer l'opération dans les logs
     logger.log_connection_search(ip, connexion is not None)
@@ -0,0 +1,67 @@
+import instrumentation
+
+# Fichier du relevé JSON écrit depuis le menu
+STATS_FILE = "stats.json"
+
+def show_stats(store, logger, sweeper=None):
+    """
+    Affiche les compteurs d'instrumentation du stockage et du logger,
+    propose de les activer s'ils ne le sont pas, ou de les écrire en JSON.
+
+    Args:
+        store: Le stockage des connexions (store.ConnectionStore)
+        logger: Le logger
+        sweeper: Le balayeur des connexions inactives (facultatif)
+    """
+    if not instrumentation.is_enabled(store) and not instrumentation.is_enabled(logger):
+        print("Instrumentation désactivée (aucun coût sur les opérations).")
+        if input("L'activer maintenant ? (o/n): ").strip().lower() == "o":
+            try:
+                instrumentation.enable(store)
+            except TypeError as exc:
+                print(f"{exc} : seuls les logs sont instrumentés.")
+            instrumentation.enable(logger)
+            print("Instrumentation activée : les compteurs partent de zéro.")
+        return
+
+    data = instrumentation.snapshot(store, None, logger, sweeper)
+    if "tree" in data:
+        tree = data["tree"]
+        print(f"\nArbre : {tree['connections']} connexions, hauteur {tree['height']} "
+              f"(maximum AVL {tree['height_bound']})")
+    else:
+        blocks = data["store"]
+        print(f"\nBlocs : {blocks['connections']} connexions, {blocks['blocks']} blocs "
+              f"de {blocks['block_size']} (remplissage {blocks['fill']:.0%})")
+
+    print(f"\n{'opération':>15} {'appels':>9} {'moy. µs':>9} {'p99 µs':>9} {'visités/op':>11} "
+          f"{'comp./op':>9} {'rot. simples':>13} {'rot. doubles':>13}")
+    for op, stats in data["operations"].items():
+        calls = stats["calls"] or 1
+        print(f"{op:>15} {stats['calls']:>9} {stats['mean_ns'] / 1000:>9.1f} {stats['p99_ns'] / 1000:>9.1f} "
+              f"{stats['visited'] / calls:>11.1f} {stats['comparisons'] / calls:>9.1f} "
+              f"{stats['single_rotations']:>13} {stats['double_rotations']:>13}")
+
+    log = data["logger"]
+    if "writes" in log:
+        print(f"\nLogs : {log['messages']} messages, {log['bytes']} octets, "
+              f"écriture moy. {log['writes']['mean_ns'] / 1000:.1f} µs (p99 {log['writes']['p99_ns'] / 1000:.1f} µs), "
+              f"{log['rotations']} rotations, {log['dropped']} perdus, file {log['queue_depth']}")
+    if "cache" in data:
+        cache = data["cache"]
+        print(f"Cache : {cache['size']}/{cache['capacity']} IP, {cache['hits']} succès, "
+              f"{cache['misses']} défauts ({cache['hit_ratio']:.1%}), {cache['evictions']} évictions, "
+              f"{cache['invalidations']} invalidations")
+    if "sweeper" in data:
+        sweep = data["sweeper"]
+        print(f"Balayeur : {sweep['runs']} passages, {sweep['evicted']} connexions expirées, "
+              f"dernier passage {sweep['last_duration'] * 1000:.1f} ms")
+
+    choix = input("\n[E]crire le relevé JSON, [D]ésactiver, Entrée pour revenir: ").strip().lower()
+    if choix == "e":
+        instrumentation.write_stats(STATS_FILE, data)
+        print(f"Relevé écrit dans {STATS_FILE}")
+    elif choix == "d":
+        instrumentation.disable(store)
+        instrumentation.disable(logger)
+        print("Instrumentation désactivée.")
@@ -0,0 +1,160 @@
+"""
+Moteur AVL récursif d'origine, conservé comme référence pour vérifier que
+le moteur itératif produit les mêmes arbres (test_avl.py) et pour les
+mesures « avant / après » (benchmarks.bench_iterative).
+
+LegacyAVLTree reproduit en plus la disposition mémoire d'origine (nœuds à
+dictionnaire portant un objet connexion, datetime dans l'index
+d'expiration) pour benchmarks.bench_memory.
+"""
+from datetime import datetime
+
+from avl import AVLTree, AVLNode, int_to_ip
+
+
+class RecursiveAVLTree(AVLTree):
+    node_class = AVLNode
+
+    def _insert(self, root, key, ts):
+        # Insertion standard BST
+        if root is None:
+            return self.node_class(key, ts)
+
+        if key < root.key:
+            root.left = self._insert(root.left, key, ts)
+        elif key > root.key:
+            root.right = self._insert(root.right, key, ts)
+        else:
+            # IP déjà présente, mise à jour du timestamp
+            root.ts = ts
+            return root
+
+        self.update_height(root)
+        balance = self.balance_factor(root)
+
+        # Cas Gauche-Gauche
+        if balance > 1 and key < root.left.key:
+            return self.right_rotate(root)
+
+        # Cas Droite-Droite
+        if balance < -1 and key > root.right.key:
+            return self.left_rotate(root)
+
+        # Cas Gauche-Droite
+        if balance > 1 and key > root.left.key:
+            root.left = self.left_rotate(root.left)
+            return self.right_rotate(root)
+
+        # Cas Droite-Gauche
+        if balance < -1 and key < root.right.key:
+            root.right = self.right_rotate(root.right)
+            return self.left_rotate(root)
+
+        return root
+
+    def _delete(self, root, key):
+        # Suppression standard BST
+        if root is None:
+            return root
+
+        if key < root.key:
+            root.left = self._delete(root.left, key)
+        elif key > root.key:
+            root.right = self._delete(root.right, key)
+        else:
+            # Cas avec un seul enfant ou sans enfant
+            if root.left is None:
+                return root.right
+            elif root.right is None:
+                return root.left
+
+            # Cas avec deux enfants
+            temp = self.get_min_value_node(root.right)
+            root.key = temp.key
+            root.ts = temp.ts
+            root.right = self._delete(root.right, temp.key)
+
+        self.update_height(root)
+        balance = self.balance_factor(root)
+
+        # Cas Gauche-Gauche
+        if balance > 1 and self.balance_factor(root.left) >= 0:
+            return self.right_rotate(root)
+
+        # Cas Gauche-Droite
+        if balance > 1 and self.balance_factor(root.left) < 0:
+            root.left = self.left_rotate(root.left)
+            return self.right_rotate(root)
+
+        # Cas Droite-Droite
+        if balance < -1 and self.balance_factor(root.right) <= 0:
+            return self.left_rotate(root)
+
+        # Cas Droite-Gauche
+        if balance < -1 and self.balance_factor(root.right) > 0:
+            root.right = self.right_rotate(root.right)
+            return self.left_rotate(root)
+
+        return root
+
+    def _find(self, root, key):
+        if root is None or root.key == key:
+            return root
+
+        if key < root.key:
+            return self._find(root.left, key)
+        return self._find(root.right, key)
+
+    def inorder(self, root):
+        result = []
+        if root:
+            result.extend(self.inorder(root.left))
+            result.append(root.data)
+            result.extend(self.inorder(root.right))
+        return result
+
+
+class LegacyConnexion:
+    # Connexion d'origine : attributs dans un dictionnaire, IP en texte et datetime
+    def __init__(self, key, ts):
+        self.key = key
+        self.ip = int_to_ip(key)
+        self.timestamp = datetime.fromtimestamp(ts)
+
+
+class LegacyAVLNode:
+    # Nœud d'origine (sans __slots__) : la connexion est un objet à part
+    def __init__(self, key, ts):
+        self.data = LegacyConnexion(key, ts)
+        self.left = None
+        self.right = None
+        self.height = 1
+        self.size = 1
+
+    @property
+    def key(self):
+        return self.data.key
+
+    @key.setter
+    def key(self, key):
+        self.data.key = key
+        self.data.ip = int_to_ip(key)
+
+    @property
+    def ts(self):
+        return self.data.timestamp.timestamp()
+
+    @ts.setter
+    def ts(self, ts):
+        self.data.timestamp = datetime.fromtimestamp(ts)
+
+
+class LegacyAVLTree(RecursiveAVLTree):
+    node_class = LegacyAVLNode
+
+    def insert(self, root, data):
+        root = self._insert(root, data.key, data.timestamp.timestamp())
+        # L'index d'expiration d'origine partageait le datetime de la connexion
+        connexion = RecursiveAVLTree._find(self, root, data.key).data
+        self.expiry.push(connexion.timestamp, connexion.key)
+        return root
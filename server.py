@@ -0,0 +1,296 @@
+"""
+Serveur réseau local (asyncio) alimentant l'arbre des connexions.
+
+Protocole texte, une commande par ligne (TCP) ou par ligne de datagramme (UDP) :
+    ADD ip[,horodatage]     événement de connexion          -> OK
+    SEARCH ip               recherche                       -> FOUND ip,horodatage | NOTFOUND ip
+    RANGE plage [limite]    connexions d'un sous-réseau     -> RANGE n, n lignes ip,horodatage, END
+                            ou d'une plage IP1-IP2
+    COUNT plage             nombre de connexions            -> COUNT n
+    LEN                     nombre total de connexions      -> LEN n
+    STATS                   compteurs d'instrumentation     -> STATS {json sur une ligne}
+Une ligne qui n'est pas une commande est traitée comme un ADD (format des
+collecteurs : "ip[,horodatage]"). Toute erreur est signalée par "ERR message".
+
+Les événements sont regroupés (dédoublonnés, timestamp le plus récent par
+IP) et appliqués par lots : dès que batch_size événements sont en attente
+ou au plus tard batch_timeout secondes après le premier. Le "OK" d'un ADD
+n'est envoyé qu'une fois son lot appliqué (et journalisé).
+
+Tout s'exécute dans la boucle asyncio : l'arbre n'est jamais modifié
+pendant une lecture. Une requête applique d'abord les événements en
+attente, pour qu'un client lise toujours ses propres écritures. Le
+balayeur des connexions inactives (sweeper.Sweeper), s'il est fourni, est
+une tâche de la même boucle : chaque passage applique le lot en attente
+puis dispose de son budget de temps, sans bloquer les clients plus longtemps.
+
+Contre-pression : en TCP, les réponses d'une connexion sont envoyées dans
+l'ordre des commandes et au plus window commandes restent en cours par
+connexion ; au-delà, la lecture de la socket est suspendue jusqu'à ce que
+le lot en cours soit appliqué et les réponses envoyées, ce qui ralentit
+le client via TCP. Le lot en attente ne dépasse jamais batch_size
+événements. UDP n'a pas de contre-pression : quand le serveur ne suit
+pas, le noyau abandonne les datagrammes en trop.
+"""
+import asyncio
+from itertools import islice
+import json
+
+from avl import int_to_ip, parse_range, add_to_batch
+from store import ip_key
+from ingest import parse_event
+import instrumentation
+
+COMMANDS = ("ADD", "SEARCH", "RANGE", "COUNT", "LEN", "STATS")
+
+
+def _format_entry(key, ts):
+    return f"{int_to_ip(key)},{ts!r}"
+
+
+class _UDPProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        replies = []
+        for line in data.decode(errors="replace").splitlines():
+            response = self.server.dispatch(line, udp=True)
+            if isinstance(response, str):
+                replies.append(response)
+        if replies:
+            self.transport.sendto(("\n".join(replies) + "\n").encode(), addr)
+
+
+class ConnectionServer:
+    """
+    Serveur asyncio (TCP et UDP) appliquant des événements de connexion à un
+    stockage (store.ConnectionStore).
+
+    Args:
+        store: Le stockage des connexions
+        logger: Le logger pour enregistrer les opérations
+        journal: Le journal des mutations (synchronisé après chaque lot)
+        batch_size (int): Nombre d'événements déclenchant l'application d'un lot
+        batch_timeout (float): Délai maximal en secondes avant d'appliquer un lot incomplet
+        window (int): Nombre maximal de commandes en cours par connexion TCP
+        range_limit (int): Nombre maximal de lignes renvoyées par RANGE
+        sweeper: Le balayeur des connexions inactives (None : pas d'expiration)
+    """
+    def __init__(self, store, logger, journal=None, batch_size=1000, batch_timeout=0.005,
+                 window=1000, range_limit=1000, sweeper=None):
+        self.store = store
+        self.logger = logger
+        self.journal = journal
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.window = window
+        self.range_limit = range_limit
+        self.sweeper = sweeper
+        # Lot en cours : clé -> timestamp, et futur commun aux ADD de ce lot
+        self.pending = {}
+        self.pending_events = 0
+        self.applied = None
+        self.events = 0
+        self.invalid = 0
+        self.batches = 0
+        self.queries = 0
+        self._timer = None
+        self._tcp = None
+        self._udp = None
+        self._sweeping = None
+        # Connexions TCP ouvertes (tâche -> flux d'écriture)
+        self._clients = {}
+
+    async def start(self, host="127.0.0.1", port=9999, udp_port=None):
+        """
+        Démarre l'écoute TCP (port) et UDP (udp_port, par défaut le même numéro).
+        Le port 0 choisit un port libre : voir tcp_address / udp_address.
+        """
+        loop = asyncio.get_running_loop()
+        self._tcp = await asyncio.start_server(self._handle_tcp, host, port)
+        if udp_port is None:
+            udp_port = self.tcp_address[1]
+        self._udp, _ = await loop.create_datagram_endpoint(lambda: _UDPProtocol(self),
+                                                            local_addr=(host, udp_port))
+        if self.sweeper is not None:
+            self._sweeping = asyncio.create_task(self._sweep_loop())
+
+    @property
+    def tcp_address(self):
+        return self._tcp.sockets[0].getsockname()[:2]
+
+    @property
+    def udp_address(self):
+        return self._udp.get_extra_info("sockname")[:2]
+
+    async def close(self):
+        """
+        Arrête l'écoute, ferme les connexions après leurs dernières réponses
+        et applique les événements encore en attente.
+        """
+        if self._udp is not None:
+            self._udp.close()
+        if self._tcp is not None:
+            self._tcp.close()
+        if self._sweeping is not None:
+            self._sweeping.cancel()
+            await asyncio.gather(self._sweeping, return_exceptions=True)
+            self._sweeping = None
+        self.apply()
+        for writer in self._clients.values():
+            writer.transport.close()
+        await asyncio.gather(*self._clients, return_exceptions=True)
+        if self._tcp is not None:
+            await self._tcp.wait_closed()
+
+    # Regroupement des événements
+
+    def submit(self, key, ts):
+        """
+        Ajoute un événement au lot en cours.
+
+        Returns:
+            Le futur (commun à tout le lot) résolu une fois le lot appliqué
+        """
+        add_to_batch(self.pending, key, ts)
+        self.pending_events += 1
+        self.events += 1
+        if self.applied is None:
+            self.applied = asyncio.get_running_loop().create_future()
+        future = self.applied
+        if self.pending_events >= self.batch_size:
+            self.apply()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.batch_timeout, self.apply)
+        return future
+
+    def apply(self):
+        """
+        Applique le lot en cours à l'arbre et répond aux ADD qui l'attendaient.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self.pending_events:
+            return
+        batch, applied = self.pending, self.applied
+        self.pending = {}
+        self.applied = None
+        self.pending_events = 0
+        inserted, refreshed = self.store.upsert_many(batch)
+        if self.journal is not None:
+            self.journal.sync()
+        self.batches += 1
+        self.logger.log_connections_batch(inserted, refreshed)
+        applied.set_result("OK")
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweeper.next_delay())
+            self.apply()
+            self.sweeper.sweep()
+
+    # Commandes
+
+    def dispatch(self, line, udp=False):
+        """
+        Exécute une ligne de commande.
+
+        Returns:
+            La réponse (str), un futur pour un ADD, ou None pour un ADD UDP
+            (sans réponse) ou une ligne vide
+        """
+        line = line.strip()
+        if not line:
+            return None
+        command, _, argument = line.partition(' ')
+        command = command.upper()
+        if command not in COMMANDS:
+            command, argument = "ADD", line
+        try:
+            if command == "ADD":
+                key, ts = parse_event(argument)
+                future = self.submit(key, ts)
+                return None if udp else future
+
+            self.queries += 1
+            # Lecture de ses propres écritures : le lot en attente est appliqué d'abord
+            self.apply()
+            if command == "SEARCH":
+                key = ip_key(argument.strip())
+                ts = self.store.get(key)
+                if ts is None:
+                    return f"NOTFOUND {argument.strip()}"
+                return f"FOUND {_format_entry(key, ts)}"
+            if command == "LEN":
+                return f"LEN {len(self.store)}"
+            if command == "STATS":
+                return "STATS " + json.dumps(self.stats())
+            requete, _, limit = argument.strip().partition(' ')
+            lo, hi = parse_range(requete)
+            if command == "COUNT":
+                return f"COUNT {self.store.count_between(lo, hi)}"
+            limit = min(int(limit), self.range_limit) if limit else self.range_limit
+            lines = [_format_entry(key, ts) for key, ts in islice(self.store.range(lo, hi), limit)]
+            return "\n".join([f"RANGE {len(lines)}"] + lines + ["END"])
+        except ValueError as exc:
+            self.invalid += 1
+            return f"ERR {exc}"
+
+    async def _handle_tcp(self, reader, writer):
+        # Les réponses partent dans l'ordre des commandes ; la file bornée
+        # limite le nombre de commandes en cours sur la connexion
+        responses = asyncio.Queue(maxsize=self.window)
+        sender = asyncio.create_task(self._send_responses(responses, writer))
+        task = asyncio.current_task()
+        self._clients[task] = writer
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = self.dispatch(line.decode(errors="replace"))
+                if response is not None:
+                    await responses.put(response)
+        except (ConnectionError, ValueError):
+            # Déconnexion brutale ou ligne plus longue que la limite du flux
+            pass
+        finally:
+            await responses.put(None)
+            await sender
+            writer.close()
+            del self._clients[task]
+
+    async def _send_responses(self, responses, writer):
+        # Après une déconnexion, les réponses restantes sont consommées sans
+        # être envoyées, pour ne jamais bloquer le lecteur sur une file pleine
+        connected = True
+        while True:
+            response = await responses.get()
+            if response is None:
+                break
+            if not isinstance(response, str):
+                response = await response
+            if not connected:
+                continue
+            try:
+                writer.write((response + "\n").encode())
+                if responses.empty():
+                    await writer.drain()
+            except ConnectionError:
+                connected = False
+
+    def stats(self):
+        # Relevé d'instrumentation complété des compteurs du serveur
+        data = instrumentation.snapshot(self.store, None, self.logger, self.sweeper)
+        data["server"] = {"events": self.events, "invalid": self.invalid,
+                          "batches": self.batches, "queries": self.queries}
+        return data
+
+    def log_stats(self):
+        self.logger.log_server_stats(self.events, self.invalid, self.batches, self.queries)
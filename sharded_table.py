@@ -0,0 +1,254 @@
+"""
+Table de connexions répartie sur plusieurs processus.
+
+L'espace IPv4 est découpé en N plages contiguës de même taille (à une
+adresse près), N quelconque ; quand N = 2^k, chaque plage est exactement
+un préfixe /k. Chaque plage est confiée à un processus qui possède son
+propre AVLTree. Le processus
+principal regroupe les requêtes par shard et les envoie par lots sur un
+tube (multiprocessing.Pipe) : clés et timestamps voyagent sous forme de
+tableaux array.array, sérialisés d'un bloc.
+
+Les requêtes qui concernent plusieurs shards sont envoyées à tous avant
+d'attendre la première réponse, pour que les shards travaillent en
+parallèle. Une requête de plage ou de sous-réseau n'est envoyée qu'aux
+shards qui la recouvrent ; comme les plages sont contiguës et ordonnées,
+la concaténation de leurs réponses est déjà triée.
+"""
+from array import array
+from bisect import bisect_left
+import multiprocessing
+
+from avl import (AVLTree, ip_to_int, parse_cidr, Connexion, read_connexions,
+                 write_connexions, is_strictly_sorted, sorted_unique, newest_per_key)
+from avl_pool import KEY_TYPECODE
+
+KEY_SPACE = 1 << 32
+
+
+def _serve(conn):
+    # Boucle d'un processus shard : une requête (opération, arguments) par message
+    avl = AVLTree()
+    root = None
+    while True:
+        op, args = conn.recv()
+        try:
+            if op == "stop":
+                conn.send(("ok", None))
+                return
+            elif op == "upsert":
+                # Lot dédoublonné comme dans AVLTree.insert_many (timestamp le plus récent)
+                batch = newest_per_key(zip(*args))
+                root, inserted, refreshed = avl._upsert_many(root, batch)
+                result = (inserted, refreshed)
+            elif op == "search":
+                result = []
+                for key in args:
+                    node = avl._find(root, key)
+                    result.append(None if node is None else node.ts)
+            elif op == "delete":
+                before = len(avl) if root is not None else 0
+                for key in args:
+                    root = avl.delete(root, key)
+                result = before - (len(avl) if root is not None else 0)
+            elif op == "range":
+                lo, hi = args
+                keys = array(KEY_TYPECODE)
+                stamps = array('d')
+                for node in avl._iter_nodes(root, start=lo):
+                    if node.key > hi:
+                        break
+                    keys.append(node.key)
+                    stamps.append(node.ts)
+                result = (keys, stamps)
+            elif op == "count_between":
+                result = avl.count_between(root, *args)
+            elif op == "len":
+                result = len(avl) if root is not None else 0
+            elif op == "nettoyage":
+                root, ips = avl.nettoyage(root, args)
+                result = ips
+            elif op == "load":
+                keys, stamps = args
+                avl.expiry.rebuild(zip(stamps, keys))
+                root = avl.build_from_sorted(keys, stamps)
+                result = len(keys)
+            else:
+                raise ValueError(f"Opération inconnue: {op}")
+        except Exception as exc:
+            conn.send(("error", exc))
+        else:
+            conn.send(("ok", result))
+
+
+class ShardedTable:
+    """
+    Table de connexions répartie par plages d'IP sur plusieurs processus.
+
+    Args:
+        shards (int): Nombre de processus et de plages d'IP (nombre de
+            processeurs par défaut ; une puissance de 2 aligne les plages
+            sur des préfixes)
+    """
+    def __init__(self, shards=None):
+        self.shards = shards or multiprocessing.cpu_count()
+        # Borne basse de chaque plage ; la clé k appartient au shard (k * N) >> 32
+        self.bounds = [-(-(i * KEY_SPACE) // self.shards) for i in range(self.shards)] + [KEY_SPACE]
+        self.conns = []
+        self.processes = []
+        for i in range(self.shards):
+            parent_conn, child_conn = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_serve, args=(child_conn,),
+                                              name=f"shard-{i}", daemon=True)
+            process.start()
+            child_conn.close()
+            self.conns.append(parent_conn)
+            self.processes.append(process)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return sum(self._broadcast("len", range(self.shards)))
+
+    def shard_of(self, key):
+        return key * self.shards >> 32
+
+    def _shards_between(self, lo, hi):
+        return range(self.shard_of(lo), self.shard_of(hi) + 1)
+
+    def _broadcast(self, op, shards, args=None):
+        # Envoie la requête à chaque shard (args : valeur commune ou dict shard -> arguments)
+        # puis collecte les réponses dans le même ordre
+        shards = list(shards)
+        for i in shards:
+            self.conns[i].send((op, args[i] if isinstance(args, dict) else args))
+        results = []
+        error = None
+        for i in shards:
+            status, result = self.conns[i].recv()
+            if status == "error" and error is None:
+                error = result
+            results.append(result)
+        if error is not None:
+            raise error
+        return results
+
+    def _split(self, keys):
+        # Regroupe les positions des clés par shard
+        groups = {}
+        for position, key in enumerate(keys):
+            groups.setdefault(key * self.shards >> 32, []).append(position)
+        return groups
+
+    # Écritures
+
+    def insert(self, connexion):
+        return self.insert_many([connexion])
+
+    def insert_many(self, connexions):
+        """
+        Insère ou rafraîchit un lot de connexions, réparti entre les shards.
+        Renvoie (nb insérées, nb rafraîchies).
+        """
+        batches = {}
+        shards = self.shards
+        for connexion in connexions:
+            key = connexion.key
+            keys, stamps = batches.setdefault(key * shards >> 32, (array(KEY_TYPECODE), array('d')))
+            keys.append(key)
+            stamps.append(connexion.timestamp.timestamp())
+        results = self._broadcast("upsert", batches, batches)
+        return sum(r[0] for r in results), sum(r[1] for r in results)
+
+    def delete(self, ip):
+        return self.delete_many([ip]) == 1
+
+    def delete_many(self, ips):
+        # Renvoie le nombre de connexions effectivement supprimées
+        keys = [ip if isinstance(ip, int) else ip_to_int(ip) for ip in ips]
+        groups = self._split(keys)
+        args = {i: [keys[p] for p in positions] for i, positions in groups.items()}
+        return sum(self._broadcast("delete", groups, args))
+
+    def nettoyage(self, seuil_minutes):
+        # Nettoyage simultané de tous les shards ; IP supprimées triées
+        ips = []
+        for result in self._broadcast("nettoyage", range(self.shards), seuil_minutes):
+            ips.extend(result)
+        return ips
+
+    def load_from_file(self, filename):
+        try:
+            keys, stamps = read_connexions(filename)
+        except FileNotFoundError:
+            return 0
+        if not is_strictly_sorted(keys):
+            keys, stamps = sorted_unique(keys, stamps)
+
+        # Clés triées : chaque shard reçoit une tranche contiguë
+        cuts = [bisect_left(keys, bound) for bound in self.bounds]
+        args = {i: (array(KEY_TYPECODE, keys[cuts[i]:cuts[i + 1]]), array('d', stamps[cuts[i]:cuts[i + 1]]))
+                for i in range(self.shards)}
+        return sum(self._broadcast("load", range(self.shards), args))
+
+    # Lectures
+
+    def search(self, ip):
+        return self.search_many([ip])[0]
+
+    def search_many(self, ips):
+        # Recherche groupée : une seule requête par shard concerné
+        keys = [ip if isinstance(ip, int) else ip_to_int(ip) for ip in ips]
+        groups = self._split(keys)
+        args = {i: [keys[p] for p in positions] for i, positions in groups.items()}
+        found = [None] * len(keys)
+        for positions, stamps in zip(groups.values(), self._broadcast("search", groups, args)):
+            for position, ts in zip(positions, stamps):
+                if ts is not None:
+                    found[position] = Connexion.from_key(keys[position], ts)
+        return found
+
+    def _range_columns(self, lo, hi):
+        shards = self._shards_between(lo, hi)
+        return self._broadcast("range", shards, (lo, hi))
+
+    def iter_range(self, lo, hi):
+        lo = lo if isinstance(lo, int) else ip_to_int(lo)
+        hi = hi if isinstance(hi, int) else ip_to_int(hi)
+        if lo > hi:
+            return
+        from_key = Connexion.from_key
+        for keys, stamps in self._range_columns(lo, hi):
+            for key, ts in zip(keys, stamps):
+                yield from_key(key, ts)
+
+    def iter_subnet(self, cidr):
+        return self.iter_range(*parse_cidr(cidr))
+
+    def inorder(self):
+        return list(self.iter_range(0, KEY_SPACE - 1))
+
+    def count_between(self, lo, hi):
+        lo = lo if isinstance(lo, int) else ip_to_int(lo)
+        hi = hi if isinstance(hi, int) else ip_to_int(hi)
+        if lo > hi:
+            return 0
+        return sum(self._broadcast("count_between", self._shards_between(lo, hi), (lo, hi)))
+
+    def save_to_file(self, filename):
+        columns = self._range_columns(0, KEY_SPACE - 1)
+        write_connexions(filename, ((key, ts) for keys, stamps in columns for key, ts in zip(keys, stamps)))
+
+    def close(self):
+        if not self.processes:
+            return
+        self._broadcast("stop", range(self.shards))
+        for process, conn in zip(self.processes, self.conns):
+            process.join()
+            conn.close()
+        self.processes = []
+        self.conns = []
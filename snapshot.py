@@ -0,0 +1,165 @@
+"""
+Format binaire d'instantané des connexions.
+
+En-tête (20 octets, petit-boutiste) :
+    magic    4 octets  b"AVLS"
+    version  uint16
+    taille   uint16    taille d'un enregistrement (12)
+    nombre   uint64    nombre d'enregistrements
+    crc32    uint32    somme de contrôle des enregistrements
+
+Enregistrements de taille fixe, triés par clé croissante :
+    clé        uint32   adresse IPv4
+    timestamp  float64  dernière activité (epoch)
+
+Le fichier peut être projeté en mémoire (mmap) et interrogé par recherche
+dichotomique sans être chargé entièrement (SnapshotReader).
+"""
+import mmap
+import os
+import struct
+import zlib
+
+from avl import Connexion, ip_to_int, parse_cidr, replace_durably
+
+MAGIC = b"AVLS"
+VERSION = 1
+HEADER = struct.Struct('<4sHHQI')
+RECORD = struct.Struct('<Id')
+KEY = struct.Struct('<I')
+
+
+def write_snapshot(filename, entries):
+    """
+    Écrit des couples (clé, timestamp epoch), déjà triés par clé, dans un
+    instantané binaire (fichier temporaire synchronisé sur disque puis
+    remplacement atomique) : le journal peut être vidé dès le retour.
+
+    Returns:
+        int: Nombre d'enregistrements écrits
+    """
+    tmp_filename = filename + ".tmp"
+    pack = RECORD.pack
+    count = 0
+    crc = 0
+    with open(tmp_filename, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, 0, 0))
+        chunk = []
+        for key, ts in entries:
+            chunk.append(pack(key, ts))
+            if len(chunk) == 4096:
+                data = b"".join(chunk)
+                crc = zlib.crc32(data, crc)
+                f.write(data)
+                count += len(chunk)
+                chunk = []
+        data = b"".join(chunk)
+        crc = zlib.crc32(data, crc)
+        f.write(data)
+        count += len(chunk)
+        # En-tête définitif une fois le nombre et la somme de contrôle connus
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, count, crc))
+        f.flush()
+        os.fsync(f.fileno())
+    replace_durably(tmp_filename, filename)
+    return count
+
+
+def _check_header(data, filename):
+    if len(data) < HEADER.size:
+        raise ValueError(f"Instantané tronqué: {filename}")
+    magic, version, record_size, count, crc = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"Fichier non reconnu comme instantané: {filename}")
+    if version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"Version d'instantané non prise en charge: {filename}")
+    if len(data) != HEADER.size + count * RECORD.size:
+        raise ValueError(f"Instantané tronqué: {filename}")
+    return count, crc
+
+
+def read_snapshot(filename):
+    """
+    Lit un instantané binaire complet et vérifie sa somme de contrôle.
+    Renvoie deux listes parallèles (clés, timestamps epoch).
+    Lève FileNotFoundError si le fichier n'existe pas, ValueError s'il est invalide.
+    """
+    with open(filename, 'rb') as f:
+        data = f.read()
+    count, crc = _check_header(data, filename)
+    records = memoryview(data)[HEADER.size:]
+    if zlib.crc32(records) != crc:
+        raise ValueError(f"Somme de contrôle invalide: {filename}")
+    keys = []
+    stamps = []
+    for key, ts in RECORD.iter_unpack(records):
+        keys.append(key)
+        stamps.append(ts)
+    return keys, stamps
+
+
+class SnapshotReader:
+    """
+    Accès en lecture à un instantané binaire projeté en mémoire : recherche
+    et parcours de plage par dichotomie, sans charger le fichier.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.count, self.crc = _check_header(self.mm, filename)
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.mm.close()
+
+    def verify(self):
+        # Vérification complète (lecture de tout le fichier) de la somme de contrôle
+        return zlib.crc32(memoryview(self.mm)[HEADER.size:]) == self.crc
+
+    def key_at(self, i):
+        return KEY.unpack_from(self.mm, HEADER.size + i * RECORD.size)[0]
+
+    def record(self, i):
+        return RECORD.unpack_from(self.mm, HEADER.size + i * RECORD.size)
+
+    def bisect_left(self, key):
+        # Indice du premier enregistrement de clé >= key
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def search(self, ip):
+        key = ip if isinstance(ip, int) else ip_to_int(ip)
+        i = self.bisect_left(key)
+        if i < self.count:
+            found, ts = self.record(i)
+            if found == key:
+                return Connexion.from_key(found, ts)
+        return None
+
+    def iter_range(self, lo, hi):
+        lo = lo if isinstance(lo, int) else ip_to_int(lo)
+        hi = hi if isinstance(hi, int) else ip_to_int(hi)
+        for i in range(self.bisect_left(lo), self.count):
+            key, ts = self.record(i)
+            if key > hi:
+                return
+            yield Connexion.from_key(key, ts)
+
+    def iter_subnet(self, cidr):
+        return self.iter_range(*parse_cidr(cidr))
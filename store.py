@@ -0,0 +1,245 @@
+"""
+Interface commune des stockages de connexions (backends).
+
+Un ConnectionStore possède ses données : contrairement aux moteurs
+(AVLTree, BalanceAVLTree...), aucune racine ne circule entre l'appelant et
+le stockage. Il associe à chaque IP (clé entière) le timestamp epoch de sa
+dernière activité et offre les opérations de base :
+
+    upsert(key, ts)           insère ou rafraîchit une connexion
+    upsert_many(batch)        applique un lot {clé: timestamp}
+    remove(key)               supprime une connexion
+    get(key)                  timestamp d'une connexion, None si absente
+    iter_sorted(start)        couples (clé, timestamp) par IP croissante
+    range(lo, hi)             couples (clé, timestamp) d'une plage d'IP
+    count_between(lo, hi)     nombre de connexions d'une plage d'IP
+    select(k)                 k-ième couple dans l'ordre des IP
+    expire(cutoff, deadline)  suppression des connexions plus anciennes que cutoff
+    snapshot(filename)        écriture d'un instantané (format de write_connexions)
+    load(filename)            chargement d'un instantané
+
+Les opérations des menus (insert, delete, search, nettoyage, iter_range...)
+sont construites sur cette interface dans ConnectionStore. Toute mutation
+est journalisée si un journal (journal.Journal) est attaché.
+
+AVLStore, implémentation de référence, enveloppe un moteur AVL et sa
+racine ; block_store.BlockStore est l'alternative en tableaux triés par blocs.
+"""
+from itertools import islice
+import time
+
+from avl import AVLTree, Connexion, ip_to_int, int_to_ip, parse_cidr
+
+
+class ConnectionStore:
+    # Nom du stockage (option --engine)
+    name = None
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def upsert(self, key, ts):
+        """
+        Insère une connexion ou remplace le timestamp d'une IP présente.
+
+        Returns:
+            bool: True si l'IP était absente
+        """
+        raise NotImplementedError
+
+    def upsert_many(self, batch):
+        """
+        Applique un lot de connexions ; un timestamp existant n'est jamais
+        remplacé par un plus ancien.
+
+        Args:
+            batch (dict): clé -> timestamp epoch (le dictionnaire est consommé)
+
+        Returns:
+            tuple: (nb insérées, nb rafraîchies) ; une IP du lot déjà présente
+            compte comme rafraîchie, que son timestamp soit remplacé ou non
+        """
+        raise NotImplementedError
+
+    def remove(self, key):
+        """
+        Supprime une connexion.
+
+        Returns:
+            bool: True si l'IP était présente
+        """
+        raise NotImplementedError
+
+    def get(self, key):
+        """Renvoie le timestamp epoch de l'IP, ou None si elle est absente."""
+        raise NotImplementedError
+
+    def iter_sorted(self, start=None):
+        """
+        Parcours paresseux des couples (clé, timestamp) par IP croissante,
+        à partir de la clé start incluse. Le stockage ne doit pas être modifié
+        pendant le parcours.
+        """
+        raise NotImplementedError
+
+    def range(self, lo, hi):
+        # Couples dont la clé est comprise entre lo et hi (inclus), triés
+        for key, ts in self.iter_sorted(lo):
+            if key > hi:
+                return
+            yield key, ts
+
+    def count_between(self, lo, hi):
+        # Nombre de connexions dont la clé est comprise entre lo et hi (inclus)
+        return sum(1 for _ in self.range(lo, hi))
+
+    def select(self, k):
+        # k-ième couple (à partir de 0) dans l'ordre des IP, None hors bornes
+        if k < 0:
+            return None
+        return next(islice(self.iter_sorted(), k, None), None)
+
+    def expire(self, cutoff, deadline=None):
+        """
+        Supprime les connexions dont la dernière activité précède cutoff.
+        Si deadline (time.perf_counter()) est atteinte, s'arrête après au
+        moins une suppression.
+
+        Returns:
+            tuple: (clés supprimées, True si tout est traité)
+        """
+        raise NotImplementedError
+
+    def snapshot(self, filename):
+        """Écrit toutes les connexions (binaire si filename finit par .bin, texte sinon)."""
+        raise NotImplementedError
+
+    def load(self, filename):
+        """
+        Remplace le contenu par celui d'un instantané (vide si le fichier n'existe pas).
+
+        Returns:
+            int: Le nombre de connexions chargées
+        """
+        raise NotImplementedError
+
+    # Opérations des menus, construites sur l'interface
+
+    def insert(self, connexion):
+        self.upsert(connexion.key, connexion.timestamp.timestamp())
+
+    def delete(self, ip):
+        return self.remove(ip_key(ip))
+
+    def search(self, ip):
+        key = ip_key(ip)
+        ts = self.get(key)
+        if ts is None:
+            return None
+        return Connexion.from_key(key, ts)
+
+    def iter_inorder(self, start=None):
+        from_key = Connexion.from_key
+        for key, ts in self.iter_sorted(None if start is None else ip_key(start)):
+            yield from_key(key, ts)
+
+    def iter_range(self, lo, hi):
+        from_key = Connexion.from_key
+        for key, ts in self.range(ip_key(lo), ip_key(hi)):
+            yield from_key(key, ts)
+
+    def iter_subnet(self, cidr):
+        lo, hi = parse_cidr(cidr)
+        return self.iter_range(lo, hi)
+
+    def nettoyage(self, seuil_minutes):
+        # Renvoie les IP supprimées, triées
+        cles, _ = self.expire(time.time() - seuil_minutes * 60)
+        cles.sort()
+        return [int_to_ip(key) for key in cles]
+
+    def stats(self):
+        # Description de la structure (relevé d'instrumentation)
+        return {"backend": self.name, "connections": len(self)}
+
+
+def ip_key(ip):
+    # Accepte une IP sous forme de chaîne ou déjà convertie en entier
+    if isinstance(ip, int):
+        return ip
+    return ip_to_int(ip)
+
+
+class AVLStore(ConnectionStore):
+    """
+    Stockage de référence : un moteur AVL et la racine de son arbre.
+
+    Args:
+        avl: Le moteur (AVLTree par défaut, BalanceAVLTree ou PersistentAVLTree)
+    """
+    name = "avl"
+
+    def __init__(self, avl=None):
+        self.avl = AVLTree() if avl is None else avl
+        self.root = None
+
+    @property
+    def journal(self):
+        return self.avl.journal
+
+    @journal.setter
+    def journal(self, journal):
+        self.avl.journal = journal
+
+    def __len__(self):
+        return len(self.avl) if self.root is not None else 0
+
+    def upsert(self, key, ts):
+        before = len(self)
+        self.root = self.avl._insert(self.root, key, ts)
+        return len(self) > before
+
+    def upsert_many(self, batch):
+        self.root, inserted, refreshed = self.avl._upsert_many(self.root, batch)
+        return inserted, refreshed
+
+    def remove(self, key):
+        before = len(self)
+        self.root = self.avl._delete(self.root, key)
+        self.avl._compact_expiry(self.root)
+        return len(self) < before
+
+    def get(self, key):
+        node = self.avl._lookup(self.root, key)
+        return None if node is None else node.ts
+
+    def iter_sorted(self, start=None):
+        for node in self.avl._iter_nodes(self.root, start):
+            yield node.key, node.ts
+
+    def count_between(self, lo, hi):
+        return self.avl.count_between(self.root, lo, hi)
+
+    def select(self, k):
+        # Descente en O(log n) par les tailles de sous-arbres
+        node = self.avl._select_node(self.root, k)
+        if node is None:
+            return None
+        return node.key, node.ts
+
+    def expire(self, cutoff, deadline=None):
+        self.root, cles, complete = self.avl.expire(self.root, cutoff, deadline)
+        return cles, complete
+
+    def snapshot(self, filename):
+        self.avl.save_to_file(self.root, filename)
+
+    def load(self, filename):
+        self.root = self.avl.load_from_file(filename)
+        return len(self)
+
+    def stats(self):
+        data = ConnectionStore.stats(self)
+        data.update(engine=type(self.avl).__name__,
+                    height=self.root.height if self.root is not None else 0)
+        return data
@@ -0,0 +1,157 @@
+"""
+Expiration automatique des connexions inactives (balayeur TTL).
+
+Le balayeur supprime périodiquement les connexions dont la dernière
+activité remonte à plus de ttl_minutes. Chaque passage dispose d'un budget
+de temps : dès qu'il est épuisé, le passage s'arrête et les connexions
+restantes sont traitées au suivant, lancé sans attendre l'intervalle
+(next_delay()). Un passage ne bloque donc jamais
+l'ingestion ni les requêtes plus de quelques millisecondes, même quand un
+grand nombre de connexions expirent d'un coup (démarrage sur un vieil
+instantané, longue interruption du flux).
+
+Deux façons de l'utiliser :
+- sweep(root) depuis une boucle qui possède déjà l'arbre (ingestion en
+  flux, serveur asyncio), ou sweep() sur un stockage (store.ConnectionStore),
+  qui possède lui-même ses données ;
+- start(table) pour un thread de fond sur une ConnectionTable, ou
+  start(store, lock) sur un stockage protégé par un verrou RWLock (mode
+  interactif) : le passage n'a lieu que si le verrou d'écriture est libre,
+  sinon il est reporté à l'intervalle suivant.
+
+Chaque passage qui supprime des connexions produit une seule écriture de
+logs (résumé et IP supprimées) ; les compteurs (passages, connexions
+supprimées, durée) sont disponibles via stats().
+"""
+import threading
+import time
+
+from avl import int_to_ip
+from store import ConnectionStore
+
+
+class Sweeper:
+    """
+    Balayeur périodique des connexions inactives.
+
+    Args:
+        avl: Le moteur (AVLTree, PoolAVLTree ou PersistentAVLTree) ou un stockage
+            (store.ConnectionStore)
+        logger: Le logger pour enregistrer les passages
+        ttl_minutes (float): Durée d'inactivité au-delà de laquelle une connexion expire
+        budget (float): Durée maximale d'un passage en secondes (0 : sans limite)
+        interval (float): Secondes entre deux passages
+    """
+    def __init__(self, avl, logger, ttl_minutes, budget=0.005, interval=1.0):
+        self.avl = avl
+        self.logger = logger
+        self.ttl_minutes = ttl_minutes
+        self.budget = budget
+        self.interval = interval
+        self.runs = 0
+        self.skipped = 0
+        self.evicted = 0
+        self.last_evicted = 0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        # True si le dernier passage a tout traité (pas de retard accumulé)
+        self.complete = True
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sweep(self, root=None, budget=None):
+        """
+        Effectue un passage.
+
+        Args:
+            root: La racine de l'arbre (ignorée pour un stockage)
+            budget (float): Budget de ce passage (self.budget par défaut, 0 : sans limite)
+
+        Returns:
+            La nouvelle racine de l'arbre
+        """
+        if budget is None:
+            budget = self.budget
+        start = time.perf_counter()
+        deadline = start + budget if budget else None
+        cutoff = time.time() - self.ttl_minutes * 60
+        if isinstance(self.avl, ConnectionStore):
+            cles, self.complete = self.avl.expire(cutoff, deadline)
+        else:
+            root, cles, self.complete = self.avl.expire(root, cutoff, deadline)
+        duration = time.perf_counter() - start
+
+        self.runs += 1
+        self.evicted += len(cles)
+        self.last_evicted = len(cles)
+        self.last_duration = duration
+        if duration > self.max_duration:
+            self.max_duration = duration
+        if cles:
+            journal = getattr(self.avl, "journal", None)
+            if journal is not None:
+                # Un passage est journalisé d'un bloc, comme un micro-lot
+                journal.sync()
+            cles.sort()
+            self.logger.log_sweep([int_to_ip(key) for key in cles], self.ttl_minutes,
+                                  duration, self.complete)
+        return root
+
+    def next_delay(self):
+        # Retard accumulé : le passage suivant n'attend pas l'intervalle
+        return self.interval if self.complete else 0.0
+
+    def stats(self):
+        """
+        Renvoie les compteurs du balayeur.
+
+        Returns:
+            dict: passages, passages reportés, connexions supprimées (total et
+            dernier passage), durées du dernier passage et maximale, retard
+        """
+        return {
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "evicted": self.evicted,
+            "last_evicted": self.last_evicted,
+            "last_duration": self.last_duration,
+            "max_duration": self.max_duration,
+            "backlog": not self.complete,
+        }
+
+    # Thread de fond
+
+    def start(self, table, lock=None):
+        """
+        Lance les passages dans un thread de fond.
+
+        Args:
+            table: La ConnectionTable dont la racine est balayée, ou le stockage
+            lock: Le verrou RWLock du stockage (table.lock par défaut)
+        """
+        if lock is None:
+            lock = table.lock
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(table, lock), name="sweeper", daemon=True)
+        self._thread.start()
+
+    def _run(self, table, lock):
+        while not self._stop.wait(self.next_delay()):
+            # Jamais d'attente du verrou : une opération en cours reporte le passage
+            if not lock.acquire_write(blocking=False):
+                self.skipped += 1
+                continue
+            try:
+                if isinstance(table, ConnectionStore):
+                    self.sweep()
+                else:
+                    table.root = self.sweep(table.root)
+            finally:
+                lock.release_write()
+
+    def stop(self):
+        """Arrête le thread de fond après son passage en cours."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
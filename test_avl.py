@@ -1,8 +1,10 @@
 import unittest
-from avl import AVLTree, Connexion, AVLNode
+from avl import AVLTree, Connexion, AVLNode, ip_to_int, int_to_ip, parse_cidr
 from datetime import datetime, timedelta
 import time
 import os
+import random
+from recursive_avl import RecursiveAVLTree
 
 class TestConnexion(unittest.TestCase):
     """Tests pour la classe Connexion."""
@@ -21,6 +23,20 @@ class TestConnexion(unittest.TestCase):
         self.assertTrue(c1 < c2)
         self.assertFalse(c2 < c1)
     
+    def test_comparaison_numerique(self):
+        """Teste que les IP sont comparées numériquement et non comme chaînes."""
+        c1 = Connexion("10.0.0.9")
+        c2 = Connexion("10.0.0.10")
+        self.assertTrue(c1 < c2)
+        self.assertEqual(c1.key, ip_to_int("10.0.0.9"))
+        self.assertEqual(int_to_ip(c2.key), "10.0.0.10")
+
+    def test_ip_invalide(self):
+        """Teste le rejet des adresses IP invalides."""
+        for ip in ["122.323.22.2", "1.2.3", "a.b.c.d", "1.2.3.4.5", "", "1..2.3"]:
+            with self.assertRaises(ValueError):
+                Connexion(ip)
+
     def test_representation(self):
         """Teste la représentation textuelle d'une connexion."""
         ip = "192.168.1.1"
@@ -106,6 +122,85 @@ class TestAVLTree(unittest.TestCase):
         for i, connexion in enumerate(connexions):
             self.assertEqual(connexion.ip, ips_tries[i])
     
+    def test_parcours_paresseux(self):
+        """Teste le parcours paresseux depuis une clé, dans les deux sens."""
+        ips = [f"10.0.0.{i}" for i in range(1, 21)]
+        for ip in reversed(ips):
+            self.root = self.avl.insert(self.root, Connexion(ip))
+
+        self.assertEqual([c.ip for c in self.avl.iter_inorder(self.root)], ips)
+        self.assertEqual([c.ip for c in self.avl.iter_inorder(self.root, reverse=True)], ips[::-1])
+        self.assertEqual([c.ip for c in self.avl.iter_inorder(self.root, start="10.0.0.15")], ips[14:])
+        self.assertEqual([c.ip for c in self.avl.iter_inorder(self.root, start="10.0.0.5", reverse=True)],
+                         ips[4::-1])
+        # Clé absente : on commence à la suivante
+        self.assertEqual(next(self.avl.iter_inorder(self.root, start="10.0.0.0")).ip, "10.0.0.1")
+
+    def test_recherche_plage(self):
+        """Teste les requêtes par plage et par sous-réseau."""
+        ips = ["10.20.0.1", "10.20.255.254", "10.21.0.1", "10.19.255.255", "192.168.1.1"]
+        for ip in ips:
+            self.root = self.avl.insert(self.root, Connexion(ip))
+
+        self.assertEqual(parse_cidr("10.20.7.7/16"), (ip_to_int("10.20.0.0"), ip_to_int("10.20.255.255")))
+        self.assertEqual([c.ip for c in self.avl.iter_subnet(self.root, "10.20.0.0/16")],
+                         ["10.20.0.1", "10.20.255.254"])
+        self.assertEqual(len(list(self.avl.iter_subnet(self.root, "0.0.0.0/0"))), 5)
+        self.assertEqual(self.avl.count_between(self.root, "10.19.255.255", "10.21.0.1"), 4)
+        self.assertEqual(self.avl.count_between(self.root, "11.0.0.0", "12.0.0.0"), 0)
+        for cidr in ["10.0.0.0", "10.0.0.0/33", "10.0.0.0/x"]:
+            with self.assertRaises(ValueError):
+                parse_cidr(cidr)
+
+    def test_statistiques_ordre(self):
+        """Teste rank, select et les tailles de sous-arbres après insertions et suppressions."""
+        def verifier(node):
+            if node is None:
+                return 0
+            size = 1 + verifier(node.left) + verifier(node.right)
+            self.assertEqual(node.size, size)
+            return size
+
+        rng = random.Random(3)
+        keys = rng.sample(range(1 << 32), 300)
+        for key in keys:
+            self.root = self.avl.insert(self.root, Connexion(int_to_ip(key)))
+        for key in keys[:100]:
+            self.root = self.avl.delete(self.root, key)
+        verifier(self.root)
+
+        restantes = sorted(keys[100:])
+        self.assertEqual(self.root.size, 200)
+        for k in (0, 57, 199):
+            self.assertEqual(self.avl.select(self.root, k).key, restantes[k])
+            self.assertEqual(self.avl.rank(self.root, restantes[k]), k)
+        self.assertIsNone(self.avl.select(self.root, 200))
+        self.assertEqual(self.avl.count_between(self.root, restantes[10], restantes[20]), 11)
+        self.assertEqual(self.avl.count_between(self.root, restantes[20], restantes[10]), 0)
+
+    def test_representation_compacte(self):
+        """Teste les nœuds compacts et la construction des Connexion à la demande."""
+        connexion = Connexion("10.0.0.1")
+        self.root = self.avl.insert(self.root, connexion)
+        self.assertFalse(hasattr(self.root, '__dict__'))
+        self.assertFalse(hasattr(connexion, '__dict__'))
+        self.assertEqual(self.root.key, connexion.key)
+
+        # La connexion renvoyée est une copie : la modifier ne touche pas l'arbre
+        trouvee = self.avl.search(self.root, "10.0.0.1")
+        self.assertEqual(trouvee.timestamp, connexion.timestamp)
+        trouvee.timestamp = datetime.now() - timedelta(days=1)
+        self.assertEqual(self.avl.search(self.root, "10.0.0.1").timestamp, connexion.timestamp)
+
+    def test_taille(self):
+        """Teste le compteur de taille maintenu en O(1)."""
+        for ip in ["10.0.0.1", "10.0.0.2", "10.0.0.2", "10.0.0.3"]:
+            self.root = self.avl.insert(self.root, Connexion(ip))
+        self.assertEqual(len(self.avl), 3)
+        self.root = self.avl.delete(self.root, "10.0.0.2")
+        self.root = self.avl.delete(self.root, "10.0.0.9")
+        self.assertEqual(len(self.avl), 2)
+
     def test_nettoyage(self):
         """Teste le nettoyage des connexions inactives."""
         # Insertion de connexions avec des timestamps différents
@@ -135,6 +230,27 @@ class TestAVLTree(unittest.TestCase):
         self.assertIsNotNone(self.avl.search(self.root, ips[0]))
         self.assertIsNotNone(self.avl.search(self.root, ips[2]))
     
+    def test_nettoyage_index_expiration(self):
+        """Teste que l'index d'expiration suit les rafraîchissements et suppressions."""
+        ancien = datetime.now() - timedelta(minutes=30)
+        for i in range(1, 6):
+            connexion = Connexion(f"10.0.0.{i}")
+            connexion.timestamp = ancien
+            self.root = self.avl.insert(self.root, connexion)
+
+        # Rafraîchissement de 10.0.0.2 et suppression manuelle de 10.0.0.3
+        self.root = self.avl.insert(self.root, Connexion("10.0.0.2"))
+        self.root = self.avl.delete(self.root, "10.0.0.3")
+
+        self.root, ips_supprimees = self.avl.nettoyage(self.root, 5)
+        self.assertEqual(ips_supprimees, ["10.0.0.1", "10.0.0.4", "10.0.0.5"])
+        self.assertEqual([c.ip for c in self.avl.inorder(self.root)], ["10.0.0.2"])
+        self.assertEqual(len(self.avl.expiry) - self.avl.expiry.stale, 1)
+
+        # Un second nettoyage n'a plus rien à supprimer
+        self.root, ips_supprimees = self.avl.nettoyage(self.root, 5)
+        self.assertEqual(ips_supprimees, [])
+
     def test_sauvegarde_chargement(self):
         """Teste la sauvegarde et le chargement des connexions."""
         # Nom du fichier de test
@@ -166,6 +282,128 @@ class TestAVLTree(unittest.TestCase):
         # Nettoyage
         os.remove(filename)
 
+    def test_moteur_iteratif_identique(self):
+        """Teste que le moteur itératif produit les mêmes arbres que le moteur récursif."""
+        def forme(node):
+            if node is None:
+                return None
+            return (node.key, node.height, forme(node.left), forme(node.right))
+
+        rng = random.Random(7)
+        keys = rng.sample(range(1 << 32), 500)
+        reference = RecursiveAVLTree()
+        ref_root = None
+        for key in keys:
+            ref_root = reference.insert(ref_root, Connexion(int_to_ip(key)))
+            self.root = self.avl.insert(self.root, Connexion(int_to_ip(key)))
+        self.assertEqual(forme(self.root), forme(ref_root))
+
+        rng.shuffle(keys)
+        for key in keys[:300] + [12345]:
+            ref_root = reference.delete(ref_root, key)
+            self.root = self.avl.delete(self.root, key)
+            self.assertEqual(forme(self.root), forme(ref_root))
+
+    def test_parcours_ordre_numerique(self):
+        """Teste que le parcours inorder suit l'ordre numérique des IP."""
+        ips = ["10.0.0.10", "10.0.0.9", "9.255.255.255", "10.0.0.100"]
+        for ip in ips:
+            self.root = self.avl.insert(self.root, Connexion(ip))
+        ordre = [c.ip for c in self.avl.inorder(self.root)]
+        self.assertEqual(ordre, ["9.255.255.255", "10.0.0.9", "10.0.0.10", "10.0.0.100"])
+
+    def test_chargement_trie_equilibre(self):
+        """Teste la construction directe d'un arbre équilibré depuis un fichier trié."""
+        def verifier(node):
+            # Renvoie la hauteur en vérifiant hauteurs stockées et équilibre
+            if node is None:
+                return 0
+            hl, hr = verifier(node.left), verifier(node.right)
+            self.assertLessEqual(abs(hl - hr), 1)
+            self.assertEqual(node.height, 1 + max(hl, hr))
+            return node.height
+
+        filename = "test_connexions_triees.txt"
+        for i in range(1, 101):
+            self.root = self.avl.insert(self.root, Connexion(f"10.0.{i % 7}.{i}"))
+        self.avl.save_to_file(self.root, filename)
+        try:
+            new_avl = AVLTree()
+            new_root = new_avl.load_from_file(filename)
+            verifier(new_root)
+            self.assertEqual([c.ip for c in new_avl.inorder(new_root)],
+                             [c.ip for c in self.avl.inorder(self.root)])
+            self.assertEqual(len(new_avl.expiry), 100)
+
+            # Fichier non trié : même résultat que des insertions successives
+            with open(filename, 'w') as f:
+                f.write("10.0.0.2,2025-04-15T15:04:43\n10.0.0.1,2025-04-15T15:04:43\n")
+            new_root = AVLTree().load_from_file(filename)
+            verifier(new_root)
+            self.assertEqual([c.ip for c in self.avl.inorder(new_root)], ["10.0.0.1", "10.0.0.2"])
+
+            # IP en double : la dernière ligne l'emporte, même si elle est plus ancienne
+            with open(filename, 'w') as f:
+                f.write("10.0.0.1,2025-04-15T15:04:43\n10.0.0.2,2025-04-15T15:04:43\n"
+                        "10.0.0.1,2025-04-14T08:00:00\n")
+            new_avl = AVLTree()
+            new_root = new_avl.load_from_file(filename)
+            verifier(new_root)
+            self.assertEqual(new_avl.search(new_root, "10.0.0.1").timestamp,
+                             datetime(2025, 4, 14, 8, 0, 0))
+        finally:
+            os.remove(filename)
+
+    def test_insertion_par_lot(self):
+        """Teste l'insertion par lot avec dédoublonnage et rafraîchissement."""
+        def lot(ips, timestamp=None):
+            connexions = [Connexion(ip) for ip in ips]
+            for connexion in connexions:
+                connexion.timestamp = timestamp or connexion.timestamp
+            return connexions
+
+        ancien = datetime.now() - timedelta(minutes=30)
+        anciennes = [f"10.0.{i // 250}.{i % 250}" for i in range(1000)]
+        self.root, inserted, refreshed = self.avl.insert_many(None, lot(anciennes, ancien))
+        self.assertEqual((inserted, refreshed), (1000, 0))
+
+        # Petit lot : insertions individuelles, le timestamp le plus récent gagne
+        connexions = lot(["10.0.0.1", "10.9.0.1", "10.9.0.1"])
+        self.root, inserted, refreshed = self.avl.insert_many(self.root, connexions)
+        self.assertEqual((inserted, refreshed), (1, 1))
+        self.assertEqual(self.avl.search(self.root, "10.9.0.1").timestamp, connexions[2].timestamp)
+        self.assertGreater(self.avl.search(self.root, "10.0.0.1").timestamp, ancien)
+
+        # Un timestamp plus ancien ne remplace pas le courant
+        self.root, _, refreshed = self.avl.insert_many(self.root, lot(["10.9.0.1"], ancien))
+        self.assertEqual(refreshed, 1)
+        self.assertEqual(self.avl.search(self.root, "10.9.0.1").timestamp, connexions[2].timestamp)
+
+        # Gros lot : fusion et reconstruction
+        ips = [f"10.0.0.{i}" for i in range(2, 10)] + [f"10.1.{i // 250}.{i % 250}" for i in range(2000)]
+        self.root, inserted, refreshed = self.avl.insert_many(self.root, lot(ips))
+        self.assertEqual((inserted, refreshed), (2000, 8))
+        self.assertEqual(len(self.avl.inorder(self.root)), 3001)
+        self.assertEqual(len(self.avl), 3001)
+        self.assertTrue(abs(self.avl.balance_factor(self.root)) <= 1)
+
+        self.root, ips_supprimees = self.avl.nettoyage(self.root, 5)
+        self.assertEqual(len(ips_supprimees), 1000 - 9)
+        self.assertIsNotNone(self.avl.search(self.root, "10.0.0.9"))
+        self.assertIsNone(self.avl.search(self.root, "10.0.0.10"))
+
+    def test_chargement_ip_invalide(self):
+        """Teste que les lignes avec une IP invalide sont rejetées au chargement."""
+        filename = "test_connexions_invalides.txt"
+        with open(filename, 'w') as f:
+            f.write("10.0.0.1,2025-04-15T15:04:43.888537\n")
+            f.write("122.323.22.2,2025-04-15T15:04:43.888537\n")
+        try:
+            root = self.avl.load_from_file(filename)
+            self.assertEqual([c.ip for c in self.avl.inorder(root)], ["10.0.0.1"])
+        finally:
+            os.remove(filename)
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,87 @@
+import unittest
+import os
+import random
+import tempfile
+import time
+from avl import AVLTree, Connexion
+from avl_balance import BalanceAVLTree
+
+def verifier(testcase, node):
+    # Renvoie (hauteur, taille) du sous-arbre en vérifiant bal, size et l'ordre des clés
+    if node is None:
+        return 0, 0
+    hl, sl = verifier(testcase, node.left)
+    hr, sr = verifier(testcase, node.right)
+    testcase.assertEqual(node.bal, hl - hr)
+    testcase.assertIn(node.bal, (-1, 0, 1))
+    testcase.assertEqual(node.size, 1 + sl + sr)
+    if node.left is not None:
+        testcase.assertLess(node.left.key, node.key)
+    if node.right is not None:
+        testcase.assertGreater(node.right.key, node.key)
+    return 1 + max(hl, hr), 1 + sl + sr
+
+class TestBalanceAVLTree(unittest.TestCase):
+    """Tests pour le moteur AVL à facteur d'équilibre."""
+
+    def test_ordres_insertion(self):
+        """Teste les invariants après insertions croissantes, décroissantes et aléatoires."""
+        for keys in (list(range(500)), list(range(500, 0, -1)), random.Random(1).sample(range(10**6), 500)):
+            avl = BalanceAVLTree()
+            root = None
+            for key in keys:
+                root = avl._insert(root, key, time.time())
+            height, size = verifier(self, root)
+            self.assertEqual(size, len(keys))
+            self.assertEqual(root.height, height)
+            self.assertEqual([c.key for c in avl.inorder(root)], sorted(keys))
+
+    def test_suppressions_aleatoires(self):
+        """Teste insertions et suppressions mélangées face à AVLTree."""
+        rng = random.Random(7)
+        avl, reference = BalanceAVLTree(), AVLTree()
+        root = ref_root = None
+        for _ in range(3000):
+            key = rng.randrange(400)
+            if rng.random() < 0.6:
+                root = avl._insert(root, key, 1.0)
+                ref_root = reference._insert(ref_root, key, 1.0)
+            else:
+                root = avl._delete(root, key)
+                ref_root = reference._delete(ref_root, key)
+            verifier(self, root)
+        self.assertEqual(len(avl), len(reference))
+        self.assertEqual([c.key for c in avl.inorder(root)], [c.key for c in reference.inorder(ref_root)])
+        for k in range(len(avl)):
+            self.assertEqual(avl.select(root, k).key, reference.select(ref_root, k).key)
+
+    def test_lots_expiration_fichier(self):
+        """Teste lots, nettoyage et rechargement (arbre construit par build_from_sorted)."""
+        avl = BalanceAVLTree()
+        now = time.time()
+        root, inserted, _ = avl._upsert_many(None, {key: (now - 7200 if key % 2 else now)
+                                                    for key in range(1000)})
+        self.assertEqual(inserted, 1000)
+        verifier(self, root)
+        root, inserted, refreshed = avl._upsert_many(root, {5000: now, 2: now})
+        self.assertEqual((inserted, refreshed), (1, 1))
+        verifier(self, root)
+
+        root, ips = avl.nettoyage(root, 60)
+        self.assertEqual(len(ips), 500)
+        verifier(self, root)
+
+        fd, filename = tempfile.mkstemp(suffix=".bin")
+        os.close(fd)
+        try:
+            avl.save_to_file(root, filename)
+            other = BalanceAVLTree()
+            loaded = other.load_from_file(filename)
+            verifier(self, loaded)
+            self.assertEqual(len(other), 501)
+            self.assertIsNotNone(other.search(loaded, Connexion.from_key(5000, now).ip))
+        finally:
+            os.remove(filename)
+
+if __name__ == "__main__":
+    unittest.main()
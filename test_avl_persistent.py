@@ -0,0 +1,124 @@
+import unittest
+import os
+import random
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from avl import AVLTree, Connexion
+from avl_persistent import PersistentAVLTree
+from connection_table import ConnectionTable
+
+class TestPersistentAVLTree(unittest.TestCase):
+    """Tests pour la variante persistante (copie de chemin) de l'arbre AVL."""
+
+    def setUp(self):
+        self.avl = PersistentAVLTree()
+        self.root = None
+
+    def forme(self, node):
+        if node is None:
+            return None
+        return (node.key, node.height, node.size, self.forme(node.left), self.forme(node.right))
+
+    def contenu(self, root):
+        return [(c.key, c.timestamp) for c in self.avl.iter_inorder(root)]
+
+    def test_meme_arbre_que_avltree(self):
+        """Teste que les insertions et suppressions produisent les mêmes arbres qu'AVLTree."""
+        reference = AVLTree()
+        ref_root = None
+        rng = random.Random(3)
+        keys = rng.sample(range(1 << 32), 500)
+        for key in keys:
+            self.root = self.avl._insert(self.root, key, 1.0)
+            ref_root = reference._insert(ref_root, key, 1.0)
+        rng.shuffle(keys)
+        for key in keys[:300]:
+            self.root = self.avl.delete(self.root, key)
+            ref_root = reference.delete(ref_root, key)
+            self.assertEqual(len(self.avl), len(reference))
+        self.assertEqual(self.forme(self.root), self.forme(ref_root))
+
+    def test_anciennes_versions_intactes(self):
+        """Teste que chaque version reste inchangée après les mises à jour suivantes."""
+        rng = random.Random(8)
+        keys = rng.sample(range(1 << 32), 200)
+        versions = []
+        for key in keys:
+            self.root = self.avl._insert(self.root, key, float(key))
+            versions.append((self.root, self.contenu(self.root)))
+        for key in keys[::3]:
+            self.root = self.avl.delete(self.root, key)
+        for key in keys[1::3]:
+            self.root = self.avl._insert(self.root, key, 0.0)
+        for root, contenu in versions:
+            self.assertEqual(self.contenu(root), contenu)
+        self.assertEqual(self.forme(versions[-1][0])[2], 200)
+
+    def test_partage_de_structure(self):
+        """Teste qu'une mise à jour ne recopie que le chemin parcouru."""
+        for key in range(1000):
+            self.root = self.avl._insert(self.root, key, 0.0)
+        old_ids = {id(node) for node in self.avl._iter_nodes(self.root)}
+        new_root = self.avl._insert(self.root, 500, 1.0)
+        new_nodes = [node for node in self.avl._iter_nodes(new_root) if id(node) not in old_ids]
+        self.assertLessEqual(len(new_nodes), new_root.height)
+        self.assertEqual(self.avl.search(self.root, 500).timestamp, datetime.fromtimestamp(0.0))
+
+    def test_suppression_absente(self):
+        """Teste qu'une suppression sans effet renvoie la même version."""
+        self.root = self.avl.insert(self.root, Connexion("10.0.0.1"))
+        self.assertIs(self.avl.delete(self.root, "10.0.0.2"), self.root)
+        self.assertIsNone(self.avl.delete(self.root, "10.0.0.1"))
+        self.assertEqual(len(self.avl), 0)
+
+    def test_insert_many_et_nettoyage(self):
+        """Teste l'insertion par lot et le nettoyage sur une version."""
+        old = Connexion("10.0.0.1")
+        old.timestamp = datetime.now() - timedelta(minutes=30)
+        self.root, inserted, refreshed = self.avl.insert_many(None, [old, Connexion("10.0.0.2")])
+        self.assertEqual((inserted, refreshed), (2, 0))
+        self.root, inserted, refreshed = self.avl.insert_many(self.root, [old, Connexion("10.0.0.3")])
+        self.assertEqual((inserted, refreshed), (1, 1))
+        before = self.root
+        self.root, ips = self.avl.nettoyage(self.root, 10)
+        self.assertEqual(ips, ["10.0.0.1"])
+        self.assertEqual([c.ip for c in self.avl.inorder(self.root)], ["10.0.0.2", "10.0.0.3"])
+        self.assertEqual(len(self.avl.inorder(before)), 3)
+
+    def test_sauvegarde_chargement(self):
+        """Teste la sauvegarde et le rechargement."""
+        for i in range(100):
+            self.root = self.avl.insert(self.root, Connexion(f"10.0.{i}.1"))
+        fd, filename = tempfile.mkstemp(suffix=".bin")
+        os.close(fd)
+        try:
+            self.avl.save_to_file(self.root, filename)
+            other = PersistentAVLTree()
+            root = other.load_from_file(filename)
+            self.assertEqual([c.key for c in other.inorder(root)], [c.key for c in self.avl.inorder(self.root)])
+            self.assertEqual(len(other), 100)
+        finally:
+            os.remove(filename)
+
+    def test_table_lectures_sans_verrou(self):
+        """Teste qu'une table persistante se lit pendant qu'un rédacteur détient le verrou."""
+        table = ConnectionTable(PersistentAVLTree())
+        table.insert(Connexion("10.0.0.1"))
+        snapshot = table.snapshot()
+        table.lock.acquire_write()
+        try:
+            result = []
+            reader = threading.Thread(target=lambda: result.append(table.search("10.0.0.1")))
+            reader.start()
+            reader.join(5)
+            self.assertEqual(result[0].ip, "10.0.0.1")
+        finally:
+            table.lock.release_write()
+        table.insert(Connexion("10.0.0.2"))
+        self.assertEqual(len(table.avl.inorder(snapshot)), 1)
+        with self.assertRaises(TypeError):
+            ConnectionTable().snapshot()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import unittest
+import os
+import random
+from datetime import datetime, timedelta
+from avl import AVLTree, Connexion, int_to_ip
+from avl_pool import PoolAVLTree, NIL
+
+class TestPoolAVLTree(unittest.TestCase):
+    """Tests pour le moteur AVL à réserve de nœuds."""
+
+    def setUp(self):
+        """Initialise un arbre à réserve de nœuds et un AVLTree de référence."""
+        self.pool = PoolAVLTree()
+        self.root = None
+        self.reference = AVLTree()
+        self.ref_root = None
+
+    def forme_pool(self, node):
+        if node == NIL:
+            return None
+        return (self.pool.keys[node], self.pool.heights[node], self.pool.sizes[node],
+                self.forme_pool(self.pool.lefts[node]), self.forme_pool(self.pool.rights[node]))
+
+    def forme_ref(self, node):
+        if node is None:
+            return None
+        return (node.key, node.height, node.size, self.forme_ref(node.left), self.forme_ref(node.right))
+
+    def test_meme_arbre_que_avltree(self):
+        """Teste que les insertions et suppressions produisent les mêmes arbres qu'AVLTree."""
+        rng = random.Random(11)
+        keys = rng.sample(range(1 << 32), 400)
+        for key in keys:
+            self.root = self.pool.insert(self.root, Connexion(int_to_ip(key)))
+            self.ref_root = self.reference.insert(self.ref_root, Connexion(int_to_ip(key)))
+        rng.shuffle(keys)
+        for key in keys[:250]:
+            self.root = self.pool.delete(self.root, key)
+            self.ref_root = self.reference.delete(self.ref_root, key)
+        self.assertEqual(self.forme_pool(self.root), self.forme_ref(self.ref_root))
+        self.assertEqual(len(self.pool), 150)
+
+        # Les emplacements libérés sont réutilisés
+        taille = len(self.pool.keys)
+        for key in keys[:250]:
+            self.root = self.pool.insert(self.root, Connexion(int_to_ip(key)))
+        self.assertEqual(len(self.pool.keys), taille)
+
+    def test_recherche_et_parcours(self):
+        """Teste recherche, parcours, plages et statistiques d'ordre."""
+        ips = [f"10.0.0.{i}" for i in range(1, 31)]
+        for ip in reversed(ips):
+            self.root = self.pool.insert(self.root, Connexion(ip))
+
+        self.assertEqual(self.pool.search(self.root, "10.0.0.7").ip, "10.0.0.7")
+        self.assertIsNone(self.pool.search(self.root, "10.0.0.99"))
+        self.assertEqual([c.ip for c in self.pool.inorder(self.root)], ips)
+        self.assertEqual([c.ip for c in self.pool.iter_inorder(self.root, start="10.0.0.5", reverse=True)],
+                         ips[4::-1])
+        self.assertEqual([c.ip for c in self.pool.iter_subnet(self.root, "10.0.0.8/30")], ips[7:11])
+        self.assertEqual(self.pool.select(self.root, 9).ip, "10.0.0.10")
+        self.assertEqual(self.pool.count_between(self.root, "10.0.0.3", "10.0.0.12"), 10)
+
+        # Suppression de tous les nœuds : la racine redevient None
+        for ip in ips:
+            self.root = self.pool.delete(self.root, ip)
+        self.assertIsNone(self.root)
+
+    def test_nettoyage(self):
+        """Teste le nettoyage par balayage des timestamps."""
+        for i in range(1, 6):
+            connexion = Connexion(f"10.0.0.{i}")
+            if i % 2:
+                connexion.timestamp = datetime.now() - timedelta(minutes=10)
+            self.root = self.pool.insert(self.root, connexion)
+        self.root = self.pool.delete(self.root, "10.0.0.5")
+
+        self.root, ips_supprimees = self.pool.nettoyage(self.root, 5)
+        self.assertEqual(ips_supprimees, ["10.0.0.1", "10.0.0.3"])
+        self.assertEqual([c.ip for c in self.pool.inorder(self.root)], ["10.0.0.2", "10.0.0.4"])
+
+    def test_expiration_plus_anciennes_d_abord(self):
+        """Teste qu'une expiration interrompue supprime les plus anciennes, pas les premiers emplacements."""
+        now = datetime.now().timestamp()
+        # Emplacements dans l'ordre des clés, timestamps décroissants
+        for key in range(100):
+            self.root = self.pool._insert(NIL if self.root is None else self.root, key, now - 7200 + 100 - key)
+        self.pool.stamps[self.pool._find(self.root, 50)] = now
+        self.assertEqual(self.pool.expired_keys(now - 3600), list(range(99, 50, -1)) + list(range(49, -1, -1)))
+
+        self.root, cles, complete = self.pool.expire(self.root, now - 3600, deadline=0)
+        self.assertEqual((cles, complete), ([99], False))
+        self.root, cles, complete = self.pool.expire(self.root, now - 3600)
+        self.assertTrue(complete)
+        self.assertEqual(cles, list(range(98, 50, -1)) + list(range(49, -1, -1)))
+        self.assertEqual([c.key for c in self.pool.inorder(self.root)], [50])
+
+    def test_insertion_par_lot(self):
+        """Teste insert_many face à AVLTree : arbre vide, petit lot, puis gros lot (reconstruction)."""
+        ancien = datetime.now() - timedelta(minutes=30)
+
+        def lot(ips, timestamp=None):
+            connexions = [Connexion(ip) for ip in ips]
+            for connexion in connexions:
+                connexion.timestamp = timestamp or connexion.timestamp
+            return connexions
+
+        anciennes = [f"10.0.{i // 250}.{i % 250}" for i in range(1000)]
+        for ips, timestamp in ((anciennes, ancien), (["10.0.0.1", "10.9.9.9", "10.0.0.1"], None),
+                               (anciennes[:500] + [f"10.1.{i // 250}.{i % 250}" for i in range(2000)],
+                                ancien - timedelta(minutes=5))):
+            connexions = lot(ips, timestamp)
+            self.root, *pool_counts = self.pool.insert_many(self.root, connexions)
+            self.ref_root, *ref_counts = self.reference.insert_many(self.ref_root, connexions)
+            self.assertEqual(pool_counts, ref_counts)
+            self.assertEqual([(c.ip, c.timestamp) for c in self.pool.inorder(self.root)],
+                             [(c.ip, c.timestamp) for c in self.reference.inorder(self.ref_root)])
+        self.assertEqual(len(self.pool), 3001)
+
+    def test_sauvegarde_chargement(self):
+        """Teste la compatibilité du format de fichier avec AVLTree."""
+        filename = "test_connexions_pool.txt"
+        for i in range(50):
+            self.ref_root = self.reference.insert(self.ref_root, Connexion(f"192.168.{i % 3}.{i}"))
+        self.reference.save_to_file(self.ref_root, filename)
+        try:
+            self.root = self.pool.load_from_file(filename)
+            self.assertEqual(len(self.pool), 50)
+            self.assertEqual([(c.ip, c.timestamp) for c in self.pool.inorder(self.root)],
+                             [(c.ip, c.timestamp) for c in self.reference.inorder(self.ref_root)])
+            self.pool.save_to_file(self.root, filename)
+            new_avl = AVLTree()
+            new_root = new_avl.load_from_file(filename)
+            self.assertEqual(len(new_avl.inorder(new_root)), 50)
+        finally:
+            os.remove(filename)
+
+
+if __name__ == "__main__":
+    unittest.main()
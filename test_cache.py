@@ -0,0 +1,214 @@
+import unittest
+import os
+import tempfile
+import time
+from avl import AVLTree, NodeCache
+from avl_balance import BalanceAVLTree
+from store import AVLStore
+
+def trouver_noeud(root, key):
+    # Descente directe, sans le cache
+    node = root
+    while node is not None and node.key != key:
+        node = node.left if key < node.key else node.right
+    return node
+
+class Noeud:
+    def __init__(self, key):
+        self.key = key
+
+class TestNodeCache(unittest.TestCase):
+    """Tests pour le cache CLOCK clé -> nœud."""
+
+    def test_admission(self):
+        """Teste qu'une clé n'entre qu'à son deuxième défaut récent."""
+        cache = NodeCache(8)
+        node = Noeud(1)
+        cache.put(1, node)
+        self.assertIsNone(cache.get(1))
+        cache.put(1, node)
+        self.assertIs(cache.get(1), node)
+
+        # Le filtre oublie les clés après capacity défauts d'autres clés
+        cache.put(2, Noeud(2))
+        for key in range(100, 108):
+            cache.put(key, Noeud(key))
+        cache.put(2, Noeud(2))
+        self.assertIsNone(cache.get(2))
+
+    def test_capacite_bornee(self):
+        """Teste que le cache ne dépasse jamais sa capacité."""
+        cache = NodeCache(8)
+        for key in range(100):
+            node = Noeud(key)
+            cache.put(key, node)
+            cache.put(key, node)
+            self.assertLessEqual(len(cache), 8)
+        self.assertEqual(cache.stats()["evictions"], 92)
+
+    def test_clock_garde_les_entrees_consultees(self):
+        """Teste qu'une entrée consultée survit au passage de l'aiguille."""
+        cache = NodeCache(4)
+        for key in range(4):
+            cache.put(key, Noeud(key))
+            cache.put(key, Noeud(key))
+        cache.get(0)
+        cache.put(10, Noeud(10))
+        cache.put(10, Noeud(10))
+        self.assertIsNotNone(cache.get(0))
+        self.assertIsNone(cache.get(1))
+        self.assertIsNotNone(cache.get(10))
+
+
+class TestAVLTreeCache(unittest.TestCase):
+    """Tests du cache des IP fréquentes sur AVLTree."""
+
+    engine = AVLTree
+
+    def setUp(self):
+        self.avl = self.engine(cache_size=16)
+        self.root = None
+        self.now = time.time()
+        for key in range(1, 101):
+            self.root = self.avl._insert(self.root, key, self.now)
+
+    def consulter(self, key):
+        # Deux recherches : la clé passe le filtre d'admission
+        self.avl.search(self.root, key)
+        self.avl.search(self.root, key)
+
+    def verifier_cache(self):
+        # Toute entrée du cache désigne le nœud de l'arbre portant sa clé
+        for key, position in self.avl.cache.positions.items():
+            self.assertIs(self.avl.cache.nodes[position], trouver_noeud(self.root, key))
+
+    def test_succes_et_defauts(self):
+        """Teste les compteurs de succès et de défauts de search."""
+        # Les insertions de setUp (sauf la première, arbre vide) sont des défauts
+        self.assertEqual(self.avl.cache.misses, 99)
+        self.avl.cache.misses = 0
+        self.assertIsNone(self.avl.search(self.root, 1000))
+        for _ in range(4):
+            self.assertEqual(self.avl.search(self.root, 42).key, 42)
+        stats = self.avl.cache.stats()
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 3)
+        self.assertEqual(stats["size"], 1)
+        self.assertAlmostEqual(stats["hit_ratio"], 0.4)
+
+    def test_rafraichissement_par_le_cache(self):
+        """Teste qu'un rafraîchissement via le cache met à jour l'arbre et l'expiration."""
+        self.consulter(7)
+        self.root = self.avl._insert(self.root, 7, self.now + 60)
+        self.assertEqual(trouver_noeud(self.root, 7).ts, self.now + 60)
+        self.assertEqual(self.avl.cache.stats()["hits"], 1)
+        self.root, cles, _ = self.avl.expire(self.root, self.now + 1)
+        self.assertNotIn(7, cles)
+        self.assertEqual(len(cles), 99)
+        self.assertEqual([c.key for c in self.avl.inorder(self.root)], [7])
+
+    def test_invalidation_suppression(self):
+        """Teste qu'une IP supprimée n'est plus trouvée par le cache."""
+        self.consulter(5)
+        self.root = self.avl.delete(self.root, 5)
+        self.assertIsNone(self.avl.search(self.root, 5))
+        self.root = self.avl._insert(self.root, 5, self.now + 1)
+        self.assertAlmostEqual(self.avl.search(self.root, 5).timestamp.timestamp(), self.now + 1, places=3)
+        self.verifier_cache()
+
+    def test_suppression_deux_enfants(self):
+        """Teste le successeur en cache quand ses données sont copiées dans un autre nœud."""
+        victime = self.root.key
+        self.assertIsNotNone(self.root.left)
+        self.assertIsNotNone(self.root.right)
+        successeur = victime + 1
+        for key in range(1, 101):
+            self.consulter(key if key != victime else successeur)
+        self.consulter(successeur)
+        self.assertIn(successeur, self.avl.cache.positions)
+        self.root = self.avl.delete(self.root, victime)
+
+        # Le rafraîchissement du successeur doit atteindre le nœud de l'arbre
+        self.root = self.avl._insert(self.root, successeur, self.now + 60)
+        self.assertEqual(trouver_noeud(self.root, successeur).ts, self.now + 60)
+        self.assertAlmostEqual(self.avl.search(self.root, successeur).timestamp.timestamp(), self.now + 60, places=3)
+        self.assertIsNone(self.avl.search(self.root, victime))
+        self.verifier_cache()
+
+    def test_suppressions_aleatoires(self):
+        """Teste la cohérence du cache pendant des suppressions et rafraîchissements mélangés."""
+        import random
+        rng = random.Random(3)
+        for _ in range(2000):
+            key = rng.randrange(1, 120)
+            action = rng.random()
+            if action < 0.4:
+                self.avl.search(self.root, key)
+            elif action < 0.7:
+                self.root = self.avl._insert(self.root, key, self.now + rng.random())
+            else:
+                self.root = self.avl.delete(self.root, key)
+            self.verifier_cache()
+
+    def test_invalidation_nettoyage(self):
+        """Teste que nettoyage retire les IP expirées du cache."""
+        for key in range(1, 11):
+            self.consulter(key)
+        self.root = self.avl._insert(self.root, 3, time.time() + 3600)
+        self.root, ips = self.avl.nettoyage(self.root, -1)
+        self.assertEqual(len(ips), 99)
+        self.assertEqual(len(self.avl.cache), 1)
+        self.assertIsNone(self.avl.search(self.root, 4))
+        self.verifier_cache()
+
+    def test_reconstruction(self):
+        """Teste que les reconstructions (gros lot, chargement) vident le cache."""
+        for key in range(1, 11):
+            self.consulter(key)
+        self.assertEqual(len(self.avl.cache), 10)
+        self.root, inserted, _ = self.avl._upsert_many(self.root, {key: self.now for key in range(200, 1200)})
+        self.assertEqual(inserted, 1000)
+        self.assertEqual(len(self.avl.cache), 0)
+        self.assertEqual(self.avl.search(self.root, 3).key, 3)
+        self.verifier_cache()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "connexions.txt")
+            self.avl.save_to_file(self.root, filename)
+            self.root = self.avl.load_from_file(filename)
+        self.assertEqual(len(self.avl.cache), 0)
+        self.assertEqual(self.avl.search(self.root, 3).key, 3)
+        self.verifier_cache()
+
+    def test_petit_lot(self):
+        """Teste les rafraîchissements d'un petit lot à travers le cache."""
+        self.consulter(8)
+        self.root, inserted, refreshed = self.avl._upsert_many(self.root, {8: self.now + 5, 500: self.now})
+        self.assertEqual((inserted, refreshed), (1, 1))
+        self.assertAlmostEqual(self.avl.search(self.root, 8).timestamp.timestamp(), self.now + 5, places=3)
+        self.verifier_cache()
+
+    def test_select_sans_cache(self):
+        """Teste que select descend par les tailles sans consulter le cache."""
+        store = AVLStore(self.avl)
+        store.root = self.root
+        misses = self.avl.cache.misses
+        self.assertEqual(store.select(41), (42, self.now))
+        self.assertIsNone(store.select(100))
+        self.assertEqual((self.avl.cache.hits, self.avl.cache.misses), (0, misses))
+
+    def test_sans_cache(self):
+        """Teste que cache_size=0 désactive le cache."""
+        avl = self.engine()
+        self.assertIsNone(avl.cache)
+        root = avl._insert(None, 1, self.now)
+        self.assertEqual(avl.search(root, 1).key, 1)
+
+
+class TestBalanceAVLTreeCache(TestAVLTreeCache):
+    """Mêmes tests sur le moteur à facteur d'équilibre."""
+
+    engine = BalanceAVLTree
+
+if __name__ == '__main__':
+    unittest.main()
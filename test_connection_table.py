@@ -0,0 +1,146 @@
+import unittest
+import os
+import random
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from avl import Connexion, int_to_ip
+from avl_pool import PoolAVLTree
+from connection_table import ConnectionTable, RWLock
+
+class TestRWLock(unittest.TestCase):
+    """Tests pour le verrou lecteurs-rédacteur."""
+
+    def test_lecteurs_simultanes(self):
+        """Teste que plusieurs lecteurs détiennent le verrou en même temps."""
+        lock = RWLock()
+        barrier = threading.Barrier(3, timeout=5)
+
+        def reader():
+            with lock.read_locked():
+                barrier.wait()
+
+        threads = [threading.Thread(target=reader) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertFalse(barrier.broken)
+
+    def test_redacteur_exclusif(self):
+        """Teste qu'un rédacteur attend la fin des lectures et bloque les nouveaux lecteurs."""
+        lock = RWLock()
+        events = []
+        lock.acquire_read()
+        writer = threading.Thread(target=lambda: (lock.acquire_write(), events.append("w"), lock.release_write()))
+        writer.start()
+        while not lock._waiting_writers:
+            pass
+        reader = threading.Thread(target=lambda: (lock.acquire_read(), events.append("r"), lock.release_read()))
+        reader.start()
+        reader.join(0.05)
+        self.assertEqual(events, [])
+        lock.release_read()
+        writer.join()
+        reader.join()
+        self.assertEqual(events, ["w", "r"])
+
+
+class TestConnectionTable(unittest.TestCase):
+    """Tests pour la table de connexions partagée."""
+
+    def setUp(self):
+        self.table = ConnectionTable()
+
+    def test_operations(self):
+        """Teste l'ajout, la recherche, les plages et la suppression."""
+        for ip in ["10.0.0.3", "10.0.0.1", "10.0.1.1", "192.168.1.1"]:
+            self.table.insert(Connexion(ip))
+        self.assertEqual(len(self.table), 4)
+        self.assertEqual(self.table.search("10.0.0.3").ip, "10.0.0.3")
+        self.assertIsNone(self.table.search("10.0.0.2"))
+        self.assertEqual([c.ip for c in self.table.subnet("10.0.0.0/24")], ["10.0.0.1", "10.0.0.3"])
+        self.assertEqual(self.table.count_between("10.0.0.0", "10.0.255.255"), 3)
+        self.assertEqual([c.ip for c in self.table.page(1, 2)], ["10.0.0.3", "10.0.1.1"])
+        self.assertTrue(self.table.delete("10.0.0.3"))
+        self.assertFalse(self.table.delete("10.0.0.3"))
+        self.assertEqual([c.ip for c in self.table.inorder()], ["10.0.0.1", "10.0.1.1", "192.168.1.1"])
+
+    def test_nettoyage_et_lot(self):
+        """Teste l'insertion par lot et le nettoyage."""
+        old = Connexion("10.0.0.1")
+        old.timestamp = datetime.now() - timedelta(minutes=30)
+        inserted, refreshed = self.table.insert_many([old, Connexion("10.0.0.2")])
+        self.assertEqual((inserted, refreshed), (2, 0))
+        self.assertEqual(self.table.nettoyage(10), ["10.0.0.1"])
+        self.assertEqual(len(self.table), 1)
+
+    def test_lot_sur_table_remplie(self):
+        """Teste un petit lot sur une table déjà remplie : ajouts et rafraîchissements."""
+        for i in range(100):
+            self.table.insert(Connexion(f"10.0.0.{i}"))
+        recent = Connexion("10.0.0.5")
+        recent.timestamp = datetime.now() + timedelta(minutes=5)
+        inserted, refreshed = self.table.insert_many([recent, Connexion("10.0.1.1")])
+        self.assertEqual((inserted, refreshed), (1, 1))
+        self.assertEqual(len(self.table), 101)
+        self.assertEqual(self.table.search("10.0.0.5").timestamp, recent.timestamp)
+
+    def test_sauvegarde_chargement(self):
+        """Teste la sauvegarde puis le rechargement de la table."""
+        for i in range(50):
+            self.table.insert(Connexion(f"10.0.0.{i}"))
+        fd, filename = tempfile.mkstemp(suffix=".bin")
+        os.close(fd)
+        try:
+            self.table.save_to_file(filename)
+            other = ConnectionTable(PoolAVLTree())
+            self.assertEqual(other.load_from_file(filename), 50)
+            self.assertEqual([c.ip for c in other.inorder()], [c.ip for c in self.table.inorder()])
+        finally:
+            os.remove(filename)
+
+    def test_acces_concurrents(self):
+        """Teste des lectures et écritures concurrentes depuis plusieurs threads."""
+        errors = []
+        keys = random.Random(5).sample(range(1 << 32), 4000)
+
+        def writer(part):
+            try:
+                for key in part:
+                    self.table.insert(Connexion(int_to_ip(key)))
+                for key in part[::2]:
+                    self.table.delete(key)
+            except Exception as exc:
+                errors.append(exc)
+
+        def reader():
+            try:
+                for key in keys[:500]:
+                    self.table.search(key)
+                    self.table.count_between(0, key)
+                connexions = self.table.inorder()
+                if [c.key for c in connexions] != sorted(c.key for c in connexions):
+                    errors.append("ordre")
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=writer, args=(keys[i::4],)) for i in range(4)]
+        threads += [threading.Thread(target=reader) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        expected = sorted(set(keys) - {key for i in range(4) for key in keys[i::4][::2]})
+        self.assertEqual([c.key for c in self.table.inorder()], expected)
+
+
+class TestPoolConnectionTable(TestConnectionTable):
+    """Mêmes tests avec le moteur à réserve de nœuds."""
+
+    def setUp(self):
+        self.table = ConnectionTable(PoolAVLTree())
+
+if __name__ == "__main__":
+    unittest.main()
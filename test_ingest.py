@@ -0,0 +1,109 @@
+import unittest
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+from avl import AVLTree, ip_to_int
+from ingest import StreamIngest, parse_event
+from journal import Journal
+from logger import Logger
+from store import AVLStore
+from sweeper import Sweeper
+
+class TestParseEvent(unittest.TestCase):
+    """Tests pour l'analyse des lignes d'événements."""
+
+    def test_formats(self):
+        """Teste les formats d'horodatage acceptés."""
+        key = ip_to_int("10.0.0.1")
+        self.assertEqual(parse_event("10.0.0.1,1700000000.5"), (key, 1700000000.5))
+        iso = datetime(2025, 3, 1, 12, 30)
+        self.assertEqual(parse_event(f"10.0.0.1,{iso.isoformat()}"), (key, iso.timestamp()))
+        before = time.time()
+        found, ts = parse_event(" 10.0.0.1 ")
+        self.assertEqual(found, key)
+        self.assertGreaterEqual(ts, before)
+
+    def test_invalides(self):
+        """Teste le rejet des lignes invalides."""
+        for line in ["10.0.0.256", "10.0.0.1,hier", "bonjour", "10.0.0.1,inf", "10.0.0.1,-inf",
+                     "10.0.0.1,nan", "10.0.0.1,1e20", "10.0.0.1,-1e12"]:
+            with self.assertRaises(ValueError):
+                parse_event(line)
+
+
+class TestStreamIngest(unittest.TestCase):
+    """Tests pour l'ingestion en flux."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.logger = Logger(os.path.join(self.directory, "logs.txt"))
+        self.journal = Journal(os.path.join(self.directory, "connexions.journal"), fsync="batch")
+        self.snapshot = os.path.join(self.directory, "connexions.bin")
+        self.avl = AVLTree()
+        self.avl.journal = self.journal
+        self.store = AVLStore(self.avl)
+
+    def tearDown(self):
+        self.journal.close()
+        shutil.rmtree(self.directory)
+
+    def ingest(self, text, **options):
+        options.setdefault("report_interval", 60)
+        ingest = StreamIngest(self.store, self.logger, self.journal, self.snapshot,
+                              out=io.StringIO(), **options)
+        ingest.run(io.StringIO(text))
+        return ingest, self.store.root
+
+    def test_micro_lots(self):
+        """Teste l'application du flux par micro-lots et le point de reprise final."""
+        now = time.time()
+        lines = [f"10.0.{i // 256}.{i % 256},{now + i}" for i in range(2500)]
+        lines += ["10.0.0.1", "pas une ip", "10.0.9.9,inf", "10.0.9.9,1e20", "", "# commentaire"]
+        ingest, root = self.ingest("\n".join(lines) + "\n", batch_size=100)
+        self.assertEqual(ingest.events, 2501)
+        self.assertEqual(ingest.invalid, 3)
+        self.assertEqual((ingest.inserted, ingest.refreshed), (2500, 1))
+        self.assertEqual(len(self.avl), 2500)
+        # Un timestamp existant n'est jamais remplacé par un plus ancien
+        self.assertAlmostEqual(self.avl.search(root, "10.0.0.1").timestamp.timestamp(), now + 1, places=5)
+
+        # Point de reprise : instantané complet, journal vidé
+        other = AVLTree()
+        self.assertEqual(len(other.inorder(other.load_from_file(self.snapshot))), 2500)
+        self.assertEqual(os.path.getsize(self.journal.filename), 0)
+        self.assertIn("2501 événements (3 invalides)", ingest.out.getvalue())
+
+    def test_expiration(self):
+        """Teste l'expiration périodique des connexions inactives."""
+        old = time.time() - 3600
+        text = "".join(f"10.0.0.{i},{old}\n" for i in range(10)) + "10.0.1.1\n"
+        sweeper = Sweeper(self.store, self.logger, 30, interval=0)
+        ingest, root = self.ingest(text, sweeper=sweeper)
+        self.assertEqual(sweeper.evicted, 10)
+        self.assertIn("10 expirées", ingest.out.getvalue())
+        self.assertEqual([c.ip for c in self.avl.inorder(root)], ["10.0.1.1"])
+
+    def test_lot_incomplet_applique_apres_delai(self):
+        """Teste qu'un lot incomplet est appliqué après batch_timeout sans attendre la fin du flux."""
+        read, write = os.pipe()
+        stream = os.fdopen(read, 'r')
+        ingest = StreamIngest(self.store, self.logger, batch_size=1000, batch_timeout=0.05,
+                              out=io.StringIO())
+        runner = threading.Thread(target=ingest.run, args=(stream,))
+        runner.start()
+        os.write(write, b"10.0.0.1\n")
+        for _ in range(100):
+            if ingest.inserted:
+                break
+            time.sleep(0.01)
+        self.assertEqual(ingest.inserted, 1)
+        os.close(write)
+        runner.join(5)
+        stream.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import json
+import os
+import tempfile
+import time
+from avl import AVLTree
+from avl_pool import PoolAVLTree
+from logger import Logger
+import instrumentation
+
+class TestInstrumentation(unittest.TestCase):
+    """Tests pour l'instrumentation de l'arbre et du logger."""
+
+    def setUp(self):
+        self.avl = AVLTree()
+        instrumentation.enable(self.avl)
+
+    def inserer(self, keys):
+        root = None
+        for key in keys:
+            root = self.avl._insert(root, key, time.time())
+        return root
+
+    def test_rotations(self):
+        """Teste le décompte des rotations simples et doubles."""
+        self.inserer([1, 2, 3])
+        self.assertEqual(self.avl.op_stats["insert"].single_rotations, 1)
+        self.assertEqual(self.avl.op_stats["insert"].double_rotations, 0)
+        instrumentation.enable(self.avl)
+        self.inserer([3, 1, 2])
+        self.assertEqual(self.avl.op_stats["insert"].single_rotations, 0)
+        self.assertEqual(self.avl.op_stats["insert"].double_rotations, 1)
+
+    def test_descente(self):
+        """Teste les nœuds visités et comparaisons d'une recherche."""
+        root = self.inserer([2, 1, 3])
+        self.avl._find(root, 3)
+        stats = self.avl.op_stats["search"]
+        # 2 : deux comparaisons (ni plus petit ni égal), puis 3 : trois comparaisons
+        self.assertEqual((stats.calls, stats.visited, stats.comparisons), (1, 2, 5))
+        self.assertEqual(sum(stats.histogram), 1)
+
+        # Suppression à deux enfants : nœud puis chemin du successeur
+        self.avl._delete(root, 2)
+        self.assertEqual(self.avl.op_stats["delete"].visited, 2)
+
+    def test_desactivation(self):
+        """Teste le retour à la classe d'origine, sans compteurs."""
+        root = self.inserer(range(100))
+        instrumentation.disable(self.avl)
+        self.assertIs(type(self.avl), AVLTree)
+        self.assertFalse(instrumentation.is_enabled(self.avl))
+        self.avl._find(root, 5)
+        self.assertNotIn("search", self.avl.op_stats)
+        with self.assertRaises(TypeError):
+            instrumentation.enable(PoolAVLTree())
+
+    def test_releve_json(self):
+        """Teste le relevé complet et son écriture atomique en JSON."""
+        fd, log_file = tempfile.mkstemp(suffix=".txt")
+        os.close(fd)
+        logger = Logger(log_file)
+        instrumentation.enable(logger)
+        root = self.inserer(range(1000))
+        root, _ = self.avl.nettoyage(root, 60)
+        logger.log_connections_cleaned(["10.0.0.1", "10.0.0.2"], 60)
+
+        data = instrumentation.snapshot(self.avl, root, logger)
+        self.assertEqual(data["tree"]["connections"], 1000)
+        self.assertLessEqual(data["tree"]["height"], data["tree"]["height_bound"])
+        self.assertEqual(data["operations"]["insert"]["calls"], 1000)
+        self.assertIn("expire", data["operations"])
+        self.assertEqual(data["logger"]["messages"], 3)
+        self.assertEqual(data["logger"]["writes"]["calls"], 1)
+
+        stats_file = log_file + ".json"
+        instrumentation.write_stats(stats_file, data)
+        with open(stats_file) as f:
+            self.assertEqual(json.load(f)["operations"]["insert"]["calls"], 1000)
+        os.remove(stats_file)
+        os.remove(log_file)
+
+if __name__ == "__main__":
+    unittest.main()
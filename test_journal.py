@@ -0,0 +1,133 @@
+import unittest
+import os
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+from avl import AVLTree, Connexion, write_connexions
+from journal import Journal
+
+class TestJournal(unittest.TestCase):
+    """Tests pour le journal des mutations."""
+
+    def setUp(self):
+        """Initialise un arbre journalisé."""
+        self.journal_file = "test_connexions.journal"
+        self.snapshot_file = "test_connexions_snapshot.txt"
+        for filename in (self.journal_file, self.snapshot_file):
+            if os.path.exists(filename):
+                os.remove(filename)
+        self.avl = AVLTree()
+        self.journal = Journal(self.journal_file)
+        self.avl.journal = self.journal
+        self.root = None
+
+    def tearDown(self):
+        """Nettoie après les tests."""
+        self.journal.close()
+        for filename in (self.journal_file, self.snapshot_file):
+            if os.path.exists(filename):
+                os.remove(filename)
+
+    def recharger(self):
+        """Simule un redémarrage : instantané éventuel puis rejeu du journal."""
+        avl = AVLTree()
+        root = avl.load_from_file(self.snapshot_file)
+        root, count = Journal(self.journal_file).replay(avl, root)
+        return avl, root, count
+
+    def etat(self, avl, root):
+        return [(c.ip, c.timestamp) for c in avl.iter_inorder(root)]
+
+    def test_rejeu(self):
+        """Teste que le rejeu du journal reconstruit le même état."""
+        ancienne = Connexion("10.0.0.1")
+        ancienne.timestamp = datetime.now() - timedelta(minutes=10)
+        self.root = self.avl.insert(self.root, ancienne)
+        for ip in ["10.0.0.2", "10.0.0.3", "10.0.0.4"]:
+            self.root = self.avl.insert(self.root, Connexion(ip))
+        self.root = self.avl.insert(self.root, Connexion("10.0.0.2"))
+        self.root = self.avl.delete(self.root, "10.0.0.3")
+        self.root, _ = self.avl.nettoyage(self.root, 5)
+        self.root, _, _ = self.avl.insert_many(self.root, [Connexion("10.0.1.1"), Connexion("10.0.0.4")])
+
+        avl, root, count = self.recharger()
+        self.assertEqual(count, 9)
+        self.assertEqual(self.etat(avl, root), self.etat(self.avl, self.root))
+
+    def test_ligne_tronquee(self):
+        """Teste qu'une ligne incomplète en fin de journal est ignorée."""
+        self.root = self.avl.insert(self.root, Connexion("10.0.0.1"))
+        self.journal.close()
+        with open(self.journal_file, 'a') as f:
+            f.write("A,167772162,17")
+
+        avl, root, count = self.recharger()
+        self.assertEqual(count, 1)
+        self.assertEqual([c.ip for c in avl.iter_inorder(root)], ["10.0.0.1"])
+
+    def test_compactage(self):
+        """Teste le compactage dans un instantané puis le rejeu de la suite du journal."""
+        for i in range(1, 6):
+            self.root = self.avl.insert(self.root, Connexion(f"10.0.0.{i}"))
+        self.avl.save_to_file(self.root, self.snapshot_file)
+        self.journal.reset()
+        self.assertFalse(self.journal.needs_compaction())
+        self.root = self.avl.delete(self.root, "10.0.0.1")
+
+        avl, root, count = self.recharger()
+        self.assertEqual(count, 1)
+        self.assertEqual(self.etat(avl, root), self.etat(self.avl, self.root))
+
+        # Arrêt entre l'écriture de l'instantané et la remise à zéro du journal :
+        # rejouer des opérations déjà incluses dans l'instantané ne change rien
+        self.root = self.avl.insert(self.root, Connexion("10.0.0.1"))
+        self.avl.save_to_file(self.root, self.snapshot_file)
+        avl, root, count = self.recharger()
+        self.assertEqual(count, 2)
+        self.assertEqual(self.etat(avl, root), self.etat(self.avl, self.root))
+
+    def test_politique_inconnue(self):
+        """Teste le rejet d'une politique fsync inconnue."""
+        with self.assertRaises(ValueError):
+            Journal(self.journal_file, fsync="jamais")
+        for fsync in ("always", "batch", "interval"):
+            journal = Journal(self.journal_file, fsync=fsync, batch_size=2, interval=0)
+            journal.record_delete(1)
+            journal.close()
+
+    def test_synchronisation_periodique(self):
+        """Teste qu'une opération suivie d'inactivité atteint le disque en mode interval."""
+        journal = Journal(self.journal_file, fsync="interval", interval=0.05)
+        journal.record_insert(1, 1.0)
+        journal.record_insert(2, 2.0)
+        try:
+            for _ in range(100):
+                if not journal.unsynced:
+                    break
+                time.sleep(0.01)
+            self.assertEqual(journal.unsynced, 0)
+            with open(self.journal_file) as f:
+                self.assertEqual(f.read(), "A,1,1.0\nA,2,2.0\n")
+        finally:
+            journal.close()
+        self.assertIsNone(journal._thread)
+    def test_instantane_durable(self):
+        """Teste que l'instantané texte est sur disque (fichier puis répertoire) avant d'être remplacé."""
+        calls = []
+        real_fsync, real_replace = os.fsync, os.replace
+
+        def fsync(fd):
+            calls.append("fsync")
+            real_fsync(fd)
+
+        def replace(src, dst):
+            calls.append("replace")
+            real_replace(src, dst)
+
+        with mock.patch("os.fsync", fsync), mock.patch("os.replace", replace):
+            write_connexions(self.snapshot_file, [(1, 1.0), (2, 2.0)])
+        self.assertEqual(calls, ["fsync", "replace", "fsync"])
+        self.assertGreater(os.path.getsize(self.snapshot_file), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,10 @@
 import unittest
 import os
+import gzip
+import shutil
+import tempfile
+import threading
+import time
 from logger import Logger
 from datetime import datetime
 
@@ -38,6 +43,13 @@ class TestLogger(unittest.TestCase):
             content = f.read()
         self.assertIn(f"CONNEXION AJOUTÉE: {ip}", content)
     
+    def test_log_connections_batch(self):
+        """Teste l'enregistrement d'un lot de connexions."""
+        self.logger.log_connections_batch(3, 2)
+        with open(self.test_log_file, 'r') as f:
+            content = f.read()
+        self.assertIn("LOT: 3 connexions ajoutées, 2 rafraîchies", content)
+    
     def test_log_connection_deleted(self):
         """Teste l'enregistrement de la suppression d'une connexion."""
         ip = "192.168.1.1"
@@ -68,6 +80,13 @@ class TestLogger(unittest.TestCase):
             content = f.read()
         self.assertIn(f"RECHERCHE: Connexion {ip} non trouvée", content)
     
+    def test_log_connections_range(self):
+        """Teste l'enregistrement d'une recherche par plage."""
+        self.logger.log_connections_range("10.0.0.0/8", 4)
+        with open(self.test_log_file, 'r') as f:
+            content = f.read()
+        self.assertIn("PLAGE: 4 connexions dans 10.0.0.0/8", content)
+    
     def test_log_connections_display(self):
         """Teste l'enregistrement de l'affichage des connexions."""
         count = 5
@@ -94,6 +113,13 @@ class TestLogger(unittest.TestCase):
             content = f.read()
         self.assertIn(f"CHARGEMENT: {count} connexions chargées depuis {filename}", content)
     
+    def test_log_journal_replayed(self):
+        """Teste l'enregistrement du rejeu du journal."""
+        self.logger.log_journal_replayed("connexions.journal", 7)
+        with open(self.test_log_file, 'r') as f:
+            content = f.read()
+        self.assertIn("JOURNAL: 7 opérations rejouées depuis connexions.journal", content)
+    
     def test_log_system_exit(self):
         """Teste l'enregistrement de l'arrêt du système."""
         self.logger.log_system_exit()
@@ -101,5 +127,158 @@ class TestLogger(unittest.TestCase):
             content = f.read()
         self.assertIn("SYSTÈME ARRÊTÉ", content)
 
+
+class TestQueuedLogger(unittest.TestCase):
+    """Tests pour le mode asynchrone (thread d'écriture) du Logger."""
+
+    def setUp(self):
+        self.test_log_file = "test_logs_queued.txt"
+        if os.path.exists(self.test_log_file):
+            os.remove(self.test_log_file)
+
+    def tearDown(self):
+        if os.path.exists(self.test_log_file):
+            os.remove(self.test_log_file)
+
+    def read(self):
+        with open(self.test_log_file, 'r') as f:
+            return f.read()
+
+    def test_messages_ecrits_dans_l_ordre(self):
+        """Teste que tous les messages sont écrits, dans l'ordre, à l'arrêt."""
+        logger = Logger(self.test_log_file, queued=True)
+        for i in range(1000):
+            logger.log_connection_added(f"10.0.{i // 256}.{i % 256}")
+        logger.log_system_exit()
+        lines = self.read().splitlines()
+        self.assertEqual(len(lines), 1002)
+        self.assertIn("SYSTÈME DÉMARRÉ", lines[0])
+        self.assertIn("CONNEXION AJOUTÉE: 10.0.0.0", lines[1])
+        self.assertIn("CONNEXION AJOUTÉE: 10.0.3.231", lines[1000])
+        self.assertIn("SYSTÈME ARRÊTÉ", lines[-1])
+        self.assertFalse(logger._writer.is_alive())
+
+    def test_flush(self):
+        """Teste que flush attend l'écriture des messages en file."""
+        logger = Logger(self.test_log_file, queued=True, flush_interval=60)
+        logger.log_connection_deleted("192.168.1.1")
+        logger.flush()
+        self.assertIn("CONNEXION SUPPRIMÉE: 192.168.1.1", self.read())
+        logger.close()
+
+    def test_vidage_periodique(self):
+        """Teste le vidage automatique après flush_interval."""
+        logger = Logger(self.test_log_file, queued=True, flush_interval=0.05)
+        logger.log_connection_added("192.168.1.1")
+        for _ in range(100):
+            if "192.168.1.1" in self.read():
+                break
+            time.sleep(0.01)
+        self.assertIn("CONNEXION AJOUTÉE: 192.168.1.1", self.read())
+        logger.close()
+
+    def test_nettoyage_en_un_lot(self):
+        """Teste l'écriture groupée du nettoyage."""
+        logger = Logger(self.test_log_file, queued=True)
+        logger.log_connections_cleaned(["1.1.1.1", "2.2.2.2"], 30)
+        logger.close()
+        content = self.read()
+        self.assertIn("NETTOYAGE: 2 connexions", content)
+        self.assertIn("  - 2.2.2.2", content)
+
+    def test_debordement_drop(self):
+        """Teste la politique "drop" : les messages en trop sont comptés puis signalés."""
+        logger = Logger(self.test_log_file, queued=True, queue_size=1, overflow="drop")
+        # File bloquée : le thread d'écriture attend sur un verrou du test
+        gate = threading.Event()
+        original = logger._format
+        logger._format = lambda t, message: gate.wait() and original(t, message)
+        logger.log_connection_added("1.1.1.1")
+        time.sleep(0.05)
+        for _ in range(10):
+            logger.log_connection_added("2.2.2.2")
+        self.assertGreater(logger.dropped, 0)
+        dropped = logger.dropped
+        gate.set()
+        logger.close()
+        self.assertIn(f"LOGS: {dropped} messages perdus", self.read())
+
+    def test_politique_invalide(self):
+        """Teste le refus d'une politique de débordement inconnue."""
+        with self.assertRaises(ValueError):
+            Logger(self.test_log_file, queued=True, overflow="ignore")
+
+
+class TestLogRotation(unittest.TestCase):
+    """Tests pour la rotation des fichiers de log."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.test_log_file = os.path.join(self.directory, "logs.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read_archive(self, path):
+        with gzip.open(path, 'rt') as f:
+            return f.read()
+
+    def test_rotation_par_taille(self):
+        """Teste la rotation par taille et la limite du nombre d'archives."""
+        logger = Logger(self.test_log_file, max_bytes=500, backup_count=3)
+        for i in range(200):
+            logger.log_connection_added(f"10.0.0.{i}")
+        logger.close()
+        archives = logger.archives()
+        self.assertEqual(len(archives), 3)
+        self.assertTrue(all(path.endswith(".gz") for path in archives))
+        self.assertLess(os.path.getsize(self.test_log_file), 600)
+        # Les archives conservées sont les plus récentes, dans l'ordre
+        contents = [self.read_archive(path) for path in archives]
+        with open(self.test_log_file, 'r') as f:
+            contents.append(f.read())
+        lines = "".join(contents).splitlines()
+        self.assertIn("CONNEXION AJOUTÉE: 10.0.0.199", lines[-1])
+        numbers = [int(line.rsplit(".", 1)[1]) for line in lines]
+        self.assertEqual(numbers, list(range(numbers[0], 200)))
+
+    def test_rotation_par_age(self):
+        """Teste la rotation par âge du fichier courant."""
+        logger = Logger(self.test_log_file, max_age=0.05)
+        logger.log_connection_added("192.168.1.1")
+        time.sleep(0.1)
+        logger.log_connection_added("192.168.1.2")
+        logger.close()
+        archives = logger.archives()
+        self.assertEqual(len(archives), 1)
+        self.assertIn("192.168.1.1", self.read_archive(archives[0]))
+        with open(self.test_log_file, 'r') as f:
+            content = f.read()
+        self.assertIn("192.168.1.2", content)
+        self.assertNotIn("192.168.1.1", content)
+
+    def test_rotation_mode_asynchrone(self):
+        """Teste la rotation faite par le thread d'écriture."""
+        logger = Logger(self.test_log_file, queued=True, batch_size=16,
+                        max_bytes=1000, backup_count=100, compress=False)
+        for i in range(500):
+            logger.log_connection_added(f"10.0.{i // 256}.{i % 256}")
+        logger.log_system_exit()
+        archives = logger.archives()
+        self.assertGreater(len(archives), 1)
+        total = 0
+        for path in archives + [self.test_log_file]:
+            with open(path, 'r') as f:
+                total += len(f.read().splitlines())
+        self.assertEqual(total, 502)
+
+    def test_sans_rotation_par_defaut(self):
+        """Teste qu'aucune archive n'est créée sans limite configurée."""
+        logger = Logger(self.test_log_file)
+        for i in range(100):
+            logger.log_connection_added(f"10.0.0.{i}")
+        logger.close()
+        self.assertEqual(logger.archives(), [])
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,127 @@
+import unittest
+import asyncio
+import json
+import os
+import tempfile
+import time
+from avl import AVLTree
+from logger import Logger
+from server import ConnectionServer
+from store import AVLStore
+import instrumentation
+from sweeper import Sweeper
+
+class TestConnectionServer(unittest.IsolatedAsyncioTestCase):
+    """Tests pour le serveur réseau asyncio."""
+
+    async def asyncSetUp(self):
+        fd, self.log_file = tempfile.mkstemp(suffix=".txt")
+        os.close(fd)
+        self.avl = AVLTree()
+        self.store = AVLStore(self.avl)
+        self.server = ConnectionServer(self.store, Logger(self.log_file), batch_size=50,
+                                       batch_timeout=0.01)
+        await self.server.start("127.0.0.1", 0)
+        self.reader, self.writer = await asyncio.open_connection(*self.server.tcp_address)
+
+    async def asyncTearDown(self):
+        self.writer.close()
+        await self.server.close()
+        os.remove(self.log_file)
+
+    async def request(self, *lines):
+        self.writer.write("".join(line + "\n" for line in lines).encode())
+        await self.writer.drain()
+
+    async def response(self):
+        return (await asyncio.wait_for(self.reader.readline(), 5)).decode().rstrip("\n")
+
+    async def test_commandes(self):
+        """Teste ADD, SEARCH, COUNT, RANGE, LEN et les erreurs."""
+        await self.request("ADD 10.0.0.2,1700000000.5", "10.0.0.1", "ADD 192.168.1.1",
+                           "SEARCH 10.0.0.2", "SEARCH 10.0.0.3", "COUNT 10.0.0.0/24",
+                           "RANGE 10.0.0.0-10.0.0.255 1", "LEN", "ADD 300.0.0.1", "SEARCH x",
+                           "ADD 10.0.0.9,nan", "ADD 10.0.0.9,1e20", "LEN")
+        responses = [await self.response() for _ in range(3)]
+        self.assertEqual(responses, ["OK", "OK", "OK"])
+        self.assertEqual(await self.response(), "FOUND 10.0.0.2,1700000000.5")
+        self.assertEqual(await self.response(), "NOTFOUND 10.0.0.3")
+        self.assertEqual(await self.response(), "COUNT 2")
+        self.assertEqual(await self.response(), "RANGE 1")
+        self.assertTrue((await self.response()).startswith("10.0.0.1,"))
+        self.assertEqual(await self.response(), "END")
+        self.assertEqual(await self.response(), "LEN 3")
+        self.assertTrue((await self.response()).startswith("ERR"))
+        self.assertTrue((await self.response()).startswith("ERR"))
+        self.assertEqual(await self.response(), "ERR Horodatage invalide: nan")
+        self.assertEqual(await self.response(), "ERR Horodatage hors limites: 1e20")
+        self.assertEqual(await self.response(), "LEN 3")
+
+    async def test_regroupement_par_lots(self):
+        """Teste l'application des événements par lots et l'ordre des réponses."""
+        await self.request(*[f"ADD 10.0.{i // 256}.{i % 256}" for i in range(120)], "LEN")
+        responses = [await self.response() for _ in range(121)]
+        self.assertEqual(responses[:120], ["OK"] * 120)
+        self.assertEqual(responses[120], "LEN 120")
+        # 2 lots pleins de 50, puis le reste appliqué avant la requête LEN
+        self.assertEqual(self.server.batches, 3)
+
+    async def test_lot_incomplet_applique_apres_delai(self):
+        """Teste qu'un lot incomplet est appliqué après batch_timeout."""
+        start = time.perf_counter()
+        await self.request("ADD 10.0.0.1")
+        self.assertEqual(await self.response(), "OK")
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(len(self.avl), 1)
+
+    async def test_udp(self):
+        """Teste les événements et requêtes reçus en UDP."""
+        loop = asyncio.get_running_loop()
+        replies = asyncio.Queue()
+
+        class Client(asyncio.DatagramProtocol):
+            def datagram_received(self, data, addr):
+                replies.put_nowait(data.decode())
+
+        transport, _ = await loop.create_datagram_endpoint(Client, remote_addr=self.server.udp_address)
+        try:
+            transport.sendto(b"10.0.0.1\n10.0.0.2\nADD 10.0.0.3\n")
+            transport.sendto(b"COUNT 10.0.0.0/8\n")
+            self.assertEqual(await asyncio.wait_for(replies.get(), 5), "COUNT 3\n")
+        finally:
+            transport.close()
+
+    async def test_stats(self):
+        """Teste le relevé d'instrumentation renvoyé par STATS."""
+        instrumentation.enable(self.avl)
+        await self.request("ADD 10.0.0.1", "SEARCH 10.0.0.1", "STATS")
+        self.assertEqual(await self.response(), "OK")
+        await self.response()
+        command, _, payload = (await self.response()).partition(" ")
+        self.assertEqual(command, "STATS")
+        data = json.loads(payload)
+        self.assertEqual(data["tree"]["connections"], 1)
+        self.assertEqual(data["operations"]["search"]["calls"], 1)
+        self.assertEqual(data["server"]["events"], 1)
+
+    async def test_balayeur(self):
+        """Teste le balayeur exécuté comme tâche de la boucle du serveur."""
+        await self.server.close()
+        self.server = ConnectionServer(self.store, self.server.logger, batch_size=50,
+                                       batch_timeout=0.01,
+                                       sweeper=Sweeper(self.store, self.server.logger, 30, interval=0.01))
+        await self.server.start("127.0.0.1", 0)
+        self.reader, self.writer = await asyncio.open_connection(*self.server.tcp_address)
+        old = time.time() - 3600
+        await self.request(*[f"ADD 10.0.0.{i},{old}" for i in range(5)], "ADD 10.0.1.1")
+        for _ in range(6):
+            self.assertEqual(await self.response(), "OK")
+        for _ in range(100):
+            if self.server.sweeper.evicted == 5:
+                break
+            await asyncio.sleep(0.01)
+        await self.request("LEN")
+        self.assertEqual(await self.response(), "LEN 1")
+
+if __name__ == "__main__":
+    unittest.main()
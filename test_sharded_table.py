@@ -0,0 +1,103 @@
+import unittest
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+from avl import AVLTree, Connexion, int_to_ip
+from sharded_table import ShardedTable
+
+class TestShardedTable(unittest.TestCase):
+    """Tests pour la table répartie sur plusieurs processus."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.table = ShardedTable(4)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.table.close()
+
+    def setUp(self):
+        # Repart d'une table vide
+        self.table.delete_many([c.key for c in self.table.inorder()])
+
+    def test_repartition_par_prefixe(self):
+        """Teste que chaque shard possède un préfixe /2."""
+        self.assertEqual(self.table.bounds, [0, 1 << 30, 2 << 30, 3 << 30, 1 << 32])
+        self.assertEqual(self.table.shard_of(0x3FFFFFFF), 0)
+        self.assertEqual(self.table.shard_of(0x40000000), 1)
+        self.assertEqual(self.table.shard_of(0xFFFFFFFF), 3)
+
+    def test_repartition_quelconque(self):
+        """Teste qu'un nombre de shards qui n'est pas une puissance de 2 découpe l'espace en plages."""
+        with ShardedTable(3) as other:
+            self.assertEqual(other.bounds, [0, 1431655766, 2863311531, 1 << 32])
+            for s in range(3):
+                lo, hi = other.bounds[s], other.bounds[s + 1] - 1
+                self.assertEqual((other.shard_of(lo), other.shard_of(hi)), (s, s))
+
+    def test_meme_contenu_que_avltree(self):
+        """Teste ajouts, recherches, plages et suppressions contre un AVLTree."""
+        rng = random.Random(9)
+        keys = rng.sample(range(1 << 32), 2000)
+        connexions = [Connexion(int_to_ip(key)) for key in keys]
+        self.assertEqual(self.table.insert_many(connexions), (2000, 0))
+        reference = AVLTree()
+        root, _, _ = reference.insert_many(None, connexions)
+
+        self.assertEqual(len(self.table), 2000)
+        self.assertEqual([c.key for c in self.table.inorder()], sorted(keys))
+        lo, hi = sorted(rng.sample(keys, 2))
+        self.assertEqual([c.key for c in self.table.iter_range(lo, hi)],
+                         [c.key for c in reference.iter_range(root, lo, hi)])
+        self.assertEqual(self.table.count_between(lo, hi), reference.count_between(root, lo, hi))
+
+        found = self.table.search_many(keys[:10] + [keys[0] ^ 1])
+        self.assertEqual([c.key for c in found[:10]], keys[:10])
+        self.assertEqual(found[0].timestamp.replace(microsecond=0),
+                         connexions[0].timestamp.replace(microsecond=0))
+        self.assertEqual(self.table.delete_many(keys[:500] + keys[:10]), 500)
+        self.assertEqual([c.key for c in self.table.inorder()], sorted(keys[500:]))
+
+    def test_sous_reseau(self):
+        """Teste une requête de sous-réseau à cheval sur deux shards."""
+        for ip in ["63.255.255.255", "64.0.0.0", "64.0.0.1", "128.0.0.0"]:
+            self.table.insert(Connexion(ip))
+        self.assertEqual([c.ip for c in self.table.iter_subnet("62.0.0.0/7")], ["63.255.255.255"])
+        self.assertEqual([c.ip for c in self.table.iter_range("63.0.0.0", "64.0.0.0")],
+                         ["63.255.255.255", "64.0.0.0"])
+        self.assertIsNone(self.table.search("64.0.0.2"))
+        self.assertTrue(self.table.delete("64.0.0.1"))
+        self.assertFalse(self.table.delete("64.0.0.1"))
+
+    def test_nettoyage(self):
+        """Teste le nettoyage réparti."""
+        old = [Connexion(ip) for ip in ["200.0.0.1", "10.0.0.1"]]
+        for connexion in old:
+            connexion.timestamp = datetime.now() - timedelta(minutes=30)
+        self.table.insert_many(old + [Connexion("10.0.0.2")])
+        self.assertEqual(self.table.nettoyage(10), ["10.0.0.1", "200.0.0.1"])
+        self.assertEqual([c.ip for c in self.table.inorder()], ["10.0.0.2"])
+
+    def test_sauvegarde_chargement(self):
+        """Teste la sauvegarde puis le chargement réparti."""
+        keys = random.Random(2).sample(range(1 << 32), 300)
+        self.table.insert_many([Connexion(int_to_ip(key)) for key in keys])
+        fd, filename = tempfile.mkstemp(suffix=".bin")
+        os.close(fd)
+        try:
+            self.table.save_to_file(filename)
+            with ShardedTable(3) as other:
+                self.assertEqual(other.load_from_file(filename), 300)
+                self.assertEqual([c.key for c in other.inorder()], sorted(keys))
+        finally:
+            os.remove(filename)
+
+    def test_erreur_propagee(self):
+        """Teste qu'une IP invalide est refusée sans bloquer la table."""
+        with self.assertRaises(ValueError):
+            self.table.search("999.0.0.1")
+        self.assertEqual(len(self.table), 0)
+
+if __name__ == "__main__":
+    unittest.main()
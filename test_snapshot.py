@@ -0,0 +1,87 @@
+import unittest
+import os
+import random
+from unittest import mock
+from avl import AVLTree, Connexion, int_to_ip
+from avl_pool import PoolAVLTree
+from snapshot import SnapshotReader, read_snapshot, write_snapshot, HEADER, RECORD
+
+class TestSnapshot(unittest.TestCase):
+    """Tests pour le format binaire d'instantané."""
+
+    def setUp(self):
+        """Initialise un arbre de connexions."""
+        self.filename = "test_connexions.bin"
+        self.avl = AVLTree()
+        self.root = None
+        rng = random.Random(5)
+        for key in rng.sample(range(1 << 32), 300):
+            self.root = self.avl.insert(self.root, Connexion(int_to_ip(key)))
+        self.root = self.avl.insert(self.root, Connexion("10.20.0.1"))
+        self.root = self.avl.insert(self.root, Connexion("10.20.3.4"))
+
+    def tearDown(self):
+        """Nettoie après les tests."""
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+    def etat(self, avl, root):
+        return [(c.ip, c.timestamp) for c in avl.iter_inorder(root)]
+
+    def test_sauvegarde_chargement(self):
+        """Teste l'aller-retour binaire pour les deux moteurs."""
+        self.avl.save_to_file(self.root, self.filename)
+        self.assertEqual(os.path.getsize(self.filename), HEADER.size + 302 * RECORD.size)
+
+        for engine in (AVLTree(), PoolAVLTree()):
+            root = engine.load_from_file(self.filename)
+            self.assertEqual(self.etat(engine, root), self.etat(self.avl, self.root))
+
+    def test_instantane_durable(self):
+        """Teste que l'instantané est synchronisé sur disque avant le renommage, puis son répertoire."""
+        calls = []
+        real_fsync, real_replace = os.fsync, os.replace
+
+        def fsync(fd):
+            calls.append("fsync")
+            real_fsync(fd)
+
+        def replace(src, dst):
+            calls.append("replace")
+            real_replace(src, dst)
+
+        with mock.patch("os.fsync", fsync), mock.patch("os.replace", replace):
+            self.assertEqual(write_snapshot(self.filename, [(1, 1.0), (2, 2.0)]), 2)
+        self.assertEqual(calls, ["fsync", "replace", "fsync"])
+        self.assertEqual(read_snapshot(self.filename)[0], [1, 2])
+
+    def test_lecture_mmap(self):
+        """Teste la recherche dichotomique dans un instantané projeté en mémoire."""
+        self.avl.save_to_file(self.root, self.filename)
+        with SnapshotReader(self.filename) as reader:
+            self.assertEqual(len(reader), 302)
+            self.assertTrue(reader.verify())
+            self.assertEqual(reader.search("10.20.3.4").timestamp, self.avl.search(self.root, "10.20.3.4").timestamp)
+            self.assertIsNone(reader.search("10.20.3.5"))
+            self.assertEqual([c.ip for c in reader.iter_subnet("10.20.0.0/16")],
+                             [c.ip for c in self.avl.iter_subnet(self.root, "10.20.0.0/16")])
+
+    def test_instantane_corrompu(self):
+        """Teste la détection d'un instantané corrompu ou tronqué."""
+        write_snapshot(self.filename, [(1, 1.0), (2, 2.0)])
+        self.assertEqual(read_snapshot(self.filename), ([1, 2], [1.0, 2.0]))
+
+        with open(self.filename, 'r+b') as f:
+            f.seek(HEADER.size)
+            f.write(b"\xff")
+        with self.assertRaises(ValueError):
+            read_snapshot(self.filename)
+
+        with open(self.filename, 'r+b') as f:
+            f.truncate(HEADER.size + RECORD.size)
+        with self.assertRaises(ValueError):
+            read_snapshot(self.filename)
+
+
+if __name__ == "__main__":
+    unittest.main()
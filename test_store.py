@@ -0,0 +1,242 @@
+import unittest
+import os
+import random
+import tempfile
+import time
+from avl import Connexion
+from avl_balance import BalanceAVLTree
+from avl_persistent import PersistentAVLTree
+from block_store import BlockStore
+from connection_table import RWLock
+from journal import Journal
+from logger import Logger
+from store import AVLStore
+from sweeper import Sweeper
+
+class TestAVLStore(unittest.TestCase):
+    """Tests de l'interface des stockages, sur l'implémentation de référence."""
+
+    def make_store(self):
+        return AVLStore()
+
+    def setUp(self):
+        self.store = self.make_store()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+        os.rmdir(self.directory)
+
+    def remplir(self, n=300, seed=1):
+        # Renvoie le modèle clé -> timestamp correspondant au stockage
+        rng = random.Random(seed)
+        model = {}
+        for _ in range(n):
+            key, ts = rng.randrange(1000), rng.random() * 1000
+            self.assertEqual(self.store.upsert(key, ts), key not in model)
+            model[key] = ts
+        return model
+
+    def verifier(self, model):
+        self.assertEqual(len(self.store), len(model))
+        self.assertEqual(list(self.store.iter_sorted()), sorted(model.items()))
+
+    def test_upsert_remove_get(self):
+        """Teste insertions, rafraîchissements et suppressions face à un dictionnaire."""
+        model = self.remplir()
+        self.verifier(model)
+        rng = random.Random(2)
+        for _ in range(1500):
+            key = rng.randrange(1000)
+            if rng.random() < 0.5:
+                self.assertEqual(self.store.remove(key), key in model)
+                model.pop(key, None)
+            else:
+                ts = rng.random() * 1000
+                self.store.upsert(key, ts)
+                model[key] = ts
+            self.assertEqual(self.store.get(key), model.get(key))
+        self.verifier(model)
+        for key in list(model):
+            self.assertTrue(self.store.remove(key))
+        self.verifier({})
+        self.assertIsNone(self.store.get(3))
+        self.assertFalse(self.store.remove(3))
+
+    def test_compaction_apres_suppressions(self):
+        """Teste que les suppressions n'accumulent pas d'entrées obsolètes dans l'index d'expiration."""
+        for key in range(5000):
+            self.store.upsert(key, float(key))
+        for key in range(4999):
+            self.assertTrue(self.store.remove(key))
+        expiry = self.store.expiry if hasattr(self.store, "expiry") else self.store.avl.expiry
+        self.assertLessEqual(len(expiry), 2 * 64 + 1)
+        self.assertEqual(self.store.expire(float('inf'))[0], [4999])
+
+    def test_parcours_et_plages(self):
+        """Teste iter_sorted depuis une clé, range, count_between et select."""
+        model = self.remplir()
+        items = sorted(model.items())
+        self.assertEqual(list(self.store.iter_sorted(500)), [item for item in items if item[0] >= 500])
+        for lo, hi in [(0, 999), (100, 200), (250, 250), (990, 5000), (300, 100)]:
+            expected = [item for item in items if lo <= item[0] <= hi]
+            self.assertEqual(list(self.store.range(lo, hi)), expected)
+            self.assertEqual(self.store.count_between(lo, hi), len(expected))
+        for k in (0, 17, len(items) - 1):
+            self.assertEqual(self.store.select(k), items[k])
+        self.assertIsNone(self.store.select(len(items)))
+        self.assertIsNone(self.store.select(-1))
+
+    def test_upsert_many(self):
+        """Teste les petits et gros lots : un timestamp n'est jamais remplacé par un plus ancien."""
+        model = self.remplir()
+        for size in (5, 2000):
+            batch = {key: 500.0 for key in random.Random(size).sample(range(3000), size)}
+            # Rafraîchies : IP du lot déjà présentes, que leur timestamp soit remplacé ou non
+            expected = (sum(1 for key in batch if key not in model), sum(1 for key in batch if key in model))
+            for key, ts in batch.items():
+                if ts > model.get(key, float('-inf')):
+                    model[key] = ts
+            self.assertEqual(self.store.upsert_many(dict(batch)), expected)
+            self.verifier(model)
+
+    def test_expire(self):
+        """Teste l'expiration, avec et sans échéance."""
+        model = self.remplir()
+        self.store.upsert(5, 2000.0)
+        model[5] = 2000.0
+        cles, complete = self.store.expire(100.0, deadline=time.perf_counter() - 1)
+        self.assertFalse(complete)
+        self.assertEqual(len(cles), 1)
+        del model[cles[0]]
+        cles, complete = self.store.expire(500.0)
+        self.assertTrue(complete)
+        self.assertEqual(sorted(cles), sorted(key for key, ts in model.items() if ts < 500.0))
+        self.verifier({key: ts for key, ts in model.items() if ts >= 500.0})
+
+    def test_snapshot_load(self):
+        """Teste l'instantané binaire et texte, et le chargement d'un fichier absent."""
+        model = self.remplir()
+        for name in ("connexions.bin", "connexions.txt"):
+            filename = os.path.join(self.directory, name)
+            self.store.snapshot(filename)
+            other = self.make_store()
+            self.assertEqual(other.load(filename), len(model))
+            self.assertEqual([key for key, _ in other.iter_sorted()], sorted(model))
+            # L'index d'expiration suit le chargement
+            cles, _ = other.expire(float('inf'))
+            self.assertEqual(len(cles), len(model))
+        self.assertEqual(self.store.load(os.path.join(self.directory, "absent.bin")), 0)
+        self.verifier({})
+
+    def test_journal(self):
+        """Teste la journalisation des mutations et leur rejeu."""
+        journal = Journal(os.path.join(self.directory, "connexions.journal"))
+        self.store.journal = journal
+        model = self.remplir(100)
+        self.store.remove(next(iter(model)))
+        del model[next(iter(model))]
+        self.store.upsert_many({5000: 1.0, 5001: 2.0})
+        model.update({5000: 1.0, 5001: 2.0})
+        journal.close()
+
+        other = self.make_store()
+        self.assertGreater(Journal(journal.filename).replay_into(other), 100)
+        self.assertEqual(list(other.iter_sorted()), sorted(model.items()))
+
+    def test_operations_des_menus(self):
+        """Teste insert, search, delete, iter_range et nettoyage construits sur l'interface."""
+        for ip in ("10.0.0.2", "10.0.0.1", "192.168.1.1"):
+            self.store.insert(Connexion(ip))
+        self.assertEqual(self.store.search("10.0.0.1").ip, "10.0.0.1")
+        self.assertIsNone(self.store.search("10.0.0.3"))
+        self.assertEqual([c.ip for c in self.store.iter_range("10.0.0.0", "10.0.0.255")],
+                         ["10.0.0.1", "10.0.0.2"])
+        self.assertEqual([c.ip for c in self.store.iter_subnet("192.168.0.0/16")], ["192.168.1.1"])
+        self.assertEqual([c.ip for c in self.store.iter_inorder(start="10.0.0.2")], ["10.0.0.2", "192.168.1.1"])
+        self.assertTrue(self.store.delete("10.0.0.2"))
+        self.assertFalse(self.store.delete("10.0.0.2"))
+        self.store.upsert(Connexion("10.0.0.9").key, time.time() - 3600)
+        self.assertEqual(self.store.nettoyage(30), ["10.0.0.9"])
+        self.assertEqual(len(self.store), 2)
+
+    def test_balayeur(self):
+        """Teste le balayeur sur un stockage, directement et en thread de fond."""
+        logger = Logger(os.path.join(self.directory, "logs.txt"))
+        old = time.time() - 3600
+        for key in range(20):
+            self.store.upsert(key, old)
+        self.store.upsert(100, time.time())
+        sweeper = Sweeper(self.store, logger, 30, budget=0)
+        sweeper.sweep()
+        self.assertEqual(sweeper.evicted, 20)
+
+        self.store.upsert(7, old)
+        lock = RWLock()
+        sweeper = Sweeper(self.store, logger, 30, interval=0.01)
+        sweeper.start(self.store, lock)
+        try:
+            for _ in range(200):
+                if sweeper.evicted:
+                    break
+                time.sleep(0.01)
+        finally:
+            sweeper.stop()
+        self.assertEqual([key for key, _ in self.store.iter_sorted()], [100])
+
+
+class TestBalanceAVLStore(TestAVLStore):
+    """Mêmes tests avec le moteur à facteur d'équilibre."""
+
+    def make_store(self):
+        return AVLStore(BalanceAVLTree())
+
+
+class TestPersistentAVLStore(TestAVLStore):
+    """Mêmes tests avec le moteur persistant (copie de chemin)."""
+
+    def make_store(self):
+        return AVLStore(PersistentAVLTree())
+
+    def test_versions_preservees(self):
+        """Teste qu'un lot laisse intactes les versions précédentes."""
+        model = self.remplir()
+        old_root = self.store.root
+        old_items = list(self.store.iter_sorted())
+        batch = {key: 5000.0 for key in list(model)[:3]}
+        batch[5000] = 1.0
+        self.assertEqual(self.store.upsert_many(batch), (1, 3))
+        self.assertEqual([(node.key, node.ts) for node in self.store.avl._iter_nodes(old_root)], old_items)
+        self.assertEqual(self.store.get(list(model)[0]), 5000.0)
+
+
+class TestBlockStore(TestAVLStore):
+    """Mêmes tests sur le stockage en blocs (petits blocs : découpes et fusions fréquentes)."""
+
+    def make_store(self):
+        return BlockStore(block_size=4)
+
+    def verifier(self, model):
+        TestAVLStore.verifier(self, model)
+        store = self.store
+        self.assertEqual(store.maxes, [keys[-1] for keys in store.keys])
+        for keys, stamps in zip(store.keys, store.stamps):
+            self.assertEqual(len(keys), len(stamps))
+            self.assertLessEqual(len(keys), 2 * store.block_size)
+            self.assertTrue(len(keys) >= store.block_size // 2 or len(store.keys) == 1)
+
+    def test_tailles_de_blocs(self):
+        """Teste que les blocs restent bornés pendant une croissance puis une décroissance."""
+        model = {}
+        for key in range(200):
+            self.store.upsert(key, float(key))
+            model[key] = float(key)
+        self.verifier(model)
+        for key in range(0, 200, 3):
+            self.store.remove(key)
+            del model[key]
+        self.verifier(model)
+
+if __name__ == '__main__':
+    unittest.main()
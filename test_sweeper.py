@@ -0,0 +1,171 @@
+import unittest
+import os
+import tempfile
+import time
+from avl import AVLTree, Connexion, ExpiryScan, ip_to_int
+from avl_persistent import PersistentAVLTree
+from avl_pool import PoolAVLTree
+from connection_table import ConnectionTable, RWLock
+from logger import Logger
+from sweeper import Sweeper
+
+class TestExpire(unittest.TestCase):
+    """Tests pour l'expiration budgétée des moteurs."""
+
+    def peupler(self, avl, n=300):
+        # Une connexion sur trois est ancienne
+        now = time.time()
+        root = None
+        for i in range(n):
+            ts = now - 7200 if i % 3 == 0 else now
+            root = avl.insert(root, Connexion.from_key(i, ts))
+        return root, now
+
+    def test_moteurs(self):
+        """Teste expire() sur les trois moteurs, avec et sans échéance."""
+        for avl in (AVLTree(), PoolAVLTree(), PersistentAVLTree()):
+            with self.subTest(moteur=type(avl).__name__):
+                root, now = self.peupler(avl)
+                # Échéance déjà dépassée : une seule suppression, le passage est incomplet
+                root, first, complete = avl.expire(root, now - 3600, deadline=time.perf_counter() - 1)
+                self.assertEqual((len(first), complete), (1, False))
+                self.assertEqual(len(avl), 299)
+
+                root, cles, complete = avl.expire(root, now - 3600)
+                self.assertTrue(complete)
+                self.assertEqual(sorted(first + cles), list(range(0, 300, 3)))
+                self.assertEqual(len(avl), 200)
+                self.assertEqual(avl.expire(root, now - 3600)[1:], ([], True))
+
+    def test_plus_anciennes_d_abord(self):
+        """Teste qu'un passage interrompu supprime les connexions les plus anciennes."""
+        for avl in (AVLTree(), PoolAVLTree(), PersistentAVLTree()):
+            with self.subTest(moteur=type(avl).__name__):
+                # La clé la plus grande est la plus ancienne
+                now = time.time()
+                root = None
+                for key in range(100):
+                    root = avl.insert(root, Connexion.from_key(key, now - 7200 - key))
+                for expected in (99, 98):
+                    root, cles, complete = avl.expire(root, now - 3600, deadline=time.perf_counter() - 1)
+                    self.assertEqual((cles, complete), ([expected], False))
+
+    def test_grand_arbre_budgete(self):
+        """Teste que le balayage d'un grand arbre est lui aussi découpé par l'échéance."""
+        n = 50000
+        now = time.time()
+        # Une connexion sur deux est ancienne, avec des âges mélangés
+        stamps = [now - 7200 - (key * 7919) % n if key % 2 == 0 else now for key in range(n)]
+        for avl in (PoolAVLTree(), PersistentAVLTree()):
+            with self.subTest(moteur=type(avl).__name__):
+                root = avl.build_from_sorted(list(range(n)), stamps)
+                # Échéance déjà dépassée : chaque passage balaie une seule tranche
+                for scanned in (1, 2):
+                    root, cles, complete = avl.expire(root, now - 3600, deadline=time.perf_counter() - 1)
+                    self.assertEqual((cles, complete), ([], False))
+                    self.assertEqual(avl._scan.scanned, scanned * ExpiryScan.CHUNK)
+
+                evicted = []
+                passes = 0
+                while not complete:
+                    root, cles, complete = avl.expire(root, now - 3600, deadline=time.perf_counter() + 0.002)
+                    evicted.extend(cles)
+                    passes += 1
+                    if avl._scan is not None and avl._scan.pending is not None:
+                        # Balayage terminé : les passages suivants ne font que supprimer
+                        self.assertEqual(avl._scan.scanned, n)
+                self.assertGreater(passes, 2)
+                self.assertEqual(evicted, sorted(range(0, n, 2), key=lambda key: stamps[key]))
+                self.assertEqual(len(avl), n // 2)
+                self.assertEqual(avl.expire(root, now - 3600, deadline=time.perf_counter() + 1)[1:], ([], True))
+
+    def test_nettoyage_trie_par_ip(self):
+        """Teste que le nettoyage renvoie les IP triées, quel que soit l'ordre des âges."""
+        for avl in (AVLTree(), PoolAVLTree(), PersistentAVLTree()):
+            with self.subTest(moteur=type(avl).__name__):
+                now = time.time()
+                root = None
+                for ip, age in (("10.0.0.2", 7300), ("10.0.0.3", 7200), ("10.0.0.1", 7100), ("10.0.0.4", 0)):
+                    root = avl.insert(root, Connexion.from_key(ip_to_int(ip), now - age))
+                root, ips = avl.nettoyage(root, 60)
+                self.assertEqual(ips, ["10.0.0.1", "10.0.0.2", "10.0.0.3"])
+
+
+class TestSweeper(unittest.TestCase):
+    """Tests pour le balayeur des connexions inactives."""
+
+    def setUp(self):
+        fd, self.log_file = tempfile.mkstemp(suffix=".txt")
+        os.close(fd)
+        self.logger = Logger(self.log_file)
+        self.avl = AVLTree()
+        now = time.time()
+        self.root = None
+        for i in range(1000):
+            self.root = self.avl._insert(self.root, i, now - 7200 if i < 600 else now)
+
+    def tearDown(self):
+        os.remove(self.log_file)
+
+    def test_passages_incrementaux(self):
+        """Teste qu'un budget épuisé laisse la suite au passage suivant."""
+        sweeper = Sweeper(self.avl, self.logger, 60, budget=1e-9, interval=5)
+        root = self.root
+        for _ in range(1000):
+            root = sweeper.sweep(root)
+            if sweeper.complete:
+                break
+            # Retard accumulé : pas d'attente avant le passage suivant
+            self.assertEqual(sweeper.next_delay(), 0.0)
+        self.assertEqual(len(self.avl), 400)
+        stats = sweeper.stats()
+        self.assertEqual(stats["evicted"], 600)
+        self.assertGreater(stats["runs"], 1)
+        self.assertFalse(stats["backlog"])
+        self.assertGreaterEqual(stats["max_duration"], stats["last_duration"])
+        self.assertEqual(sweeper.next_delay(), 5)
+
+    def test_logs(self):
+        """Teste l'écriture d'un passage en un bloc, et rien pour un passage vide."""
+        sweeper = Sweeper(self.avl, self.logger, 60, budget=0)
+        root = sweeper.sweep(self.root)
+        sweeper.sweep(root)
+        with open(self.log_file) as f:
+            logs = f.read()
+        self.assertEqual(logs.count("EXPIRATION: 600 connexions inactives depuis plus de 60 minutes"), 1)
+        self.assertEqual(logs.count("  - "), 600)
+        self.assertEqual(logs.count("EXPIRATION"), 1)
+
+    def test_thread_de_fond(self):
+        """Teste le thread de fond : passage reporté tant que le verrou est pris."""
+        table = ConnectionTable(self.avl)
+        table.root = self.root
+        sweeper = Sweeper(self.avl, self.logger, 60, interval=0.01)
+        table.lock.acquire_write()
+        sweeper.start(table)
+        time.sleep(0.1)
+        self.assertEqual(sweeper.evicted, 0)
+        self.assertGreater(sweeper.skipped, 0)
+        table.lock.release_write()
+        for _ in range(200):
+            if sweeper.evicted == 600 and sweeper.complete:
+                break
+            time.sleep(0.01)
+        sweeper.stop()
+        self.assertEqual(len(table), 400)
+
+
+class TestRWLockNonBloquant(unittest.TestCase):
+    """Tests pour l'acquisition non bloquante du verrou d'écriture."""
+
+    def test_acquisition(self):
+        lock = RWLock()
+        lock.acquire_read()
+        self.assertFalse(lock.acquire_write(blocking=False))
+        lock.release_read()
+        self.assertTrue(lock.acquire_write(blocking=False))
+        self.assertFalse(lock.acquire_write(blocking=False))
+        lock.release_write()
+
+if __name__ == "__main__":
+    unittest.main()
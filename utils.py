@@ -11,6 +11,8 @@ def afficher_menu():
     print("2. Supprimer une IP")
     print("3. Nettoyer les IP inactives (> X min)")
     print("4. Rechercher une IP")
-    print("5. Afficher toutes les connexions")
-    print("6. Quitter et sauvegarder")
+    print("5. Rechercher un sous-réseau / une plage d'IP")
+    print("6. Afficher toutes les connexions")
+    print("7. Quitter et sauvegarder")
+    print("8. Statistiques (instrumentation)")
     print("================================================")
\ No newline at end of file